@@ -1,7 +1,13 @@
-import bpy
+try:
+    import bpy
+except ImportError:
+    # The package is also imported by the importer's worker processes, which run without Blender
+    # Those only use blender.parse_worker, so skip everything that needs bpy
+    bpy = None
 
-from . import addon_updater_ops
-from .addon_updater_prefs import GMTUpdaterPreferences
+if bpy:
+    from . import addon_updater_ops
+    from .addon_updater_prefs import GMTUpdaterPreferences
 
 # Include the bl_info at the top level always
 bl_info = {
@@ -18,9 +24,10 @@ bl_info = {
 }
 
 
-classes = (
-    GMTUpdaterPreferences,
-)
+if bpy:
+    classes = (
+        GMTUpdaterPreferences,
+    )
 
 
 def register():
@@ -0,0 +1,65 @@
+from typing import List, Tuple
+
+import numpy as np
+from bpy.types import Action, FCurve
+
+# Raw values of the Keyframe.interpolation enum, used for foreach_set
+INTERPOLATION_VALUES = {
+    'CONSTANT': 0,
+    'LINEAR': 1,
+    'BEZIER': 2,
+}
+
+
+class ActionBuilder:
+    """Collects channel arrays for an action, then creates all of its FCurves in one pass.
+    Each keyframe attribute is set with a single foreach_set per FCurve from preallocated buffers.
+    """
+
+    action: Action
+    channels: List[Tuple[str, int, str, np.ndarray, np.ndarray, str]]
+
+    def __init__(self, action: Action):
+        self.action = action
+        self.channels = list()
+
+    def add_channel(self, data_path: str, index: int, group_name: str, frames, values, interpolation: str = None):
+        """Queues a single FCurve. frames and values should have the same length.
+        If interpolation is None, the user's default keyframe interpolation is kept.
+        """
+
+        self.channels.append((data_path, index, group_name, frames, values, interpolation))
+
+    def build(self) -> List[FCurve]:
+        if not self.channels:
+            return list()
+
+        max_len = max(len(c[3]) for c in self.channels)
+
+        # Shared buffers, sliced to each FCurve's length
+        co = np.empty((max_len, 2), dtype=np.float32)
+        interpolation_buffer = np.empty(max_len, dtype=np.int32)
+
+        fcurves = list()
+        for data_path, index, group_name, frames, values, interpolation in self.channels:
+            count = len(frames)
+
+            fcurve = self.action.fcurves.new(data_path=data_path, index=index, action_group=group_name)
+            fcurve.keyframe_points.add(count)
+
+            co[:count, 0] = frames
+            co[:count, 1] = values
+            fcurve.keyframe_points.foreach_set('co', co[:count].ravel())
+
+            if interpolation:
+                interpolation_buffer[:count] = INTERPOLATION_VALUES[interpolation]
+                fcurve.keyframe_points.foreach_set('interpolation', interpolation_buffer[:count])
+
+            fcurves.append(fcurve)
+
+        # Handles are recalculated only after all keyframes are set
+        for fcurve in fcurves:
+            fcurve.update()
+
+        self.channels.clear()
+        return fcurves
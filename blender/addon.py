@@ -3,9 +3,11 @@ from bpy.app.handlers import persistent
 from bpy.props import BoolProperty, StringProperty
 from bpy.types import AddonPreferences
 
-from .exporter import ExportGMT, menu_func_export
-from .importer import ImportGMT, create_pose_bone_type, menu_func_import
+from .exporter import ExportGMT, ExportGMTBatch, menu_func_export
+from .importer import ClearGMTImportCache, ImportGMT, ImportGMTScene, create_pose_bone_type, menu_func_import
+from .lazy_action import load_placeholder_actions, schedule_assigned_actions, stop_materializing
 from .pattern import GMTPatternIndicesPanel, GMTPatternPanel
+from .watch import StopWatchingGMT, menu_func_watch, stop_watching
 
 # from .pattern import apply_patterns
 
@@ -71,7 +73,11 @@ class StringPropertyGroup(bpy.types.PropertyGroup):
 
 classes = (
     ImportGMT,
+    ImportGMTScene,
+    ClearGMTImportCache,
+    StopWatchingGMT,
     ExportGMT,
+    ExportGMTBatch,
     GMTPatternPanel,
     GMTPatternIndicesPanel,
     StringPropertyGroup,
@@ -109,6 +115,7 @@ def register_addon():
     # Add to the export / import menu
     bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
+    bpy.types.TOPBAR_MT_file_import.append(menu_func_watch)
 
     # Store a collection in the scene to save new pattern types created while importing
     setattr(bpy.types.Scene, 'pattern_types', bpy.props.CollectionProperty(type=StringPropertyGroup))
@@ -136,14 +143,29 @@ The animation will be interpolated from the current keyframe's state to the next
     # Add a handler to load pattern types created while importing (from a previous session)
     bpy.app.handlers.load_post.append(load_pattern_types)
 
+    # Add handlers to build placeholder actions from lazy imports once they are assigned
+    bpy.app.handlers.load_post.append(load_placeholder_actions)
+    bpy.app.handlers.undo_post.append(load_placeholder_actions)
+    bpy.app.handlers.redo_post.append(load_placeholder_actions)
+    bpy.app.handlers.depsgraph_update_post.append(schedule_assigned_actions)
+
 
 def unregister_addon():
     # Remove from the export / import menu
     bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
     bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
+    bpy.types.TOPBAR_MT_file_import.remove(menu_func_watch)
+
+    # Stop the reload timer, and the timer for building assigned placeholder actions
+    stop_watching()
+    stop_materializing()
 
     # Remove handlers
     bpy.app.handlers.load_post.remove(load_pattern_types)
+    bpy.app.handlers.load_post.remove(load_placeholder_actions)
+    bpy.app.handlers.undo_post.remove(load_placeholder_actions)
+    bpy.app.handlers.redo_post.remove(load_placeholder_actions)
+    bpy.app.handlers.depsgraph_update_post.remove(schedule_assigned_actions)
     # bpy.app.handlers.frame_change_pre.remove(change_interpolation)
     # bpy.app.handlers.frame_change_post.remove(apply_patterns)
 
@@ -0,0 +1,216 @@
+from copy import deepcopy
+from typing import AbstractSet, Iterator, List
+
+import numpy as np
+
+from ..gmt_lib import *
+from .array_math import quat_multiply, sample_keyframes
+from .bone_mapping import GMTBoneMapping
+from .curve_array import GMTArrayAnimation, GMTArrayBone, GMTArrayCurve
+from .error import GMTError
+
+# Conversions in this module only depend on gmt_lib and numpy, so they can also run in worker processes
+
+
+def pos_to_blender_array(values: np.ndarray) -> np.ndarray:
+    return values[:, [0, 2, 1]] * (-1.0, 1.0, 1.0)
+
+
+def pos_from_blender_array(values: np.ndarray) -> np.ndarray:
+    return values[:, [0, 2, 1]] * (-1.0, 1.0, 1.0)
+
+
+def rot_to_blender_array(values: np.ndarray) -> np.ndarray:
+    return values[:, [3, 0, 2, 1]] * (1.0, -1.0, 1.0, 1.0)
+
+
+def rot_from_blender_array(values: np.ndarray) -> np.ndarray:
+    return values[:, [1, 3, 2, 0]] * (-1.0, 1.0, 1.0, 1.0)
+
+
+def transform_location_from_blender_array(conversion, values: np.ndarray) -> np.ndarray:
+    """conversion is a GMTBoneConversion, or any object with the same factors (e.g. from a worker process)"""
+
+    return pos_from_blender_array(values @ conversion.rest_matrix.T + conversion.head_offset)
+
+
+def transform_rotation_from_blender_array(conversion, values: np.ndarray) -> np.ndarray:
+    return rot_from_blender_array(quat_multiply(quat_multiply(conversion.from_blender_pre, values), conversion.from_blender_post))
+
+
+def pattern1_from_blender(pattern: List[int]) -> List[List[int]]:
+    return [pattern, pattern[1:] + [pattern[-1]]]
+
+
+def pattern2_from_blender(pattern: List[int]) -> List[List[int]]:
+    return pattern
+
+
+def pattern1_to_blender_array(values: np.ndarray) -> np.ndarray:
+    # Only the start pattern is kept
+    return values[:, :1]
+
+
+def convert_gmt_curve_to_blender_array(curve: GMTCurve) -> GMTArrayCurve:
+    curve.fill_channels()
+    array_curve = GMTArrayCurve.from_curve(curve)
+
+    if len(array_curve):
+        if curve.type == GMTCurveType.LOCATION:
+            array_curve.values = pos_to_blender_array(array_curve.values)
+        elif curve.type == GMTCurveType.ROTATION:
+            array_curve.values = rot_to_blender_array(array_curve.values)
+
+    return array_curve
+
+
+def convert_gmt_bone_to_blender_array(bone: GMTBone) -> GMTArrayBone:
+    array_bone = GMTArrayBone(bone.name)
+
+    for curve in bone.curves:
+        array_bone.set_curve(convert_gmt_curve_to_blender_array(curve))
+
+    return array_bone
+
+
+def convert_gmt_animations(gmt: GMT, bone_names: AbstractSet[str], merge_vector_curves: bool, is_auth: bool,
+                           remap_bones: bool = False) -> List[GMTArrayAnimation]:
+    """Converts all animations of a GMT into arrays in Blender space, and merges vector if needed.
+    Bones that are not in bone_names are skipped. Values still need to be transformed into pose space.
+    If remap_bones is True, bones are renamed to their equivalents in bone_names' engine (see bone_mapping).
+    """
+
+    return list(iter_gmt_animations(gmt, bone_names, merge_vector_curves, is_auth, remap_bones))
+
+
+def iter_gmt_animations(gmt: GMT, bone_names: AbstractSet[str], merge_vector_curves: bool, is_auth: bool,
+                        remap_bones: bool = False, release: bool = False) -> Iterator[GMTArrayAnimation]:
+    """Same as convert_gmt_animations(), but converts each animation only when it is requested.
+    If release is True, each animation is removed from the GMT once it is converted, so that it can be freed.
+    """
+
+    vector_version = gmt.vector_version
+
+    # Built once for all bones in the file, so that each bone only needs a single lookup
+    bone_mapping = None
+    if remap_bones:
+        bone_mapping = GMTBoneMapping(set().union(*(anm.bones.keys() for anm in gmt.animation_list)), bone_names)
+        print(f'Mapping bones from {bone_mapping.source_engine} to {bone_mapping.target_engine} engine')
+
+    for i in range(len(gmt.animation_list)):
+        anm = gmt.animation_list[i]
+        if release:
+            gmt.animation_list[i] = None
+
+        array_anm = GMTArrayAnimation(anm.name, anm.frame_rate, anm.end_frame)
+        array_anm.is_face = gmt.is_face_gmt and anm.is_face_anm()
+
+        # Convert curves early into arrays to allow for easier modification before creating FCurves
+        # Bones keep their GMT names until vector is merged
+        bones = dict()
+        target_names = dict()
+        for bone_name in anm.bones:
+            target_name = bone_mapping.get(bone_name) if bone_mapping else (
+                bone_name if bone_name in bone_names else None)
+
+            if target_name is None:
+                print(f'WARNING: Skipped bone: "{bone_name}"')
+                continue
+
+            bones[bone_name] = convert_gmt_bone_to_blender_array(anm.bones[bone_name])
+            target_names[bone_name] = target_name
+
+        # Try merging vector into center
+        if merge_vector_curves:
+            # Bone names are constant because vector does not exist pre-Ishin
+            merge_vector(bones.get('center_c_n'), bones.get('vector_c_n'), vector_version, is_auth)
+
+        for bone_name, bone in bones.items():
+            target_name = target_names[bone_name]
+            if target_name in array_anm.bones:
+                print(f'WARNING: Skipped bone: "{bone_name}" - "{target_name}" is already animated')
+                continue
+
+            bone.name = target_name
+            array_anm.bones[target_name] = bone
+
+        # Only the converted animation should be kept alive while it is being used
+        del anm
+        yield array_anm
+
+
+def merge_vector(center_bone: GMTArrayBone, vector_bone: GMTArrayBone, vector_version: GMTVectorVersion, is_auth: bool):
+    """Merges vector_c_n curves into center_c_n for easier modification.
+    Does not affect NO_VECTOR animations.
+    """
+
+    if vector_version == GMTVectorVersion.NO_VECTOR:
+        return
+
+    if not (center_bone and vector_bone):
+        print('GMTWarning: Cannot merge vector - \"center_c_n\" and/or \"vector_c_n\" bones are missing')
+
+    if (vector_version == GMTVectorVersion.OLD_VECTOR and not is_auth) or vector_version == GMTVectorVersion.DRAGON_VECTOR:
+        # Both curves' values should be applied, so add vector to center
+        center_bone.location = add_curve(center_bone.location, vector_bone.location, GMTCurveType.LOCATION)
+        center_bone.rotation = add_curve(center_bone.rotation, vector_bone.rotation, GMTCurveType.ROTATION)
+
+    # Reset vector's curves to avoid confusion, since it won't be used anymore
+    vector_bone.location = convert_gmt_curve_to_blender_array(GMTCurve.new_location_curve())
+    vector_bone.rotation = convert_gmt_curve_to_blender_array(GMTCurve.new_rotation_curve())
+
+
+def add_curve(curve: GMTArrayCurve, other: GMTArrayCurve, expected_curve_type: GMTCurveType) -> GMTArrayCurve:
+    """Adds the animation data of a curve to this curve. Both curves need to have the same GMTCurveType.
+    If their type is LOCATION, vectors will be added.
+    If their type is ROTATION, quaternions will be multiplied.
+    expected_curve_type is only used if both curves are None
+    """
+
+    if (other or curve) is None:
+        if expected_curve_type == GMTCurveType.LOCATION:
+            curve = GMTCurve.new_location_curve()
+        elif expected_curve_type == GMTCurveType.ROTATION:
+            curve = GMTCurve.new_rotation_curve()
+        else:
+            curve = GMTCurve(expected_curve_type)
+
+        return convert_gmt_curve_to_blender_array(curve)
+    elif other is None or len(other) == 0:
+        return curve
+    elif curve is None:
+        return deepcopy(other)
+
+    if curve.type != other.type:
+        raise GMTError('Curves with different types cannot be added')
+
+    if curve.type == GMTCurveType.LOCATION:
+        # Vector add and lerp
+        def add(v1, v2): return v1 + v2
+        is_rotation = False
+
+        if len(curve) == 0:
+            curve = GMTArrayCurve(curve.type, curve.channel, [0.0], [(0.0, 0.0, 0.0)])
+    elif curve.type == GMTCurveType.ROTATION:
+        # Quaternion multiply and slerp
+        def add(v1, v2): return quat_multiply(v1, v2)
+        is_rotation = True
+
+        if len(curve) == 0:
+            curve = GMTArrayCurve(curve.type, curve.channel, [0.0], [(1.0, 0.0, 0.0, 0.0)])
+    else:
+        raise GMTError(f'Incompatible curve type for addition: {curve.type}')
+
+    # Only add/interpolate on frames that have a keyframe in either curve
+    # Each curve is interpolated on the frames it is missing, or uses its first/last value outside of its range
+    frames = np.union1d(curve.frames, other.frames)
+    frames = frames[frames >= 0]
+
+    values = add(
+        sample_keyframes(curve.frames, curve.values, frames, is_rotation),
+        sample_keyframes(other.frames, other.values, frames, is_rotation),
+    )
+
+    return GMTArrayCurve(curve.type, curve.channel, frames, values)
+
+
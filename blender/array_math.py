@@ -0,0 +1,146 @@
+from typing import Tuple
+
+import numpy as np
+
+# Quaternion arrays use Blender's (w, x, y, z) order in the last axis
+
+
+def quat_multiply(q1: np.ndarray, q2: np.ndarray) -> np.ndarray:
+    """Hamilton product of two (..., 4) quaternion arrays. Shapes are broadcast against each other."""
+
+    w1, x1, y1, z1 = np.moveaxis(np.asarray(q1, dtype=np.float64), -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(np.asarray(q2, dtype=np.float64), -1, 0)
+
+    return np.stack((
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+        w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+    ), axis=-1)
+
+
+def quat_slerp(q1: np.ndarray, q2: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """Spherical interpolation between (N, 4) quaternion arrays by (N,) factors.
+    Takes the shortest path, the same as mathutils' Quaternion.slerp.
+    """
+
+    q1 = np.asarray(q1, dtype=np.float64)
+    q2 = np.asarray(q2, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)[..., None]
+
+    dot = np.sum(q1 * q2, axis=-1, keepdims=True)
+    q2 = np.where(dot < 0.0, -q2, q2)
+    dot = np.abs(dot)
+
+    # Fall back to linear interpolation for (almost) equal quaternions to avoid dividing by zero
+    omega = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_omega = np.sin(omega)
+    close = sin_omega < 1e-6
+    sin_omega = np.where(close, 1.0, sin_omega)
+
+    s1 = np.where(close, 1.0 - t, np.sin((1.0 - t) * omega) / sin_omega)
+    s2 = np.where(close, t, np.sin(t * omega) / sin_omega)
+
+    return s1 * q1 + s2 * q2
+
+
+def vec_lerp(v1: np.ndarray, v2: np.ndarray, t: np.ndarray) -> np.ndarray:
+    t = np.asarray(t, dtype=np.float64)[..., None]
+    return v1 + (v2 - v1) * t
+
+
+def sample_keyframes(frames: np.ndarray, values: np.ndarray, times: np.ndarray, is_rotation: bool) -> np.ndarray:
+    """Evaluates keyframes at the given times using linear (or spherical, for rotations) interpolation.
+    Times outside of the keyframe range are clamped to the first or last keyframe.
+    """
+
+    frames = np.asarray(frames, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+
+    if len(frames) == 1:
+        return np.repeat(values[:1], len(times), axis=0)
+
+    # Index of the last keyframe that is not greater than each time, and the one after it
+    less = np.clip(np.searchsorted(frames, times, side='right') - 1, 0, len(frames) - 2)
+    more = less + 1
+
+    factor = np.clip((times - frames[less]) / (frames[more] - frames[less]), 0.0, 1.0)
+
+    if is_rotation:
+        result = quat_slerp(values[less], values[more], factor)
+    else:
+        result = vec_lerp(values[less], values[more], factor)
+
+    # Use the end keyframes as they are, since slerp can flip the sign of the last quaternion
+    result[times <= frames[0]] = values[0]
+    result[times >= frames[-1]] = values[-1]
+
+    return result
+
+
+def simplify_keyframes(frames: np.ndarray, values: np.ndarray, tolerance: float, error_func,
+                       slerp: bool = False) -> np.ndarray:
+    """Ramer-Douglas-Peucker simplification of a keyframed channel group.
+    Returns a mask of the keyframes to keep, such that linearly interpolating between the kept keyframes
+    stays within tolerance of every removed keyframe, as measured by error_func(interpolated, original).
+    If slerp is True, values are quaternions that are interpolated with slerp instead, like in game.
+    """
+
+    keep = np.zeros(len(frames), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    segments = [(0, len(frames) - 1)]
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2:
+            continue
+
+        t = (frames[start + 1:end] - frames[start]) / (frames[end] - frames[start])
+        if slerp:
+            interpolated = quat_slerp(np.broadcast_to(values[start], (len(t), values.shape[1])),
+                                      np.broadcast_to(values[end], (len(t), values.shape[1])), t)
+        else:
+            interpolated = values[start] + (values[end] - values[start]) * t[:, None]
+
+        errors = error_func(interpolated, values[start + 1:end])
+        i = int(np.argmax(errors))
+
+        if errors[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            segments.append((start, split))
+            segments.append((split, end))
+
+    return keep
+
+
+def location_error(interpolated: np.ndarray, values: np.ndarray) -> np.ndarray:
+    return np.linalg.norm(interpolated - values, axis=1)
+
+
+def rotation_error(interpolated: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Angle between quaternions. Linearly interpolated FCurves give unnormalized quaternions, which Blender
+    normalizes when evaluating the pose, so both sides are normalized before comparing.
+    """
+
+    interpolated_norm = np.linalg.norm(interpolated, axis=1)
+    values_norm = np.linalg.norm(values, axis=1)
+
+    dots = np.abs(np.sum(interpolated * values, axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dots = dots / (interpolated_norm * values_norm)
+
+    # Interpolating between opposite quaternions can pass through zero, so those segments are never simplified
+    dots = np.nan_to_num(dots, nan=0.0)
+
+    return 2.0 * np.arccos(np.clip(dots, 0.0, 1.0))
+
+
+def resample_frames(frames: np.ndarray, ratio: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the whole frames at the new frame rate that the keyframes land on, and the times at the old
+    frame rate that each of them should be sampled at. ratio is the new frame rate divided by the old one.
+    Keyframes that land on the same frame are merged.
+    """
+
+    new_frames = np.unique(np.rint(np.asarray(frames, dtype=np.float64) * ratio))
+    return new_frames, new_frames / ratio
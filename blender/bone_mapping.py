@@ -0,0 +1,109 @@
+from typing import AbstractSet, Dict, Iterable, Optional, Tuple
+
+from .pattern_lists import HAND_BONES_DE, HAND_BONES_NEW, HAND_BONES_OLD
+
+# Bone naming differs between engines:
+# OLD (Y3-5, Kenzan) bones have no suffix, NEW (Y0/K1, Ishin) and DE bones end with _n,
+# where bones on the center line use _c_n instead (e.g. center -> center_c_n)
+ENGINES = ('OLD', 'NEW', 'DE')
+
+# Engine of each GMT export game preset
+GAME_ENGINES = {
+    'KENZAN': 'OLD',
+    'YAKUZA3': 'OLD',
+    'YAKUZA5': 'OLD',
+    'ISHIN': 'NEW',
+    'DE': 'DE',
+}
+
+# Bones that only exist in DE skeletons, used for telling NEW and DE skeletons apart
+DE_ONLY_BONES = frozenset(HAND_BONES_DE) - frozenset(HAND_BONES_NEW)
+
+# Center line bones that exist in all engines
+CENTER_BONES_OLD = ['center', 'kosi', 'mune', 'kubi', 'face']
+CENTER_BONES_NEW = list(map(lambda x: x + '_c_n', CENTER_BONES_OLD))
+
+
+def make_bone_name_tables() -> Dict[Tuple[str, str], Dict[str, str]]:
+    """Known bone name pairs for each (source engine, target engine). Other names are translated by suffix"""
+
+    old_to_new = dict(zip(HAND_BONES_OLD + CENTER_BONES_OLD, HAND_BONES_NEW + CENTER_BONES_NEW))
+    new_to_old = {new: old for old, new in old_to_new.items()}
+
+    # DE hands lack some of the older bones
+    de_names = frozenset(HAND_BONES_DE)
+    old_to_de = {old: new for old, new in old_to_new.items() if new in de_names or new in CENTER_BONES_NEW}
+    de_to_old = {new: old for old, new in old_to_de.items()}
+
+    return {
+        ('OLD', 'NEW'): old_to_new,
+        ('OLD', 'DE'): old_to_de,
+        ('NEW', 'OLD'): new_to_old,
+        ('DE', 'OLD'): de_to_old,
+        ('NEW', 'DE'): dict(),
+        ('DE', 'NEW'): dict(),
+    }
+
+
+BONE_NAME_TABLES = make_bone_name_tables()
+
+
+def detect_engine(bone_names: Iterable[str]) -> str:
+    bone_names = frozenset(bone_names)
+
+    # Decided by most bones, in case a skeleton has a few bones with unusual names
+    if sum(name.endswith('_n') for name in bone_names) * 2 <= len(bone_names):
+        return 'OLD'
+
+    return 'DE' if bone_names & DE_ONLY_BONES else 'NEW'
+
+
+def translate_bone_name(name: str, source_engine: str, target_engine: str) -> str:
+    """Translates a bone name between engines, using the known pairs first and the naming suffixes otherwise"""
+
+    if source_engine == target_engine:
+        return name
+
+    table = BONE_NAME_TABLES[(source_engine, target_engine)]
+    if name in table:
+        return table[name]
+
+    if source_engine == 'OLD':
+        return name + ('_n' if name.endswith(('_r', '_l')) else '_c_n')
+
+    if target_engine == 'OLD':
+        if name.endswith('_c_n'):
+            return name[:-4]
+        if name.endswith('_n'):
+            return name[:-2]
+
+    return name
+
+
+class GMTBoneMapping:
+    """Precomputed index from source bone names to target bone names, for animating one skeleton's bones on another.
+    If target_names is given, only names that exist in the target are mapped.
+    """
+
+    source_engine: str
+    target_engine: str
+    index: Dict[str, str]
+
+    def __init__(self, source_names: Iterable[str], target_names: AbstractSet[str] = None, target_engine: str = None):
+        source_names = list(source_names)
+
+        self.source_engine = detect_engine(source_names)
+        self.target_engine = target_engine or detect_engine(target_names or ())
+        self.index = dict()
+
+        for name in source_names:
+            if target_names is not None and name in target_names:
+                self.index[name] = name
+                continue
+
+            mapped = translate_bone_name(name, self.source_engine, self.target_engine)
+            if target_names is None or mapped in target_names:
+                self.index[name] = mapped
+
+    def get(self, name: str) -> Optional[str]:
+        return self.index.get(name)
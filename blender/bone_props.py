@@ -1,8 +1,10 @@
+from hashlib import sha1
 from typing import Dict, List, Tuple
 
 import bpy
+import numpy as np
 from bpy.types import EditBone
-from mathutils import Quaternion, Vector
+from mathutils import Matrix, Quaternion, Vector
 
 
 class GMTBlenderBoneProps:
@@ -53,6 +55,77 @@ def get_bones_props(edit_bones: List[EditBone]) -> Dict[str, GMTBlenderBoneProps
         bone_props[b.name] = bp
     return bone_props
 
+
+def get_rest_bones_props(ao: bpy.types.Object) -> Dict[str, GMTBlenderBoneProps]:
+    """Same as get_edit_bones_props, but reads the rest pose from armature.data.bones without entering edit mode.
+    Also works on linked and library override armatures.
+    """
+
+    bones = ao.data.bones
+    heads, matrices = read_rest_pose_arrays(ao)
+
+    bone_props = {}
+    for b, head, matrix in zip(bones, heads, matrices):
+        bp = GMTBlenderBoneProps()
+        bp.parent_name = b.parent.name if b.parent else ""
+
+        # Custom properties of edit bones are stored in their bones
+        if "head_no_rot" in b:
+            bp.head = Vector(b["head_no_rot"].to_list())
+        else:
+            bp.head = Vector(head)
+
+        if "local_rot" in b:
+            bp.rot_local = Quaternion(b["local_rot"].to_list())
+        else:
+            bp.rot_local = Quaternion()
+
+        bp.loc = Vector(matrix[:3, 3])
+        bp.rot = Matrix(matrix[:3, :3]).to_quaternion()
+
+        bone_props[b.name] = bp
+    return bone_props
+
+
+def get_rest_pose_fingerprint(ao: bpy.types.Object) -> str:
+    """Hashes everything that get_rest_bones_props depends on, without building the props"""
+
+    heads, matrices = read_rest_pose_arrays(ao)
+
+    fingerprint = sha1()
+    fingerprint.update(heads.tobytes())
+    fingerprint.update(matrices.tobytes())
+
+    for b in ao.data.bones:
+        fingerprint.update(f'{b.name}\0{b.parent.name if b.parent else ""}\0'.encode())
+
+        for prop in ("head_no_rot", "local_rot"):
+            if prop in b:
+                fingerprint.update(prop.encode())
+                fingerprint.update(np.array(b[prop].to_list(), dtype=np.float32).tobytes())
+
+    return fingerprint.hexdigest()
+
+
+def read_rest_pose_arrays(ao: bpy.types.Object) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the (N, 3) head_local and (N, 4, 4) matrix_local arrays of the armature's bones"""
+
+    if ao.mode == 'EDIT':
+        # Bones are only synced with edit bones when leaving edit mode
+        ao.update_from_editmode()
+
+    bones = ao.data.bones
+    count = len(bones)
+
+    heads = np.empty(count * 3, dtype=np.float32)
+    bones.foreach_get('head_local', heads)
+
+    # Matrices are flattened in column major order
+    matrices = np.empty(count * 16, dtype=np.float32)
+    bones.foreach_get('matrix_local', matrices)
+
+    return heads.reshape(count, 3), matrices.reshape(count, 4, 4).transpose(0, 2, 1)
+
 # TODO: Using GMDs for patterns is disabled
 
 # def get_gmd_bones_props(gmd_bones) -> Dict[str, Tuple[Vector, str]]:
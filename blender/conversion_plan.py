@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from typing import Dict
+
+import bpy
+import numpy as np
+from mathutils import Quaternion, Vector
+
+from .bone_props import GMTBlenderBoneProps, get_rest_bones_props, get_rest_pose_fingerprint
+
+# Number of armature rest poses to keep plans for
+PLAN_CACHE_SIZE = 16
+
+
+class GMTBoneConversion:
+    """Factors for converting a single bone's curve values between GMT space and Blender pose space"""
+
+    head_offset: np.ndarray
+    rest_matrix: np.ndarray
+    to_blender_pre: np.ndarray
+    to_blender_post: np.ndarray
+    from_blender_pre: np.ndarray
+    from_blender_post: np.ndarray
+
+    def __init__(self, bone_props: Dict[str, GMTBlenderBoneProps], bone_name: str):
+        prop = bone_props.get(bone_name, GMTBlenderBoneProps())
+
+        parent = bone_props.get(prop.parent_name)
+        parent_head = parent.head if parent else Vector()
+        parent_rot = parent.rot_local if parent else Quaternion()
+
+        rot = prop.rot
+        rot_local = prop.rot_local
+
+        self.head_offset = np.array(prop.head - parent_head)
+        self.rest_matrix = np.array(rot.to_matrix())
+
+        self.to_blender_pre = np.array(rot.inverted() @ parent_rot)
+        self.to_blender_post = np.array(rot_local.inverted() @ parent_rot.inverted() @ rot)
+
+        self.from_blender_pre = np.array(parent_rot.inverted() @ rot)
+        self.from_blender_post = np.array(rot.inverted() @ parent_rot @ rot_local)
+
+
+class GMTConversionPlan:
+    """Per-bone conversion factors for an armature's rest pose. Bones are converted on first use."""
+
+    bone_props: Dict[str, GMTBlenderBoneProps]
+    bones: Dict[str, GMTBoneConversion]
+    fingerprint: str
+
+    def __init__(self, bone_props: Dict[str, GMTBlenderBoneProps], fingerprint: str = ''):
+        self.bone_props = bone_props
+        self.bones = dict()
+        self.fingerprint = fingerprint
+
+    def get(self, bone_name: str) -> GMTBoneConversion:
+        conversion = self.bones.get(bone_name)
+        if conversion is None:
+            conversion = self.bones[bone_name] = GMTBoneConversion(self.bone_props, bone_name)
+
+        return conversion
+
+
+plans: 'OrderedDict[str, GMTConversionPlan]' = OrderedDict()
+
+
+def get_conversion_plan(ao: bpy.types.Object) -> GMTConversionPlan:
+    """Returns the conversion plan for the armature's current rest pose.
+    Plans are cached by rest pose fingerprint, so they are reused across imports and exports on armatures
+    with the same skeleton, and are rebuilt once the rest pose changes.
+    """
+
+    fingerprint = get_rest_pose_fingerprint(ao)
+
+    plan = plans.get(fingerprint)
+    if plan is None:
+        plan = plans[fingerprint] = GMTConversionPlan(get_rest_bones_props(ao), fingerprint)
+
+        if len(plans) > PLAN_CACHE_SIZE:
+            plans.popitem(last=False)
+    else:
+        plans.move_to_end(fingerprint)
+
+    return plan
@@ -1,12 +1,16 @@
 from math import atan, tan
 from typing import Dict, List, Tuple
 
+import numpy as np
 from bpy.types import Camera
 from mathutils import Matrix, Quaternion, Vector
 
 from ..gmt_lib import *
-from ..gmt_lib.gmt.structure.cmt import CMTAnimation
+from ..gmt_lib.gmt.structure.cmt import CMTAnimation, CMTFrame
+from .array_converter import pos_from_blender_array, pos_to_blender_array
+from .array_math import quat_multiply
 from .bone_props import GMTBlenderBoneProps
+from .conversion_plan import GMTBoneConversion
 
 
 def pos_to_blender(pos):
@@ -29,19 +33,11 @@ def pattern1_to_blender(pattern: List[List[int]]) -> List[int]:
     return list(map(lambda x: (x[0],), pattern))
 
 
-def pattern1_from_blender(pattern: List[int]) -> List[List[int]]:
-    return [pattern, pattern[1:] + [pattern[-1]]]
-
-
 def pattern2_to_blender(pattern: List[int]) -> List[int]:
     # No need to change anything for now
     return pattern
 
 
-def pattern2_from_blender(pattern: List[int]) -> List[List[int]]:
-    return pattern
-
-
 def fov_to_blender(fov, sensor_height):
     # sensor_height should be 100.0 here
     return (sensor_height / 2) / tan(fov / 2)
@@ -60,6 +56,26 @@ def focus_point_from_blender(focus_point, location):
     return location + ((focus_point - location).to_track_quat('-Z', 'Y') @ Vector((0.0, 0.0, (focus_point - location).length)))
 
 
+def fov_to_blender_array(fovs: np.ndarray, sensor_height: float) -> np.ndarray:
+    return (sensor_height / 2) / np.tan(fovs / 2)
+
+
+def fov_from_blender_array(fovs: np.ndarray, sensor_height: float) -> np.ndarray:
+    return 2 * np.arctan(sensor_height / (2 * fovs))
+
+
+def focus_point_to_blender_array(focus_points: np.ndarray, locations: np.ndarray) -> np.ndarray:
+    """Array version of focus_point_to_blender.
+    Tracking the focus point and moving back by its distance just mirrors it around the location.
+    """
+
+    return 2 * locations - focus_points
+
+
+def focus_point_from_blender_array(focus_points: np.ndarray, locations: np.ndarray) -> np.ndarray:
+    return 2 * locations - focus_points
+
+
 def convert_gmt_curve_to_blender(curve: GMTCurve):
     curve.fill_channels()
 
@@ -72,17 +88,60 @@ def convert_gmt_curve_to_blender(curve: GMTCurve):
 
 
 def convert_cmt_anm_to_blender(anm: CMTAnimation, camera_data: Camera):
-    for frame in anm.frames:
-        frame.location = pos_to_blender(frame.location)
-        frame.focus_point = focus_point_to_blender(pos_to_blender(frame.focus_point), frame.location)
-        frame.fov = fov_to_blender(frame.fov, camera_data.sensor_height)
+    convert_cmt_frames_to_blender(anm.frames, camera_data.sensor_height)
 
 
 def convert_cmt_anm_from_blender(anm: CMTAnimation, camera_data: Camera):
-    for frame in anm.frames:
-        frame.location = Vector(pos_from_blender(frame.location))
-        frame.focus_point = focus_point_from_blender(Vector(pos_from_blender(frame.focus_point)), frame.location)
-        frame.fov = fov_from_blender(frame.fov, camera_data.sensor_height)
+    convert_cmt_frames_from_blender(anm.frames, camera_data.sensor_height)
+
+
+def convert_cmt_frames_to_blender(frames: List[CMTFrame], sensor_height: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Converts the frames in place using array math. Frames from all animations of a CMT should be converted at once.
+    Returns the converted (N, 3) locations, (N, 3) focus points and (N,) fovs.
+    """
+
+    locations, focus_points, fovs = cmt_frames_to_arrays(frames)
+
+    locations = pos_to_blender_array(locations)
+    focus_points = focus_point_to_blender_array(pos_to_blender_array(focus_points), locations)
+    fovs = fov_to_blender_array(fovs, sensor_height)
+
+    set_cmt_frames_from_arrays(frames, locations, focus_points, fovs)
+    return locations, focus_points, fovs
+
+
+def convert_cmt_frames_from_blender(frames: List[CMTFrame], sensor_height: float, locations: np.ndarray = None,
+                                    fovs: np.ndarray = None):
+    """Reverse of convert_cmt_frames_to_blender.
+    The frames' Blender locations and fovs can be given as arrays if they are already available (e.g. from FCurves).
+    """
+
+    if locations is None or fovs is None:
+        locations, focus_points, fovs = cmt_frames_to_arrays(frames)
+    else:
+        # Only the focus points are made per frame (by gmt_lib)
+        focus_points = np.array([frame.focus_point[:3] for frame in frames], dtype=np.float64).reshape(-1, 3)
+
+    locations = pos_from_blender_array(locations)
+    focus_points = focus_point_from_blender_array(pos_from_blender_array(focus_points), locations)
+    fovs = fov_from_blender_array(fovs, sensor_height)
+
+    set_cmt_frames_from_arrays(frames, locations, focus_points, fovs)
+
+
+def cmt_frames_to_arrays(frames: List[CMTFrame]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    locations = np.array([frame.location[:3] for frame in frames], dtype=np.float64).reshape(-1, 3)
+    focus_points = np.array([frame.focus_point[:3] for frame in frames], dtype=np.float64).reshape(-1, 3)
+    fovs = np.array([frame.fov for frame in frames], dtype=np.float64)
+
+    return locations, focus_points, fovs
+
+
+def set_cmt_frames_from_arrays(frames: List[CMTFrame], locations: np.ndarray, focus_points: np.ndarray, fovs: np.ndarray):
+    for frame, location, focus_point, fov in zip(frames, locations.tolist(), focus_points.tolist(), fovs.tolist()):
+        frame.location = Vector(location)
+        frame.focus_point = Vector(focus_point)
+        frame.fov = fov
 
 
 def transform_location_to_blender(bone_props: Dict[str, GMTBlenderBoneProps], bone_name: str, values: List[Vector]):
@@ -131,6 +190,18 @@ def transform_rotation_to_blender(bone_props: Dict[str, GMTBlenderBoneProps], bo
     return list(map(lambda x: pre_quat @ x @ post_quat, values))
 
 
+def transform_location_to_blender_array(conversion: GMTBoneConversion, values: np.ndarray) -> np.ndarray:
+    """Array version of transform_location_to_blender.
+    The translation of (pre_mat @ Translation(v) @ post_mat) is just the inverse rest rotation applied to v.
+    """
+
+    return (values - conversion.head_offset) @ conversion.rest_matrix
+
+
+def transform_rotation_to_blender_array(conversion: GMTBoneConversion, values: np.ndarray) -> np.ndarray:
+    return quat_multiply(quat_multiply(conversion.to_blender_pre, values), conversion.to_blender_post)
+
+
 def transform_location_from_blender(bone_props: Dict[str, GMTBlenderBoneProps], bone_name: str, values: List[Vector]) -> List[Tuple[float]]:
     prop = bone_props.get(bone_name, GMTBlenderBoneProps())
     head = prop.head
@@ -0,0 +1,141 @@
+from typing import AbstractSet, Dict, List
+
+import numpy as np
+
+from ..gmt_lib import *
+
+
+class GMTArrayCurve:
+    """Array-backed counterpart of GMTCurve.
+    Keyframes are stored as a frames array and an (N, C) values array instead of GMTKeyframe objects.
+    """
+
+    type: GMTCurveType
+    channel: GMTCurveChannel
+    frames: np.ndarray
+    values: np.ndarray
+
+    def __init__(self, curve_type: GMTCurveType, channel: GMTCurveChannel, frames: np.ndarray, values: np.ndarray):
+        self.type = curve_type
+        self.channel = channel
+        self.frames = np.asarray(frames, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+
+        # Empty curves keep their channel count if it is known, since reshape cannot infer it
+        if len(self.frames):
+            self.values = self.values.reshape(len(self.frames), -1)
+        elif self.values.ndim != 2:
+            self.values = self.values.reshape(0, 0)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @classmethod
+    def from_curve(cls, curve: GMTCurve) -> 'GMTArrayCurve':
+        """Packs the keyframes of a GMTCurve into arrays. Values are not converted."""
+
+        count = len(curve.keyframes)
+        frames = np.fromiter((kf.frame for kf in curve.keyframes), dtype=np.float64, count=count)
+        values = np.array([kf.value[:] for kf in curve.keyframes], dtype=np.float64)
+
+        return cls(curve.type, curve.channel, frames, values)
+
+
+class GMTArrayBone:
+    """Holds the array curves of a single GMTBone"""
+
+    name: str
+    location: GMTArrayCurve
+    rotation: GMTArrayCurve
+    patterns: List[GMTArrayCurve]
+
+    def __init__(self, name: str):
+        self.name = name
+        self.location = None
+        self.rotation = None
+        self.patterns = list()
+
+    @property
+    def curves(self) -> List[GMTArrayCurve]:
+        return [c for c in (self.location, self.rotation) if c is not None] + self.patterns
+
+    def set_curve(self, curve: GMTArrayCurve):
+        """Sets the location or rotation curve, or appends a pattern curve, depending on the curve's type"""
+
+        if curve.type == GMTCurveType.LOCATION:
+            self.location = curve
+        elif curve.type == GMTCurveType.ROTATION:
+            self.rotation = curve
+        else:
+            self.patterns.append(curve)
+
+
+class GMTArrayAnimation:
+    """Holds the array bones of a single GMTAnimation, along with the animation's metadata"""
+
+    name: str
+    frame_rate: float
+    end_frame: int
+    is_face: bool
+    bones: Dict[str, GMTArrayBone]
+
+    def __init__(self, name: str, frame_rate: float, end_frame: int):
+        self.name = name
+        self.frame_rate = frame_rate
+        self.end_frame = end_frame
+        self.is_face = False
+        self.bones = dict()
+
+    def copy(self, bone_names: AbstractSet[str] = None) -> 'GMTArrayAnimation':
+        """Returns a copy that shares the same bone objects, only including bones in bone_names if given"""
+
+        anm = GMTArrayAnimation(self.name, self.frame_rate, self.end_frame)
+        anm.is_face = self.is_face
+        anm.bones = {name: bone for name, bone in self.bones.items() if bone_names is None or name in bone_names}
+
+        return anm
+
+    def to_dict(self) -> Dict:
+        """Returns the animation as nested dicts of numbers and flat lists, which can be stored in ID properties.
+        Curve values are flattened, and groups are keyed by strings since ID properties do not support lists of them.
+        """
+
+        curves = dict()
+        for bone_name, bone in self.bones.items():
+            for curve in bone.curves:
+                curves[str(len(curves))] = {
+                    'bone': bone_name,
+                    'type': int(curve.type.value),
+                    'channel': int(curve.channel.value),
+                    'width': curve.values.shape[1],
+                    'frames': curve.frames.tolist(),
+                    'values': curve.values.ravel().tolist(),
+                }
+
+        return {
+            'name': self.name,
+            'frame_rate': self.frame_rate,
+            'end_frame': self.end_frame,
+            'is_face': self.is_face,
+            'curves': curves,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'GMTArrayAnimation':
+        """Inverse of to_dict()"""
+
+        anm = cls(data['name'], data['frame_rate'], data['end_frame'])
+        anm.is_face = bool(data['is_face'])
+
+        for i in range(len(data['curves'])):
+            curve = data['curves'][str(i)]
+
+            bone_name = curve['bone']
+            if bone_name not in anm.bones:
+                anm.bones[bone_name] = GMTArrayBone(bone_name)
+
+            values = np.asarray(curve['values'], dtype=np.float64).reshape(len(curve['frames']), curve['width'])
+            anm.bones[bone_name].set_curve(GMTArrayCurve(
+                GMTCurveType(curve['type']), GMTCurveChannel(curve['channel']), curve['frames'], values))
+
+        return anm
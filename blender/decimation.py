@@ -0,0 +1,36 @@
+from typing import Tuple
+
+import numpy as np
+
+from ..gmt_lib import *
+from .array_math import location_error, rotation_error, simplify_keyframes
+from .curve_array import GMTArrayBone, GMTArrayCurve
+
+# Like array_converter, this module only depends on gmt_lib and numpy
+
+
+def decimate_bone(bone: GMTArrayBone, location_tolerance: float, rotation_tolerance: float) -> Tuple[GMTArrayBone, int]:
+    """Returns a copy of the bone with redundant keyframes removed, and the number of removed keyframes.
+    Curves should already be in Blender pose space. Location error is a distance, and rotation error is an angle
+    in radians. Location and rotation curves should be imported with linear interpolation after decimating.
+    """
+
+    result = GMTArrayBone(bone.name)
+    removed = 0
+
+    for curve in bone.curves:
+        if len(curve) <= 2:
+            keep = np.ones(len(curve), dtype=bool)
+        elif curve.type == GMTCurveType.LOCATION:
+            keep = simplify_keyframes(curve.frames, curve.values, location_tolerance, location_error)
+        elif curve.type == GMTCurveType.ROTATION:
+            keep = simplify_keyframes(curve.frames, curve.values, rotation_tolerance, rotation_error)
+        else:
+            # Pattern curves use constant interpolation, so only keyframes that repeat the previous value are removed
+            keep = np.ones(len(curve), dtype=bool)
+            keep[1:-1] = np.any(curve.values[1:-1] != curve.values[:-2], axis=1)
+
+        removed += len(curve) - np.count_nonzero(keep)
+        result.set_curve(GMTArrayCurve(curve.type, curve.channel, curve.frames[keep], curve.values[keep]))
+
+    return result, removed
@@ -0,0 +1,312 @@
+from copy import deepcopy
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..gmt_lib import *
+from .array_converter import (pattern1_from_blender, pattern2_from_blender,
+                              transform_location_from_blender_array,
+                              transform_rotation_from_blender_array)
+from .array_math import location_error, resample_frames, rotation_error, simplify_keyframes
+from .bone_mapping import GAME_ENGINES, GMTBoneMapping
+from .error import GMTError
+
+# This module is imported by worker processes, which do not have access to bpy or mathutils
+# Anything imported here should only depend on gmt_lib and numpy
+
+
+class GMTExportOptions:
+    """Export settings that are still needed after the FCurves are sampled"""
+
+    gmt_game: str
+    remap_bones: bool
+    split_vector_curves: bool
+    is_auth: bool
+    frame_rate: float
+    adaptive_sampling: bool
+    location_tolerance: float
+    rotation_tolerance: float
+
+    def __init__(self, export_settings: Dict):
+        self.gmt_game = export_settings.get('gmt_game')
+        self.remap_bones = export_settings.get('remap_bones')
+        self.split_vector_curves = export_settings.get('split_vector_curves')
+        self.is_auth = export_settings.get('is_auth')
+        self.frame_rate = export_settings.get('frame_rate') or 30.0
+        self.adaptive_sampling = export_settings.get('adaptive_sampling')
+        self.location_tolerance = export_settings.get('location_tolerance', 0.0)
+        self.rotation_tolerance = export_settings.get('rotation_tolerance', 0.0)
+
+
+class GMTCurveSamples:
+    """Values of a curve in Blender pose space, sampled from its FCurves on the GMT frames.
+    Location and rotation values have all of their channels, and pattern values have a single channel.
+    """
+
+    type: GMTCurveType
+    channel: GMTCurveChannel
+    frames: List[float]
+    values: np.ndarray
+
+    def __init__(self, curve_type: GMTCurveType, channel: GMTCurveChannel, frames: List[float], values: np.ndarray):
+        self.type = curve_type
+        self.channel = channel
+        self.frames = frames
+        self.values = values
+
+
+class GMTBoneSamples:
+    """Sampled curves of a single bone, with the factors of its GMTBoneConversion for converting them to GMT space"""
+
+    name: str
+    head_offset: np.ndarray
+    rest_matrix: np.ndarray
+    from_blender_pre: np.ndarray
+    from_blender_post: np.ndarray
+    curves: List[GMTCurveSamples]
+
+    def __init__(self, name: str, conversion):
+        self.name = name
+        self.head_offset = conversion.head_offset
+        self.rest_matrix = conversion.rest_matrix
+        self.from_blender_pre = conversion.from_blender_pre
+        self.from_blender_post = conversion.from_blender_post
+        self.curves = list()
+
+
+def export_gmt(filepath: str, gmt_file_name: str, animations: List[Tuple[str, List[GMTBoneSamples]]],
+               options: GMTExportOptions) -> str:
+    """Converts and writes a GMT from the sampled bones of one or more actions. Returns the filepath"""
+
+    write_gmt_to_file(make_gmt(gmt_file_name, animations, options), filepath)
+    return filepath
+
+
+def make_gmt(gmt_file_name: str, animations: List[Tuple[str, List[GMTBoneSamples]]], options: GMTExportOptions) -> GMT:
+    """animations is a list of (gmt_anm_name, bones) for each animation, in order"""
+
+    # Important: to update the vector version properly, scale bone has to be added after creating the animation
+    gmt = GMT(gmt_file_name, GMTVersion[options.gmt_game] if options.gmt_game != 'DE' else GMTVersion.ISHIN)
+
+    converted = [build_animation(gmt_anm_name, bones, options) for gmt_anm_name, bones in animations]
+    if len(converted) == 1:
+        gmt.animation = converted[0]
+    else:
+        # All animations share the GMT's header and string tables
+        gmt.animation_list = converted
+
+    return gmt
+
+
+def build_animation(gmt_anm_name: str, bones: List[GMTBoneSamples], options: GMTExportOptions) -> GMTAnimation:
+    # Framerate only affects motion GMTs (not auth/hacts), and end frame is unused
+    anm = GMTAnimation(gmt_anm_name, options.frame_rate, 0)
+
+    # Armature bone that each GMT bone was built from, to detect bones that were remapped to the same name
+    source_names = dict()
+
+    if options.gmt_game == 'ISHIN':
+        # Add scale bone for Y0/K1
+        scale_bone = GMTBone('scale')
+        scale_bone.location = GMTCurve.new_location_curve()
+        scale_bone.rotation = GMTCurve.new_rotation_curve()
+        anm.bones['scale'] = scale_bone
+
+        # An armature bone with the same name replaces it
+        source_names['scale'] = 'scale'
+
+    bone_mapping = None
+    if options.remap_bones:
+        bone_mapping = GMTBoneMapping([b.name for b in bones], target_engine=GAME_ENGINES[options.gmt_game])
+
+    for samples in bones:
+        bone = build_bone(samples, options)
+
+        # Bones are converted with the armature's names, and renamed afterwards
+        if bone_mapping:
+            bone.name = bone_mapping.get(samples.name)
+
+        if source_names.get(bone.name, samples.name) != samples.name:
+            raise GMTError(f'Bones "{source_names[bone.name]}" and "{samples.name}" would both be exported as '
+                           f'"{bone.name}". Rename one of them, or disable bone remapping')
+
+        source_names[bone.name] = samples.name
+        anm.bones[bone.name] = bone
+
+    # Try splitting vector from center
+    if options.split_vector_curves and options.gmt_game in ['ISHIN', 'DE']:
+        split_vector(anm.bones.get('center_c_n'), anm.bones.get('vector_c_n'), GMTVectorVersion.DRAGON_VECTOR if (
+            options.gmt_game == 'DE') else GMTVectorVersion.OLD_VECTOR, options.is_auth)
+
+    return anm
+
+
+def build_bone(samples: GMTBoneSamples, options: GMTExportOptions) -> GMTBone:
+    bone = GMTBone(samples.name)
+
+    for curve_samples in samples.curves:
+        curve = build_curve(curve_samples, samples, options)
+
+        if curve.type == GMTCurveType.LOCATION:
+            bone.location = curve
+        elif curve.type == GMTCurveType.ROTATION:
+            bone.rotation = curve
+        elif curve.type == GMTCurveType.PATTERN_HAND:
+            bone.patterns_hand = (bone.patterns_hand or []) + [curve]
+        elif curve.type == GMTCurveType.PATTERN_UNK:
+            bone.patterns_unk = (bone.patterns_unk or []) + [curve]
+        else:
+            bone.patterns_face = (bone.patterns_face or []) + [curve]
+
+    return bone
+
+
+def build_curve(samples: GMTCurveSamples, conversion: GMTBoneSamples, options: GMTExportOptions) -> GMTCurve:
+    curve_type, channel = samples.type, samples.channel
+    gmt_frames = samples.frames
+
+    if curve_type == GMTCurveType.LOCATION:
+        converted_values = transform_location_from_blender_array(conversion, samples.values)
+        gmt_frames, converted_values = simplify_samples(gmt_frames, converted_values, curve_type, options)
+        converted_values = list(map(tuple, converted_values.tolist()))
+
+        # Check if there are any completely zero channels
+        empties = list(map(lambda i: all(map(lambda x: x[i] == 0.0, converted_values)), range(3)))
+
+        # If at least two channels are empty, change the channel type and update the values
+        if empties.count(True) >= 2:
+            # If no channels are non-empty, choose X
+            i = empties.index(False) if False in empties else 0
+
+            converted_values = list(map(lambda v: (v[i],), converted_values))
+            channel = (GMTCurveChannel.X, GMTCurveChannel.Y, GMTCurveChannel.Z)[i]
+
+    elif curve_type == GMTCurveType.ROTATION:
+        converted_values = transform_rotation_from_blender_array(conversion, samples.values)
+        gmt_frames, converted_values = simplify_samples(gmt_frames, converted_values, curve_type, options)
+        converted_values = list(map(tuple, converted_values.tolist()))
+
+        # Check if there are any completely zero channels (from x, y, z only)
+        empties = list(map(lambda i: all(map(lambda x: x[i] == 0.0, converted_values)), range(3)))
+
+        # If at least two channels are empty, change the channel type and update the values
+        if empties.count(True) >= 2:
+            # If no channels are non-empty, choose X
+            i = empties.index(False) if False in empties else 0
+
+            # v[3] is w channel
+            converted_values = list(map(lambda v: (v[i], v[3]), converted_values))
+            channel = (GMTCurveChannel.XW, GMTCurveChannel.YW, GMTCurveChannel.ZW)[i]
+
+    elif curve_type == GMTCurveType.PATTERN_HAND:
+        # Blender rounds integer properties when evaluating
+        converted_values = round_pattern(samples.values)
+
+        if options.gmt_game != 'DE':
+            # Prevent pattern numbers larger than old engine max to be exported
+            converted_values = correct_pattern(converted_values)
+
+        converted_values = list(map(lambda s, e: [int(s), int(e)], *pattern1_from_blender(converted_values)))
+    else:
+        converted_values = list(map(lambda v: [int(v)], pattern2_from_blender(round_pattern(samples.values))))
+
+    # Create the GMTCurve after finalizing all changes to the FCurves
+    curve = GMTCurve(curve_type, channel)
+    curve.keyframes = list(map(lambda f, v: GMTKeyframe(int(f), v), gmt_frames, converted_values))
+
+    return curve
+
+
+def get_sample_frames(keyframes: List[float], frame_ratio: float, curve_type: GMTCurveType,
+                      options: GMTExportOptions) -> Tuple[List[float], List[float]]:
+    """Returns the GMT frames to export, and the scene times to sample the FCurves at for each of them.
+    keyframes are the sorted scene times of the FCurves' keyframes, and can be empty.
+    """
+
+    if not keyframes:
+        return [], []
+
+    if options.adaptive_sampling and curve_type in (GMTCurveType.LOCATION, GMTCurveType.ROTATION):
+        # Sample every frame in the GMT's frame rate, and remove the unneeded ones after converting
+        gmt_frames = np.arange(round(keyframes[0] * frame_ratio), round(keyframes[-1] * frame_ratio) + 1)
+        return gmt_frames.tolist(), (gmt_frames / frame_ratio).tolist()
+
+    if frame_ratio != 1.0:
+        # Sample the FCurves at the scene times of whole GMT frames, keeping Blender's interpolation
+        gmt_frames, times = resample_frames(keyframes, frame_ratio)
+        return gmt_frames.tolist(), times.tolist()
+
+    return keyframes, keyframes
+
+
+def simplify_samples(frames: List[float], values: np.ndarray, curve_type: GMTCurveType, options: GMTExportOptions):
+    """Removes adaptive samples that the game can recreate within tolerance by interpolating the remaining ones"""
+
+    if not options.adaptive_sampling or len(frames) <= 2:
+        return frames, values
+
+    frames = np.array(frames, dtype=np.float64)
+    if curve_type == GMTCurveType.LOCATION:
+        keep = simplify_keyframes(frames, values, options.location_tolerance, location_error)
+    else:
+        keep = simplify_keyframes(frames, values, options.rotation_tolerance, rotation_error, slerp=True)
+
+    return frames[keep].tolist(), values[keep]
+
+
+def round_pattern(values: np.ndarray) -> List[float]:
+    return np.floor(np.asarray(values, dtype=np.float64).ravel() + 0.5).tolist()
+
+
+def correct_pattern(pattern):
+    return list(map(lambda x: 0 if x > 17 else x, pattern))
+
+
+def split_vector(center_bone: GMTBone, vector_bone: GMTBone, vector_version: GMTVectorVersion, is_auth: bool):
+    """Splits vector_c_n curves from center_c_n for proper conversion.
+    Does not affect NO_VECTOR animations.
+    """
+
+    if vector_version == GMTVectorVersion.NO_VECTOR:
+        return
+
+    if not (center_bone and vector_bone):
+        print('GMTWarning: Cannot split vector - \"center_c_n\" and/or \"vector_c_n\" bones are missing')
+
+    # in GMT coordinate system:
+    # OLD_VECTOR and is_auth -> vector should copy X and Z of center, and have a 0 Y channel
+    # DRAGON_VECTOR and is_auth -> vector should be used instead of center, center should be empty
+    # not is_auth -> vector should be used for X and Z of center, center should have Y only
+    # Rotation should be copied to vector in all cases, and should be removed from center in all cases except (OLD_VECTOR and is_auth)
+
+    vector_bone.location = deepcopy(center_bone.location) or GMTCurve.new_location_curve()
+    vector_bone.rotation = deepcopy(center_bone.rotation) or GMTCurve.new_location_curve()
+
+    if vector_version == GMTVectorVersion.DRAGON_VECTOR and is_auth:
+        center_bone.location = GMTCurve.new_location_curve()
+        center_bone.rotation = GMTCurve.new_rotation_curve()
+    else:
+        # Clear Y channel in vector location
+        if vector_bone.location.channel == GMTCurveChannel.ALL:
+            for kf in vector_bone.location.keyframes:
+                kf.value = (kf.value[0], 0.0, kf.value[2])
+
+        elif vector_bone.location.channel == GMTCurveChannel.Y:
+            vector_bone.location.keyframes.clear()
+            vector_bone.location.keyframes.append(GMTKeyframe(0, (0.0,)))
+
+        if not is_auth:
+            if not center_bone.location:
+                center_bone.location = GMTCurve.new_location_curve()
+
+            # Clear X and Z channels in center location
+            if center_bone.location.channel == GMTCurveChannel.ALL:
+                for kf in center_bone.location.keyframes:
+                    kf.value = (0.0, kf.value[1], 0.0)
+
+            elif center_bone.location.channel != GMTCurveChannel.Y:
+                center_bone.location.keyframes.clear()
+                center_bone.location.keyframes.append(GMTKeyframe(0, (0.0,)))
+
+            # Clear center rotation
+            center_bone.rotation = GMTCurve.new_rotation_curve()
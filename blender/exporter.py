@@ -1,8 +1,13 @@
-from copy import deepcopy
-from typing import Dict, List
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fnmatch import fnmatch
+from typing import Dict, List, Optional, Tuple
 
 import bpy
-from bpy.props import BoolProperty, EnumProperty, StringProperty
+import numpy as np
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, StringProperty
 from bpy.types import Action, FCurve, Operator
 from bpy_extras.io_utils import ExportHelper
 from mathutils import Quaternion, Vector
@@ -11,13 +16,15 @@ from ..gmt_lib import *
 from ..gmt_lib.gmt.gmt_writer import write_cmt_to_file, write_ifa_to_file
 from ..gmt_lib.gmt.structure.cmt import *
 from ..gmt_lib.gmt.structure.ifa import *
-from .bone_props import GMTBlenderBoneProps, get_edit_bones_props
-from .coordinate_converter import (convert_cmt_anm_from_blender,
-                                   pattern1_from_blender,
-                                   pattern2_from_blender,
-                                   transform_location_from_blender,
-                                   transform_rotation_from_blender)
+from .conversion_plan import GMTConversionPlan, get_conversion_plan
+from .coordinate_converter import convert_cmt_frames_from_blender
 from .error import GMTError
+from .export_worker import (GMTBoneSamples, GMTCurveSamples, GMTExportOptions,
+                            build_bone, export_gmt, get_sample_frames, make_gmt)
+from .fcurve_evaluator import evaluate_fcurves
+from .importer import SOURCE_PROP
+from .lazy_action import materialize_action
+from .par_archive import write_par_entries
 
 
 class ExportGMT(Operator, ExportHelper):
@@ -25,7 +32,7 @@ class ExportGMT(Operator, ExportHelper):
     bl_idname = "export_scene.gmt"
     bl_label = "Export Yakuza GMT"
 
-    filter_glob: StringProperty(default="*.gmt;*.cmt;*.ifa", options={"HIDDEN"})
+    filter_glob: StringProperty(default="*.gmt;*.cmt;*.ifa;*.par", options={"HIDDEN"})
 
     # Don't force a file extension
     filename_ext = '.gmt'
@@ -36,6 +43,9 @@ class ExportGMT(Operator, ExportHelper):
         for screenArea in context.window.screen.areas:
             if screenArea.type == 'FILE_BROWSER':
                 params = screenArea.spaces[0].params
+                if params.filename.lower().endswith('.par'):
+                    # Exporting into an archive, keep it as the target
+                    break
                 if len(params.filename) > 3 and params.filename[-4] == '.':
                     params.filename = params.filename[:-3] + self.export_format.lower()
                 else:
@@ -83,15 +93,14 @@ class ExportGMT(Operator, ExportHelper):
     def action_update(self, context: bpy.context):
         name = self.action_name
         if '[' in name and ']' in name:
-            # Used to avoid suffixes (e.g ".001")
-            self.gmt_file_name = name[name.index('[')+1:name.index(']')]
-            self.gmt_anm_name = name[:name.index('[')]
+            self.gmt_file_name, self.gmt_anm_name = get_gmt_names(name)
 
             # Set the file name to be the same as the internal gmt file name
             for screenArea in context.window.screen.areas:
                 if screenArea.type == 'FILE_BROWSER':
                     params = screenArea.spaces[0].params
-                    params.filename = f'{self.gmt_file_name}.{self.export_format.lower()}'
+                    if not params.filename.lower().endswith('.par'):
+                        params.filename = f'{self.gmt_file_name}.{self.export_format.lower()}'
                     break
 
     export_format: EnumProperty(
@@ -156,6 +165,62 @@ class ExportGMT(Operator, ExportHelper):
         description="Internal GMT animation name",
         maxlen=30)
 
+    export_file_actions: BoolProperty(
+        name='All Animations of File',
+        description='Also exports the other actions with the same GMT file name (e.g. "anm[file]") '
+                    'as more animations in the same GMT.\n'
+                    'Actions imported from the same GMT keep their original order',
+        default=False
+    )
+
+    remap_bones: BoolProperty(
+        name='Remap Bone Names',
+        description='Renames bones to match the skeleton of the target game\'s engine, '
+                    'for exporting animations made on an armature from a different engine',
+        default=False
+    )
+
+    frame_rate: FloatProperty(
+        name='Frame Rate',
+        description='Frame rate written to the GMT. Only affects motion GMTs (not auth/hacts)',
+        default=30.0,
+        min=1.0,
+        max=240.0
+    )
+
+    resample_frame_rate: BoolProperty(
+        name='Resample to Frame Rate',
+        description='Moves keyframes from the scene\'s frame rate to the GMT frame rate, '
+                    'so that the animation plays at the same speed in game.\n'
+                    'If disabled, keyframes are exported on the same frames',
+        default=False
+    )
+
+    adaptive_sampling: BoolProperty(
+        name='Adaptive Sampling',
+        description='Samples location and rotation curves on every frame, then keeps only the frames needed to '
+                    'stay within the given tolerances when the game interpolates between them.\n'
+                    'Keeps Bezier easing between keyframes, without exporting every frame',
+        default=False
+    )
+
+    location_tolerance: FloatProperty(
+        name='Location Tolerance',
+        description='Maximum distance between the evaluated and the exported location of each bone',
+        default=0.0005,
+        min=0.0,
+        precision=5,
+        subtype='DISTANCE'
+    )
+
+    rotation_tolerance: FloatProperty(
+        name='Rotation Tolerance',
+        description='Maximum angle between the evaluated and the exported rotation of each bone',
+        default=0.00175,
+        min=0.0,
+        subtype='ANGLE'
+    )
+
     split_vector_curves: BoolProperty(
         name='Split Vector',
         description='Splits vector_c_n animation from center_c_n, to more closely match game behavior. '
@@ -174,6 +239,20 @@ class ExportGMT(Operator, ExportHelper):
         default=False
     )
 
+    par_entry: StringProperty(
+        name='PAR Entry',
+        description='Path of the entry to replace or add, when exporting into a PAR archive.\n'
+                    'If empty, the entry with the GMT file name is replaced, or added to the root folder if there is none',
+        default=''
+    )
+
+    compress_par_entries: BoolProperty(
+        name='Compress Entry',
+        description='Compresses the exported file inside the PAR archive.\n'
+                    'Uses SLLZ version 2, which only newer Dragon Engine games (Judgment and later) can read',
+        default=False
+    )
+
     def draw(self, context):
         layout = self.layout
 
@@ -189,8 +268,18 @@ class ExportGMT(Operator, ExportHelper):
         if self.export_format == 'GMT':
             layout.prop(self, 'gmt_file_name')
             layout.prop(self, 'gmt_anm_name')
+            layout.prop(self, 'export_file_actions')
             layout.separator()
             layout.prop(self, 'gmt_game')
+            layout.prop(self, 'remap_bones')
+            layout.prop(self, 'frame_rate')
+            layout.prop(self, 'resample_frame_rate')
+
+            layout.prop(self, 'adaptive_sampling')
+            sampling_col = layout.column()
+            sampling_col.prop(self, 'location_tolerance')
+            sampling_col.prop(self, 'rotation_tolerance')
+            sampling_col.enabled = self.adaptive_sampling
 
             vector_col = layout.column()
             vector_col.prop(self, 'split_vector_curves')
@@ -209,6 +298,11 @@ class ExportGMT(Operator, ExportHelper):
             layout.separator()
             layout.prop(self, 'use_camera_keyframes')
 
+        if self.filepath.lower().endswith('.par'):
+            layout.separator()
+            layout.prop(self, 'par_entry')
+            layout.prop(self, 'compress_par_entries')
+
         self.export_format_update(context)
 
     def execute(self, context):
@@ -225,8 +319,22 @@ class ExportGMT(Operator, ExportHelper):
                 exporter_cls = IFAExporter if self.export_format == 'IFA' else GMTExporter
 
             start_time = time.time()
-            exporter = exporter_cls(context, self.filepath, self.as_keywords(ignore=("filter_glob",)))
-            exporter.export()
+            export_settings = self.as_keywords(ignore=("filter_glob", "par_entry", "compress_par_entries"))
+
+            if self.filepath.lower().endswith('.par'):
+                file_name = self.gmt_file_name or get_gmt_names(self.action_name)[0]
+                entry_path = self.par_entry or f'{file_name}.{self.export_format.lower()}'
+
+                # Export to a temporary file first, then write it into the archive
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    filepath = os.path.join(temp_dir, os.path.basename(entry_path.replace('\\', '/')))
+                    exporter = exporter_cls(context, filepath, export_settings)
+                    exporter.export()
+
+                    write_files_to_par(self.filepath, {entry_path: filepath}, self.compress_par_entries)
+            else:
+                exporter = exporter_cls(context, self.filepath, export_settings)
+                exporter.export()
 
             elapsed_s = "{:.2f}s".format(time.time() - start_time)
             print("Export finished in " + elapsed_s)
@@ -273,69 +381,326 @@ class ExportGMT(Operator, ExportHelper):
         return "No armature found to get animation from"
 
 
+class ExportGMTBatch(Operator):
+    """Exports many actions at once, each to its own GMT file"""
+    bl_idname = "export_scene.gmt_batch"
+    bl_label = "Export Yakuza GMTs"
+
+    directory: StringProperty(subtype='DIR_PATH')
+    filter_folder: BoolProperty(default=True, options={"HIDDEN"})
+
+    def armature_callback(self, context: bpy.context):
+        items = []
+
+        ao = context.active_object
+        ao_name = ao.name if ao and ao.type == 'ARMATURE' else ''
+
+        if ao_name:
+            # Add the active armature first so that it's the default value
+            items.append((ao_name, ao_name, ""))
+
+        for a in [arm for arm in bpy.data.objects if arm.type == 'ARMATURE' and arm.name != ao_name]:
+            items.append((a.name, a.name, ""))
+        return items
+
+    armature_name: EnumProperty(
+        items=armature_callback,
+        name="Armature",
+        description="The armature which the actions will use as a base")
+
+    action_source: EnumProperty(
+        items=[('ALL', 'All Actions', 'Export all actions in the file'),
+               ('SELECTED', 'Selected Objects', 'Export the actions used by the selected objects, '
+                'including their NLA strips'),
+               ],
+        name='Actions',
+        description='Which actions to export',
+        default='ALL')
+
+    action_filter: StringProperty(
+        name='Filter',
+        description='Only export actions whose names match any of these patterns, separated by commas.\n'
+                    'Can use wildcards (e.g. "c_at_*")',
+        default='*'
+    )
+
+    combine_file_actions: BoolProperty(
+        name='Combine Animations',
+        description='Writes actions with the same GMT file name (e.g. "anm[file]") into one GMT with multiple '
+                    'animations, in their original order.\n'
+                    'If disabled, each action is written to its own GMT',
+        default=False
+    )
+
+    par_path: StringProperty(
+        name='Target PAR',
+        description='If set, the GMTs are written into this PAR archive instead of the chosen directory.\n'
+                    'Entries with the same names are replaced, and other GMTs are added as new entries',
+        default='',
+        subtype='FILE_PATH'
+    )
+
+    par_folder: StringProperty(
+        name='PAR Folder',
+        description='Folder inside the PAR archive that new entries are added to, which has to exist already.\n'
+                    'If empty, entries are replaced by name anywhere in the archive, and new ones are added to the root '
+                    'folder',
+        default=''
+    )
+
+    compress_par_entries: BoolProperty(
+        name='Compress Entries',
+        description='Compresses the exported GMTs inside the PAR archive.\n'
+                    'Uses SLLZ version 2, which only newer Dragon Engine games (Judgment and later) can read',
+        default=False
+    )
+
+    gmt_game: EnumProperty(
+        items=[('KENZAN', 'Ryu Ga Gotoku Kenzan', ""),
+               ('YAKUZA3', 'Yakuza 3, 4, Dead Souls', ""),
+               ('YAKUZA5', 'Yakuza 5', ""),
+               ('ISHIN', 'Yakuza 0, Kiwami, Ishin, FOTNS', ""),
+               ('DE', 'Dragon Engine (Yakuza 6, Kiwami 2, ...)', ""),
+               ],
+        name="Game Preset",
+        description="Target game which the exported GMT will be used in",
+        default=3)
+
+    remap_bones: BoolProperty(
+        name='Remap Bone Names',
+        description='Renames bones to match the skeleton of the target game\'s engine, '
+                    'for exporting animations made on an armature from a different engine',
+        default=False
+    )
+
+    frame_rate: FloatProperty(
+        name='Frame Rate',
+        description='Frame rate written to the GMT. Only affects motion GMTs (not auth/hacts)',
+        default=30.0,
+        min=1.0,
+        max=240.0
+    )
+
+    resample_frame_rate: BoolProperty(
+        name='Resample to Frame Rate',
+        description='Moves keyframes from the scene\'s frame rate to the GMT frame rate, '
+                    'so that the animation plays at the same speed in game.\n'
+                    'If disabled, keyframes are exported on the same frames',
+        default=False
+    )
+
+    adaptive_sampling: BoolProperty(
+        name='Adaptive Sampling',
+        description='Samples location and rotation curves on every frame, then keeps only the frames needed to '
+                    'stay within the given tolerances when the game interpolates between them.\n'
+                    'Keeps Bezier easing between keyframes, without exporting every frame',
+        default=False
+    )
+
+    location_tolerance: FloatProperty(
+        name='Location Tolerance',
+        description='Maximum distance between the evaluated and the exported location of each bone',
+        default=0.0005,
+        min=0.0,
+        precision=5,
+        subtype='DISTANCE'
+    )
+
+    rotation_tolerance: FloatProperty(
+        name='Rotation Tolerance',
+        description='Maximum angle between the evaluated and the exported rotation of each bone',
+        default=0.00175,
+        min=0.0,
+        subtype='ANGLE'
+    )
+
+    split_vector_curves: BoolProperty(
+        name='Split Vector',
+        description='Splits vector_c_n animation from center_c_n, to more closely match game behavior. '
+                    'Will clear existing vector_c_n animation from the action.\n'
+                    'Does not affect Y3-5 animations',
+        default=True
+    )
+
+    is_auth: BoolProperty(
+        name='Is Auth/Hact',
+        description='Specify the animation\'s origin.\n'
+                    'If this is enabled, then the animation should be from hact.par or auth folder. '
+                    'Otherwise, it will be treated as being from motion folder.\n'
+                    'Needed for proper vector splitting for Y0/K1 and DE.\n'
+                    'Does not affect Y3-Y5. Does not affect anything if Split Vector is disabled',
+        default=False
+    )
+
+    def draw(self, context):
+        layout = self.layout
+
+        layout.use_property_split = True
+        layout.use_property_decorate = True  # No animation.
+
+        layout.prop(self, 'armature_name')
+        layout.prop(self, 'action_source')
+        layout.prop(self, 'action_filter')
+        layout.prop(self, 'combine_file_actions')
+        layout.separator()
+
+        layout.prop(self, 'par_path')
+        par_col = layout.column()
+        par_col.prop(self, 'par_folder')
+        par_col.prop(self, 'compress_par_entries')
+        par_col.enabled = bool(self.par_path)
+        layout.separator()
+
+        layout.prop(self, 'gmt_game')
+        layout.prop(self, 'remap_bones')
+        layout.prop(self, 'frame_rate')
+        layout.prop(self, 'resample_frame_rate')
+
+        layout.prop(self, 'adaptive_sampling')
+        sampling_col = layout.column()
+        sampling_col.prop(self, 'location_tolerance')
+        sampling_col.prop(self, 'rotation_tolerance')
+        sampling_col.enabled = self.adaptive_sampling
+
+        vector_col = layout.column()
+        vector_col.prop(self, 'split_vector_curves')
+
+        is_auth_row = vector_col.row()
+        is_auth_row.prop(self, 'is_auth')
+
+        is_auth_row.enabled = self.split_vector_curves and self.gmt_game == 'ISHIN'
+        vector_col.enabled = self.gmt_game in ['ISHIN', 'DE']
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        import time
+
+        try:
+            armature = bpy.data.objects.get(self.armature_name)
+            if not armature or armature.type != 'ARMATURE':
+                raise GMTError('No armature found to get animation from')
+
+            context.view_layer.objects.active = armature
+
+            action_names = self.get_action_names(context)
+            if not action_names:
+                raise GMTError('No actions match the filter')
+
+            start_time = time.time()
+            exporter = GMTBatchExporter(context, self.directory, action_names, self.as_keywords(
+                ignore=('directory', 'filter_folder', 'action_source', 'action_filter')))
+            exporter.export()
+
+            elapsed_s = "{:.2f}s".format(time.time() - start_time)
+            print("Batch export finished in " + elapsed_s)
+
+            exported = len(action_names) - len(exporter.failed)
+            if exporter.failed:
+                self.report({"WARNING"}, f"Exported {exported} actions. Could not export {len(exporter.failed)} actions "
+                                         f"(see the console for details)")
+            else:
+                self.report({"INFO"}, f"Finished exporting {exported} actions")
+
+            return {'FINISHED'}
+        except GMTError as error:
+            print("Catching Error")
+            self.report({"ERROR"}, str(error))
+        return {'CANCELLED'}
+
+    def get_action_names(self, context: bpy.context) -> List[str]:
+        if self.action_source == 'SELECTED':
+            actions = dict()
+            for obj in context.selected_objects:
+                anm_data = obj.animation_data
+                if not anm_data:
+                    continue
+
+                if anm_data.action:
+                    actions[anm_data.action.name] = None
+
+                for track in anm_data.nla_tracks:
+                    for strip in track.strips:
+                        if strip.action:
+                            actions[strip.action.name] = None
+
+            names = list(actions)
+        else:
+            names = [a.name for a in bpy.data.actions]
+
+        patterns = [p.strip() for p in self.action_filter.split(',') if p.strip()]
+        return [name for name in names if any(fnmatch(name, p) for p in patterns)]
+
+
 class GMTExporter:
     def __init__(self, context: bpy.context, filepath, export_settings: Dict):
         self.filepath = filepath
         self.context = context
 
         self.action_name = export_settings.get("action_name")
+        self.gmt_file_name = export_settings.get("gmt_file_name")
         self.gmt_anm_name = export_settings.get("gmt_anm_name")
-        self.gmt_game = export_settings.get("gmt_game")
-        self.split_vector_curves = export_settings.get("split_vector_curves")
-        self.is_auth = export_settings.get("is_auth")
+        self.resample_frame_rate = export_settings.get("resample_frame_rate")
+        self.export_file_actions = export_settings.get("export_file_actions")
 
-        gmt_file_name = export_settings.get("gmt_file_name")
+        # Everything needed after sampling the FCurves, which can happen in a worker process
+        self.options = GMTExportOptions(export_settings)
 
-        # Important: to update the vector version properly, scale bone has to be added after creating the animation
-        self.gmt = GMT(gmt_file_name, GMTVersion[self.gmt_game] if self.gmt_game != 'DE' else GMTVersion.ISHIN)
+        # GMT frames per scene frame, set on export
+        self.frame_ratio = 1.0
 
-    bone_props: Dict[str, GMTBlenderBoneProps]
+    conversion_plan: GMTConversionPlan
 
     def export(self):
         print(f"Exporting action: {self.action_name}")
 
+        self.setup()
+
+        # The other actions of the same file are sampled in the same pass, in their original order
+        action_names = get_file_actions(self.action_name) if self.export_file_actions else [self.action_name]
+
+        animations = list()
+        for action_name in action_names:
+            gmt_anm_name = self.gmt_anm_name if action_name == self.action_name else get_gmt_names(action_name)[1]
+            animations.append((gmt_anm_name, self.sample_action(action_name)))
+
+        self.gmt = make_gmt(self.gmt_file_name, animations, self.options)
+        write_gmt_to_file(self.gmt, self.filepath)
+
+        print("GMT Export finished")
+
+    def setup(self):
         # Active object was set correctly during operator execution
         self.ao = self.context.active_object
         if not self.ao or self.ao.type != 'ARMATURE':
             raise GMTError('Armature not found')
 
-        self.bone_props = get_edit_bones_props(self.ao)
+        self.conversion_plan = get_conversion_plan(self.ao)
 
-        # Export a single animation
-        # GMTs with multiple animations are not supported for now
-        self.gmt.animation = self.make_anm(self.action_name)
-        write_gmt_to_file(self.gmt, self.filepath)
+        if self.resample_frame_rate:
+            render = self.context.scene.render
+            self.frame_ratio = self.options.frame_rate / (render.fps / render.fps_base)
 
-        print("GMT Export finished")
+    def sample_action(self, action_name) -> List[GMTBoneSamples]:
+        """Samples the FCurves of each bone in the action. The rest of the export does not need Blender"""
 
-    def make_anm(self, action_name) -> GMTAnimation:
         action = bpy.data.actions.get(action_name)
 
         if not action:
             raise GMTError('Action not found')
 
-        # Framerate only affects motion GMTs (not auth/hacts), and end frame is unused
-        anm = GMTAnimation(self.gmt_anm_name, 30.0, 0)
+        # Placeholder actions from lazy imports need their FCurves before exporting
+        materialize_action(action)
 
-        if self.gmt.version == GMTVersion.ISHIN and self.gmt_game != 'DE':
-            # Add scale bone for Y0/K1
-            scale_bone = GMTBone('scale')
-            scale_bone.location = GMTCurve.new_location_curve()
-            scale_bone.rotation = GMTCurve.new_rotation_curve()
-            anm.bones['scale'] = scale_bone
-
-        for group in action.groups.values():
-            anm.bones[group.name] = self.make_bone(group.name, group.channels)
-
-        # Try splitting vector from center
-        if self.split_vector_curves and self.gmt_game in ['ISHIN', 'DE']:
-            split_vector(anm.bones.get('center_c_n'), anm.bones.get('vector_c_n'), GMTVectorVersion.DRAGON_VECTOR if (
-                self.gmt_game == 'DE') else GMTVectorVersion.OLD_VECTOR, self.is_auth)
-
-        return anm
+        return [self.sample_bone(group.name, group.channels) for group in action.groups.values()]
 
     def make_bone(self, bone_name: str, channels: List[FCurve]) -> GMTBone:
-        bone = GMTBone(bone_name)
+        return build_bone(self.sample_bone(bone_name, channels), self.options)
+
+    def sample_bone(self, bone_name: str, channels: List[FCurve]) -> GMTBoneSamples:
+        bone = GMTBoneSamples(bone_name, self.conversion_plan.get(bone_name))
 
         loc_curves, rot_curves, pat1_curves, pat_other_curves = (dict() for _ in range(4))
 
@@ -362,16 +727,15 @@ class GMTExporter:
 
         # Location curves
         if 0 < len(loc_curves) <= 3:
-            bone.location = self.make_curve([loc_curves[k] for k in sorted(loc_curves.keys())],
-                                            GMTCurveType.LOCATION, GMTCurveChannel.ALL, bone_name)
+            bone.curves.append(self.sample_curve([loc_curves[k] for k in sorted(loc_curves.keys())],
+                                                 GMTCurveType.LOCATION, GMTCurveChannel.ALL, bone_name))
 
         # Rotation curves
         if 0 < len(rot_curves) <= 4:
-            bone.rotation = self.make_curve([rot_curves[k] for k in sorted(rot_curves.keys())],
-                                            GMTCurveType.ROTATION, GMTCurveChannel.ALL, bone_name)
+            bone.curves.append(self.sample_curve([rot_curves[k] for k in sorted(rot_curves.keys())],
+                                                 GMTCurveType.ROTATION, GMTCurveChannel.ALL, bone_name))
 
         # Patterns (hand)
-        pattern_hand_curves = []
         for pat in pat1_curves:
             if 'left' in pat:
                 channel = GMTCurveChannel.LEFT_HAND
@@ -380,35 +744,18 @@ class GMTExporter:
             else:
                 channel = GMTCurveChannel(int(pat.split('_')[-1]))
 
-            pattern_hand_curves.append(self.make_curve(
-                [pat1_curves[pat]], GMTCurveType.PATTERN_HAND, channel, bone_name))
-
-        if len(pattern_hand_curves):
-            bone.patterns_hand = pattern_hand_curves
+            bone.curves.append(self.sample_curve([pat1_curves[pat]], GMTCurveType.PATTERN_HAND, channel, bone_name))
 
         # Patterns (unk and face)
-        pattern_unk_curves = []
-        pattern_face_curves = []
         for pat in pat_other_curves:
             pat_type = GMTCurveType.PATTERN_UNK if ('pat2' in pat) else GMTCurveType.PATTERN_FACE
             channel = GMTCurveChannel(int(pat.split('_')[-1]))
 
-            curve = self.make_curve([pat_other_curves[pat]], pat_type, channel, bone_name)
-
-            if pat_type == GMTCurveType.PATTERN_UNK:
-                pattern_unk_curves.append(curve)
-            else:
-                pattern_face_curves.append(curve)
-
-        if len(pattern_unk_curves):
-            bone.patterns_unk = pattern_unk_curves
-
-        if len(pattern_face_curves):
-            bone.patterns_face = pattern_face_curves
+            bone.curves.append(self.sample_curve([pat_other_curves[pat]], pat_type, channel, bone_name))
 
         return bone
 
-    def make_curve(self, fcurves: List[FCurve], curve_type: GMTCurveType, channel: GMTCurveChannel, bone_name: str) -> GMTCurve:
+    def sample_curve(self, fcurves: List[FCurve], curve_type: GMTCurveType, channel: GMTCurveChannel, bone_name: str) -> GMTCurveSamples:
         # fcurves contains either of the following, each in the represented order:
         #   x, y, z location channels (1-3 curves)
         #   w, x, y, z rotation channels (1-4 curves)
@@ -429,102 +776,134 @@ class GMTExporter:
 
         keyframes: List[float] = sorted(keyframes_dict)
 
-        channel_values = []
-        for i in range(channel_count):
-            channel_values.append(list(map(lambda k: fcurves[i].evaluate(k), keyframes)))
-
-        # Alternative code for fixing unmatching keyframes
-        # Was made in case using fcurve.evaluate is slow, but it turns out it isn't
-        # for i, k in enumerate(keyframes):
-        #     keyframes_dict[k] = i
-
-        # for x, co in enumerate(axes_co):
-        #     values = [None] * len(keyframes_dict)
-
-        #     # Set all existing keyframes
-        #     for k, v in co:
-        #         values[keyframes_dict[k]] = v
-
-        #     # Evaluate all missing frames
-        #     for i in range(len(values)):
-        #         if values[i] is None:
-        #             values[i] = fcurves[x].evaluate(keyframes[i])
-
-        #     channel_values.append(values)
-
-        if curve_type == GMTCurveType.LOCATION:
-            if channel_count != 3:
-                if (bone := self.ao.pose.bones.get(bone_name)) is None:
-                    raise GMTError(f'Could not fix unmatching keyframes for {bone_name}')
-
-                for i in [x for x in range(3) if x not in channel_indices]:
-                    channel_values.insert(i, [bone.location[i]] * len(keyframes))
-
-            converted_values = transform_location_from_blender(self.bone_props, bone_name, list(map(
-                lambda x, y, z: Vector((x, y, z)),
-                channel_values[0],
-                channel_values[1],
-                channel_values[2]
-            )))
+        # FCurves without keyframes give an empty curve
+        gmt_frames, keyframes = get_sample_frames(keyframes, self.frame_ratio, curve_type, self.options)
 
-            # Check if there are any completely zero channels
-            empties = list(map(lambda i: all(map(lambda x: x[i] == 0.0, converted_values)), range(3)))
+        channel_values = evaluate_fcurves(fcurves, keyframes)
 
-            # If at least two channels are empty, change the channel type and update the values
-            if empties.count(True) >= 2:
-                # If no channels are non-empty, choose X
-                i = empties.index(False) if False in empties else 0
+        if curve_type == GMTCurveType.LOCATION and channel_count != 3:
+            if (bone := self.ao.pose.bones.get(bone_name)) is None:
+                raise GMTError(f'Could not fix unmatching keyframes for {bone_name}')
 
-                converted_values = list(map(lambda v: (v[i],), converted_values))
-                channel = (GMTCurveChannel.X, GMTCurveChannel.Y, GMTCurveChannel.Z)[i]
+            for i in [x for x in range(3) if x not in channel_indices]:
+                channel_values.insert(i, np.full(len(keyframes), bone.location[i]))
 
-        elif curve_type == GMTCurveType.ROTATION:
-            if channel_count != 4:
-                if (bone := self.ao.pose.bones.get(bone_name)) is None:
-                    raise GMTError(f'Could not fix unmatching keyframes for {bone_name}')
+        elif curve_type == GMTCurveType.ROTATION and channel_count != 4:
+            if (bone := self.ao.pose.bones.get(bone_name)) is None:
+                raise GMTError(f'Could not fix unmatching keyframes for {bone_name}')
 
-                for i in [x for x in range(4) if x not in channel_indices]:
-                    channel_values.insert(i, [bone.rotation_quaternion[i]] * len(keyframes))
+            for i in [x for x in range(4) if x not in channel_indices]:
+                channel_values.insert(i, np.full(len(keyframes), bone.rotation_quaternion[i]))
 
-            converted_values = transform_rotation_from_blender(self.bone_props, bone_name, list(map(
-                lambda w, x, y, z: Quaternion((w, x, y, z)),
-                channel_values[0],
-                channel_values[1],
-                channel_values[2],
-                channel_values[3],
-            )))
+        return GMTCurveSamples(curve_type, channel, gmt_frames, np.column_stack(channel_values))
 
-            # Check if there are any completely zero channels (from x, y, z only)
-            empties = list(map(lambda i: all(map(lambda x: x[i] == 0.0, converted_values)), range(3)))
 
-            # If at least two channels are empty, change the channel type and update the values
-            if empties.count(True) >= 2:
-                # If no channels are non-empty, choose X
-                i = empties.index(False) if False in empties else 0
-
-                # v[3] is w channel
-                converted_values = list(map(lambda v: (v[i], v[3]), converted_values))
-                channel = (GMTCurveChannel.XW, GMTCurveChannel.YW, GMTCurveChannel.ZW)[i]
+class GMTBatchExporter:
+    """Exports actions to GMTs in the given directory, one GMT per action or per GMT file name.
+    FCurves are sampled on the main thread, then converted and written by a process pool.
+    If par_path is set, the GMTs are written into that PAR archive instead.
+    """
 
-        elif curve_type == GMTCurveType.PATTERN_HAND:
-            converted_values = channel_values[0]
+    failed: List[str]
 
-            if self.gmt_game != 'DE':
-                # Prevent pattern numbers larger than old engine max to be exported
-                converted_values = self.correct_pattern(converted_values)
+    def __init__(self, context: bpy.context, directory: str, action_names: List[str], export_settings: Dict):
+        self.context = context
+        self.directory = directory
+        self.action_names = action_names
+        self.export_settings = export_settings
+        self.combine_file_actions = export_settings.get('combine_file_actions')
+        self.par_folder = export_settings.get('par_folder', '')
+        self.compress_par_entries = export_settings.get('compress_par_entries')
 
-            converted_values = list(map(lambda s, e: [int(s), int(e)], *pattern1_from_blender(converted_values)))
-        elif curve_type in (GMTCurveType.PATTERN_UNK, GMTCurveType.PATTERN_FACE):
-            converted_values = list(map(lambda v: [int(v)], pattern2_from_blender(channel_values[0])))
+        par_path = export_settings.get('par_path')
+        self.par_path = bpy.path.abspath(par_path) if par_path else ''
 
-        # Create the GMTCurve after finalizing all changes to the FCurves
-        curve = GMTCurve(curve_type, channel)
-        curve.keyframes = list(map(lambda f, v: GMTKeyframe(int(f), v), keyframes, converted_values))
+    def export(self):
+        if not self.par_path:
+            self.export_files(self.directory)
+            return
+
+        # Workers write to a temporary directory, and all files are written into the archive at once
+        with tempfile.TemporaryDirectory() as temp_dir:
+            written = self.export_files(temp_dir)
+
+            folder = self.par_folder.replace('\\', '/').strip('/')
+            files = {(f'{folder}/' if folder else '') + os.path.basename(p): p for p in written}
+
+            write_files_to_par(self.par_path, files, self.compress_par_entries)
+
+    def export_files(self, directory: str) -> List[str]:
+        """Returns the paths of the files that were written"""
+
+        self.failed = list()
+        written = list()
+
+        # Shares the armature setup between all actions
+        exporter = GMTExporter(self.context, '', self.export_settings)
+        exporter.setup()
+
+        outputs = self.get_outputs(directory)
+
+        # Forking Blender is not safe, so always start fresh interpreters
+        mp_context = multiprocessing.get_context('spawn')
+        max_workers = min(len(outputs), os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+            futures = dict()
+            for filepath, (gmt_file_name, actions) in outputs.items():
+                animations = list()
+                for action_name, gmt_anm_name in actions:
+                    print(f"Exporting action: {action_name}")
+
+                    try:
+                        animations.append((gmt_anm_name, exporter.sample_action(action_name)))
+                    except GMTError as e:
+                        print(f'GMTError: Could not export {action_name} - {e}')
+                        self.failed.append(action_name)
+
+                if not animations:
+                    continue
+
+                # Workers start on the first files while the next ones are sampled
+                futures[executor.submit(export_gmt, filepath, gmt_file_name, animations, exporter.options)] = actions
+
+            for future in as_completed(futures):
+                try:
+                    written.append(future.result())
+                except Exception as e:
+                    for action_name, _ in futures[future]:
+                        print(f'GMTError: Could not export {action_name} - {e}')
+                        self.failed.append(action_name)
+
+        if len(self.failed) == len(self.action_names):
+            raise GMTError('Could not export any of the actions')
+
+        return written
+
+    def get_outputs(self, directory: str) -> Dict[str, Tuple[str, List[Tuple[str, str]]]]:
+        """Returns (gmt_file_name, [(action_name, gmt_anm_name), ...]) for each file to write.
+        If actions are not combined, actions that would be written to the same file have their animation name
+        added to the file name.
+        """
+
+        files: Dict[str, List[Action]] = dict()
+        for action_name in self.action_names:
+            files.setdefault(get_gmt_names(action_name)[0], list()).append(bpy.data.actions[action_name])
+
+        outputs = dict()
+        for gmt_file_name, actions in files.items():
+            if self.combine_file_actions:
+                actions = sorted(actions, key=get_animation_order)
+                outputs[os.path.join(directory, f'{gmt_file_name}.gmt')] = (
+                    gmt_file_name, [(a.name, get_gmt_names(a.name)[1]) for a in actions])
+                continue
 
-        return curve
+            for action in actions:
+                gmt_anm_name = get_gmt_names(action.name)[1]
+                file_name = gmt_file_name if len(actions) == 1 else f'{gmt_file_name}_{gmt_anm_name}'
+                outputs[os.path.join(directory, f'{file_name}.gmt')] = (gmt_file_name, [(action.name, gmt_anm_name)])
 
-    def correct_pattern(self, pattern):
-        return list(map(lambda x: 0 if x > 17 else x, pattern))
+        return outputs
 
 
 class CMTExporter:
@@ -546,12 +925,18 @@ class CMTExporter:
         self.cmt = CMT(CMTVersion[self.cmt_game])
 
         # Only single animation export for now
-        self.cmt.animation = self.make_anm(self.action_name)
+        self.cmt.animation, locations, fovs = self.make_anm(self.action_name)
+
+        # Convert the CMT frames after exporting everything
+        convert_cmt_frames_from_blender(self.cmt.animation.frames, self.camera.data.sensor_height, locations, fovs)
+
         write_cmt_to_file(self.cmt, self.filepath)
 
         print("CMT Export finished")
 
-    def make_anm(self, action_name):
+    def make_anm(self, action_name) -> Tuple[CMTAnimation, np.ndarray, np.ndarray]:
+        """Returns the animation, and the (N, 3) locations and (N,) fovs of its frames, which are still in Blender space"""
+
         action = bpy.data.actions.get(action_name)
         cam_action: Action = (anm_data := self.camera.data.animation_data) and anm_data.action
 
@@ -566,8 +951,8 @@ class CMTExporter:
         loc_curves = [action.fcurves.find('location', index=x) for x in range(3)]
         rot_curves = [action.fcurves.find('rotation_quaternion', index=x) for x in range(4)]
 
-        loc_list = self.export_fcurves(loc_curves, 'location', frame_count)
-        rot_list = self.export_fcurves(rot_curves, 'rotation_quaternion', frame_count)
+        locations = self.export_fcurves(loc_curves, 'location', frame_count)
+        rotations = self.export_fcurves(rot_curves, 'rotation_quaternion', frame_count)
 
         data_values = dict.fromkeys(['lens', 'dof.focus_distance', 'clip_start', 'clip_end'])
 
@@ -583,58 +968,62 @@ class CMTExporter:
 
             data_values[datapath] = self.export_fcurves([curve], f'data.{datapath}', frame_count)
 
-        fov_list = data_values['lens']
-        dist_list = data_values['dof.focus_distance']
-        clip_start_list = data_values['clip_start']
-        clip_end_list = data_values['clip_end']
+        fovs = data_values['lens']
+        dists = data_values['dof.focus_distance']
+        clip_starts = data_values['clip_start']
+        clip_ends = data_values['clip_end']
 
-        if has_clip_range := (clip_start_list or clip_end_list):
-            if not clip_start_list:
-                clip_start_list = [0.1] * frame_count
-            if not clip_end_list:
-                clip_end_list = [10000.0] * frame_count
+        if has_clip_range := (clip_starts is not None or clip_ends is not None):
+            if clip_starts is None:
+                clip_starts = np.full(frame_count, 0.1)
+            if clip_ends is None:
+                clip_ends = np.full(frame_count, 10000.0)
 
+            clip_ranges = list(zip(clip_starts.tolist(), clip_ends.tolist()))
+
+        # The focus point is made by gmt_lib from the distance and rotation, so each frame still needs a Quaternion
         frames = anm.frames = [None] * frame_count
-        for i in range(frame_count):
-            frame = frames[i] = CMTFrame(loc_list[i], fov_list[i])
-            frame.from_dist_rotation(dist_list[i], rot_list[i], True)
+        for i, (location, rotation, fov, dist) in enumerate(zip(
+                locations.tolist(), rotations.tolist(), fovs.tolist(), dists.tolist())):
+            frame = frames[i] = CMTFrame(Vector(location), fov)
+            frame.from_dist_rotation(dist, Quaternion(rotation), True)
 
             if has_clip_range:
-                frame.clip_range = (clip_start_list[i], clip_end_list[i])
+                frame.clip_range = clip_ranges[i]
 
-        # Convert the CMT frames after exporting everything
-        convert_cmt_anm_from_blender(anm, self.camera.data)
-        return anm
+        return anm, locations, fovs
+
+    def export_fcurves(self, fcurves: List[FCurve], datapath, frame_count) -> Optional[np.ndarray]:
+        """Returns the values of each frame as an (N, 3) array for location, (N, 4) for rotation,
+        or (N,) for single channels. Missing clip channels give None.
+        """
 
-    def export_fcurves(self, fcurves: List[FCurve], datapath, frame_count):
         fcurves = [x for x in fcurves if x]
 
         channel_count = len(fcurves)
         channel_indices = list(map(lambda c: c.array_index, fcurves))
 
-        channel_values = []
-        for i in range(channel_count):
-            channel_values.append(list(map(lambda k: fcurves[i].evaluate(k), range(frame_count))))
+        channel_values = evaluate_fcurves(fcurves, np.arange(frame_count))
 
         if datapath == 'location':
             if channel_count != 3:
                 for i in [x for x in range(3) if x not in channel_indices]:
-                    channel_values.insert(i, [self.camera.location[i]] * frame_count)
+                    channel_values.insert(i, np.full(frame_count, self.camera.location[i]))
 
-            return list(map(lambda x, y, z: Vector((x, y, z)), *channel_values))
+            return np.column_stack(channel_values)
         elif datapath == 'rotation_quaternion':
             if channel_count != 4:
                 for i in [x for x in range(4) if x not in channel_indices]:
-                    channel_values.insert(i, [self.camera.rotation_quaternion[i]] * frame_count)
+                    channel_values.insert(i, np.full(frame_count, self.camera.rotation_quaternion[i]))
 
-            return list(map(lambda w, x, y, z: Quaternion((w, x, y, z)), *channel_values))
+            return np.column_stack(channel_values)
         else:
             # Single channels only
             if not channel_values:
                 if datapath in ('data.clip_start', 'data.clip_end'):
-                    return list()
+                    return None
 
-                return [self.camera.path_resolve(datapath)] * frame_count
+                return np.full(frame_count, self.camera.path_resolve(datapath), dtype=np.float64)
 
             return channel_values[0]
 
@@ -646,6 +1035,10 @@ class IFAExporter(GMTExporter):
 
         self.action_name = export_settings.get("action_name")
 
+        # IFAs only have a single pose, so there is nothing to resample or sample
+        self.options = GMTExportOptions(dict(export_settings, adaptive_sampling=False))
+        self.frame_ratio = 1.0
+
     def export(self):
         print(f"Exporting action: {self.action_name}")
 
@@ -657,7 +1050,7 @@ class IFAExporter(GMTExporter):
         if not (face_bone := self.ao.pose.bones.get('face')):
             raise GMTError('Face bone not found')
 
-        self.bone_props = get_edit_bones_props(self.ao)
+        self.conversion_plan = get_conversion_plan(self.ao)
         self.face_children = list(map(lambda x: x.name, face_bone.children_recursive))
 
         self.ifa = IFA(self.make_bone_list())
@@ -671,6 +1064,8 @@ class IFAExporter(GMTExporter):
         if not action:
             raise GMTError('Action not found')
 
+        materialize_action(action)
+
         bone_list = list()
         for group in [x for x in action.groups if x.name in self.face_children]:
             gmt_bone = self.make_bone(group.name, group.channels)
@@ -682,7 +1077,7 @@ class IFAExporter(GMTExporter):
                 print(f'Warning: Ignoring bone due to missing animation: {group.name}')
                 continue
 
-            bone = IFABone(group.name, self.bone_props[group.name].parent_name)
+            bone = IFABone(group.name, self.conversion_plan.bone_props[group.name].parent_name)
 
             gmt_bone.location.fill_channels()
             bone.location = gmt_bone.location.keyframes[0].value
@@ -695,55 +1090,50 @@ class IFAExporter(GMTExporter):
         return bone_list
 
 
-def split_vector(center_bone: GMTBone, vector_bone: GMTBone, vector_version: GMTVectorVersion, is_auth: bool):
-    """Splits vector_c_n curves from center_c_n for proper conversion.
-    Does not affect NO_VECTOR animations.
-    """
+def write_files_to_par(par_path: str, files: Dict[str, str], compress: bool):
+    """Writes exported files into a PAR archive. files maps the entry path (or unique name) to each file"""
+
+    data = dict()
+    for entry_path, filepath in files.items():
+        with open(filepath, 'rb') as f:
+            data[entry_path] = f.read()
+
+    try:
+        replaced, added = write_par_entries(par_path, data, compress)
+    except (OSError, ValueError) as e:
+        raise GMTError(f'Could not write into {os.path.basename(par_path)}: {e}')
 
-    if vector_version == GMTVectorVersion.NO_VECTOR:
-        return
+    print(f'Wrote {os.path.basename(par_path)}: replaced {replaced} entries, added {added} entries')
 
-    if not (center_bone and vector_bone):
-        print('GMTWarning: Cannot split vector - \"center_c_n\" and/or \"vector_c_n\" bones are missing')
 
-    # in GMT coordinate system:
-    # OLD_VECTOR and is_auth -> vector should copy X and Z of center, and have a 0 Y channel
-    # DRAGON_VECTOR and is_auth -> vector should be used instead of center, center should be empty
-    # not is_auth -> vector should be used for X and Z of center, center should have Y only
-    # Rotation should be copied to vector in all cases, and should be removed from center in all cases except (OLD_VECTOR and is_auth)
+def get_file_actions(action_name: str) -> List[str]:
+    """Returns the actions with the same GMT file name as the given action, including itself, in animation order"""
 
-    vector_bone.location = deepcopy(center_bone.location) or GMTCurve.new_location_curve()
-    vector_bone.rotation = deepcopy(center_bone.rotation) or GMTCurve.new_location_curve()
+    gmt_file_name = get_gmt_names(action_name)[0]
+    actions = [a for a in bpy.data.actions if get_gmt_names(a.name)[0] == gmt_file_name]
 
-    if vector_version == GMTVectorVersion.DRAGON_VECTOR and is_auth:
-        center_bone.location = GMTCurve.new_location_curve()
-        center_bone.rotation = GMTCurve.new_rotation_curve()
-    else:
-        # Clear Y channel in vector location
-        if vector_bone.location.channel == GMTCurveChannel.ALL:
-            for kf in vector_bone.location.keyframes:
-                kf.value = (kf.value[0], 0.0, kf.value[2])
+    return [a.name for a in sorted(actions, key=get_animation_order)]
 
-        elif vector_bone.location.channel == GMTCurveChannel.Y:
-            vector_bone.location.keyframes.clear()
-            vector_bone.location.keyframes.append(GMTKeyframe(0, (0.0,)))
 
-        if not is_auth:
-            if not center_bone.location:
-                center_bone.location = GMTCurve.new_location_curve()
+def get_animation_order(action: Action) -> Tuple[float, str]:
+    """Sorts actions by the index of the animation they were imported from, then by name"""
 
-            # Clear X and Z channels in center location
-            if center_bone.location.channel == GMTCurveChannel.ALL:
-                for kf in center_bone.location.keyframes:
-                    kf.value = (0.0, kf.value[1], 0.0)
+    source = action.get(SOURCE_PROP)
+    return (source['index'] if source else float('inf')), action.name
+
+
+def get_gmt_names(action_name: str) -> Tuple[str, str]:
+    """Returns the GMT file and animation names of an action that was named by the importer (e.g. "anm[file]").
+    Other actions use their own name for both.
+    """
 
-            elif center_bone.location.channel != GMTCurveChannel.Y:
-                center_bone.location.keyframes.clear()
-                center_bone.location.keyframes.append(GMTKeyframe(0, (0.0,)))
+    if '[' in action_name and ']' in action_name:
+        # Used to avoid suffixes (e.g ".001")
+        return action_name[action_name.index('[')+1:action_name.index(']')], action_name[:action_name.index('[')]
 
-            # Clear center rotation
-            center_bone.rotation = GMTCurve.new_rotation_curve()
+    return action_name, action_name
 
 
 def menu_func_export(self, context):
     self.layout.operator(ExportGMT.bl_idname, text='Yakuza Animation (.gmt/.cmt/.ifa)')
+    self.layout.operator(ExportGMTBatch.bl_idname, text='Yakuza Animations (Batch .gmt)')
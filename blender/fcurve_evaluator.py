@@ -0,0 +1,202 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from bpy.types import FCurve
+
+from .action_builder import INTERPOLATION_VALUES
+
+CONSTANT = INTERPOLATION_VALUES['CONSTANT']
+LINEAR = INTERPOLATION_VALUES['LINEAR']
+BEZIER = INTERPOLATION_VALUES['BEZIER']
+
+# Same threshold that Blender uses for evaluating exactly on a keyframe
+KEYFRAME_THRESHOLD = 0.0001
+
+# Bisection steps for solving Bezier segments for time. Enough to reach float precision
+BEZIER_ITERATIONS = 32
+
+
+class FCurveKeyframes:
+    """Keyframe arrays of a single FCurve, read with one foreach_get per attribute"""
+
+    co: np.ndarray
+    handle_left: np.ndarray
+    handle_right: np.ndarray
+    interpolation: np.ndarray
+    extrapolation: str
+
+    def __init__(self, fcurve: FCurve):
+        points = fcurve.keyframe_points
+        count = len(points)
+
+        self.co = read_keyframe_attribute(points, 'co', count, 2, np.float32)
+        self.handle_left = read_keyframe_attribute(points, 'handle_left', count, 2, np.float32)
+        self.handle_right = read_keyframe_attribute(points, 'handle_right', count, 2, np.float32)
+        self.interpolation = read_keyframe_attribute(points, 'interpolation', count, 1, np.int32)[:, 0]
+        self.extrapolation = fcurve.extrapolation
+
+    def __len__(self):
+        return len(self.co)
+
+
+def read_keyframe_attribute(points, attribute: str, count: int, size: int, dtype) -> np.ndarray:
+    buffer = np.empty(count * size, dtype=dtype)
+    points.foreach_get(attribute, buffer)
+
+    return buffer.reshape(count, size).astype(np.float64 if dtype == np.float32 else dtype)
+
+
+def evaluate_fcurves(fcurves: List[FCurve], times) -> List[np.ndarray]:
+    """Evaluates each FCurve at all of the given times. Gives the same results as calling fcurve.evaluate()
+    for each time, except for integer properties, which Blender rounds after evaluating.
+    """
+
+    times = np.asarray(times, dtype=np.float64)
+    return [evaluate_fcurve(fcurve, times) for fcurve in fcurves]
+
+
+def evaluate_fcurve(fcurve: FCurve, times: np.ndarray) -> np.ndarray:
+    keyframes = read_supported_keyframes(fcurve)
+
+    if keyframes is None:
+        return np.array([fcurve.evaluate(t) for t in times.tolist()], dtype=np.float64)
+
+    return evaluate_keyframes(keyframes, times)
+
+
+def read_supported_keyframes(fcurve: FCurve) -> Optional[FCurveKeyframes]:
+    """Returns None for FCurves that have to be evaluated by Blender: FCurves with modifiers, without keyframes,
+    or with easing interpolation (e.g. SINE, ELASTIC).
+    """
+
+    if len(fcurve.modifiers) or not len(fcurve.keyframe_points):
+        return None
+
+    keyframes = FCurveKeyframes(fcurve)
+    if np.any(keyframes.interpolation > BEZIER):
+        return None
+
+    return keyframes
+
+
+def evaluate_keyframes(keyframes: FCurveKeyframes, times: np.ndarray) -> np.ndarray:
+    co = keyframes.co
+    values = np.empty(len(times), dtype=np.float64)
+
+    # Before and after the keyframe range
+    before = times <= co[0, 0]
+    after = ~before & (times >= co[-1, 0])
+    inside = ~(before | after)
+
+    values[before] = extrapolate(keyframes, times[before], 0, 1)
+    values[after] = extrapolate(keyframes, times[after], len(keyframes) - 1, -1)
+
+    if not np.any(inside):
+        return values
+
+    inside_times = times[inside]
+
+    # Index of the keyframe at the start of each time's segment
+    segment = np.searchsorted(co[:, 0], inside_times, side='right') - 1
+
+    interpolation = keyframes.interpolation[segment]
+    start, end = co[segment], co[segment + 1]
+
+    result = start[:, 1].copy()
+
+    linear = (interpolation == LINEAR) & (end[:, 0] != start[:, 0])
+    factor = (inside_times[linear] - start[linear, 0]) / (end[linear, 0] - start[linear, 0])
+    result[linear] = start[linear, 1] + factor * (end[linear, 1] - start[linear, 1])
+
+    bezier = interpolation == BEZIER
+    if np.any(bezier):
+        result[bezier] = evaluate_bezier(keyframes, segment[bezier], inside_times[bezier])
+
+    # Times that are (almost) exactly on a keyframe use its value
+    on_end = np.abs(end[:, 0] - inside_times) < KEYFRAME_THRESHOLD
+    result[on_end] = end[on_end, 1]
+
+    on_start = np.abs(start[:, 0] - inside_times) < KEYFRAME_THRESHOLD
+    result[on_start] = start[on_start, 1]
+
+    values[inside] = result
+    return values
+
+
+def extrapolate(keyframes: FCurveKeyframes, times: np.ndarray, index: int, direction: int) -> np.ndarray:
+    """Same as Blender's extrapolation from the first (direction=1) or last (direction=-1) keyframe"""
+
+    x, y = keyframes.co[index]
+    interpolation = keyframes.interpolation[index]
+
+    if interpolation == CONSTANT or keyframes.extrapolation == 'CONSTANT' or len(times) == 0:
+        return np.full(len(times), y)
+
+    if interpolation == LINEAR:
+        if len(keyframes) == 1:
+            return np.full(len(times), y)
+
+        neighbor_x, neighbor_y = keyframes.co[index + direction]
+        if neighbor_x == x:
+            return np.full(len(times), y)
+
+        slope = (neighbor_y - y) / (neighbor_x - x)
+    else:
+        # Bezier keyframes are extrapolated along their outer handle
+        handle_x, handle_y = (keyframes.handle_left if direction > 0 else keyframes.handle_right)[index]
+        if handle_x == x:
+            return np.full(len(times), y)
+
+        slope = (y - handle_y) / (x - handle_x)
+
+    return y - slope * (x - times)
+
+
+def evaluate_bezier(keyframes: FCurveKeyframes, segment: np.ndarray, times: np.ndarray) -> np.ndarray:
+    v1 = keyframes.co[segment]
+    v2 = keyframes.handle_right[segment]
+    v3 = keyframes.handle_left[segment + 1]
+    v4 = keyframes.co[segment + 1]
+
+    v2, v3 = correct_bezier_handles(v1, v2, v3, v4)
+
+    # Bezier x is monotonic after correcting the handles, so the curve parameter can be found with bisection
+    low = np.zeros(len(times))
+    high = np.ones(len(times))
+    for _ in range(BEZIER_ITERATIONS):
+        t = (low + high) * 0.5
+        too_far = bezier_point(v1[:, 0], v2[:, 0], v3[:, 0], v4[:, 0], t) > times
+        high = np.where(too_far, t, high)
+        low = np.where(too_far, low, t)
+
+    result = bezier_point(v1[:, 1], v2[:, 1], v3[:, 1], v4[:, 1], (low + high) * 0.5)
+
+    # Segments with flat handles are just the keyframe value, like in Blender
+    eps = np.finfo(np.float32).eps
+    flat = (np.abs(v1[:, 1] - v4[:, 1]) < eps) & (np.abs(v2[:, 1] - v3[:, 1]) < eps) & (np.abs(v3[:, 1] - v4[:, 1]) < eps)
+    result[flat] = v1[flat, 1]
+
+    return result
+
+
+def correct_bezier_handles(v1: np.ndarray, v2: np.ndarray, v3: np.ndarray, v4: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Scales down handles that are longer than their segment, so that the curve does not go back in time.
+    Same as BKE_fcurve_correct_bezpart.
+    """
+
+    h1 = v1 - v2
+    h2 = v4 - v3
+
+    length = v4[:, 0] - v1[:, 0]
+    handles_length = np.abs(h1[:, 0]) + np.abs(h2[:, 0])
+
+    too_long = (handles_length > length) & (handles_length != 0.0)
+    factor = np.ones(len(length))
+    factor[too_long] = length[too_long] / handles_length[too_long]
+
+    return v1 - factor[:, None] * h1, v4 - factor[:, None] * h2
+
+
+def bezier_point(p1: np.ndarray, p2: np.ndarray, p3: np.ndarray, p4: np.ndarray, t: np.ndarray) -> np.ndarray:
+    s = 1.0 - t
+    return s * s * s * p1 + 3.0 * s * s * t * p2 + 3.0 * s * t * t * p3 + t * t * t * p4
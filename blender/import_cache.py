@@ -0,0 +1,164 @@
+import json
+import os
+import tempfile
+from hashlib import sha1
+from typing import List, Tuple
+
+import numpy as np
+
+from ..gmt_lib import *
+from .curve_array import GMTArrayAnimation, GMTArrayBone, GMTArrayCurve
+
+# Should be incremented whenever the conversion output or the file layout changes, to ignore old cache files
+CACHE_VERSION = 1
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), 'yakuza_gmt_cache')
+
+# Least recently used entries are removed once the cache grows past this size, in bytes
+CACHE_SIZE_LIMIT = 1024 * 1024 * 1024
+
+
+def make_cache_key(data: bytes, rest_pose_fingerprint: str, merge_vector_curves: bool, is_auth: bool,
+                   decimation: Tuple[float, float] = None, remap_bones: bool = False, frame_rate: float = None) -> str:
+    """Combines the GMT content hash, the armature rest pose fingerprint and the import settings.
+    decimation should be the location and rotation tolerances, if keyframes are decimated.
+    """
+
+    key = sha1(data)
+    key.update(f'{CACHE_VERSION}|{rest_pose_fingerprint}|{bool(merge_vector_curves)}|{bool(is_auth)}'.encode())
+
+    if decimation:
+        key.update(f'|{decimation[0]:.9g}|{decimation[1]:.9g}'.encode())
+
+    if remap_bones:
+        key.update(b'|remap')
+
+    if frame_rate:
+        key.update(f'|{frame_rate:.9g}fps'.encode())
+
+    return key.hexdigest()
+
+
+def get_cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f'{key}.npz')
+
+
+def save_cached_animations(key: str, gmt_name: str, animations: List[GMTArrayAnimation]):
+    """Stores the final Blender space curves of all animations in a compressed .npz file"""
+
+    arrays = dict()
+    anm_list = list()
+    for anm in animations:
+        curve_list = list()
+        for bone_name, bone in anm.bones.items():
+            for curve in bone.curves:
+                i = len(arrays) // 2
+                arrays[f'frames_{i}'] = curve.frames
+                arrays[f'values_{i}'] = curve.values
+                curve_list.append((bone_name, int(curve.type.value), int(curve.channel.value)))
+
+        anm_list.append({
+            'name': anm.name,
+            'frame_rate': anm.frame_rate,
+            'end_frame': anm.end_frame,
+            'curves': curve_list,
+        })
+
+    arrays['meta'] = np.array(json.dumps({'gmt_name': gmt_name, 'animations': anm_list}))
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+
+        # Write to a temporary file first so that an interrupted write does not leave a broken cache entry
+        path = get_cache_path(key)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(path + '.tmp', path)
+
+        evict_cached_animations(CACHE_SIZE_LIMIT)
+    except OSError as e:
+        print(f'GMTWarning: Could not write import cache - {e}')
+
+
+def load_cached_animations(key: str) -> Tuple[str, List[GMTArrayAnimation]]:
+    """Returns the GMT name and the animations stored for the key, or None if there is no usable cache entry"""
+
+    path = get_cache_path(key)
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+
+            i = 0
+            animations = list()
+            for anm_meta in meta['animations']:
+                anm = GMTArrayAnimation(anm_meta['name'], anm_meta['frame_rate'], anm_meta['end_frame'])
+
+                for bone_name, curve_type, channel in anm_meta['curves']:
+                    if bone_name not in anm.bones:
+                        anm.bones[bone_name] = GMTArrayBone(bone_name)
+
+                    anm.bones[bone_name].set_curve(GMTArrayCurve(
+                        GMTCurveType(curve_type), GMTCurveChannel(channel), data[f'frames_{i}'], data[f'values_{i}']))
+                    i += 1
+
+                animations.append(anm)
+    except Exception as e:
+        print(f'GMTWarning: Ignoring unreadable import cache entry - {e}')
+        return None
+
+    # The modification time is used as the time of last use, for evicting old entries
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return meta['gmt_name'], animations
+
+
+def get_cache_files() -> List[str]:
+    try:
+        return [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if name.endswith(('.npz', '.tmp'))]
+    except OSError:
+        return list()
+
+
+def evict_cached_animations(size_limit: int):
+    """Removes the least recently used cache entries until the cache is no larger than size_limit bytes"""
+
+    files = list()
+    for path in get_cache_files():
+        try:
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            # Removed by another Blender instance
+            continue
+
+    total_size = sum(size for _, size, _ in files)
+
+    for _, size, path in sorted(files):
+        if total_size <= size_limit:
+            break
+
+        try:
+            os.remove(path)
+            total_size -= size
+        except OSError as e:
+            print(f'GMTWarning: Could not remove import cache entry - {e}')
+
+
+def clear_cached_animations() -> int:
+    """Removes all cache entries. Returns the number of removed entries"""
+
+    count = 0
+    for path in get_cache_files():
+        try:
+            os.remove(path)
+            count += 1
+        except OSError as e:
+            print(f'GMTWarning: Could not remove import cache entry - {e}')
+
+    return count
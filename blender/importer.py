@@ -1,24 +1,41 @@
-from copy import deepcopy
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fnmatch import fnmatch
+from functools import partial
 from os.path import basename
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Tuple
 
 import bpy
-from bpy.props import BoolProperty, EnumProperty, StringProperty
-from bpy.types import Action, Operator
+import numpy as np
+from bpy.props import BoolProperty, CollectionProperty, EnumProperty, FloatProperty, StringProperty
+from bpy.types import Operator, OperatorFileListElement
 from bpy_extras.io_utils import ImportHelper
-from mathutils import Quaternion, Vector
 
 from ..gmt_lib import *
 from ..gmt_lib.gmt.gmt_reader import read_cmt, read_ifa
 from ..gmt_lib.gmt.structure.cmt import *
 from ..gmt_lib.gmt.structure.ifa import *
-from .bone_props import GMTBlenderBoneProps, get_edit_bones_props
-from .coordinate_converter import (convert_cmt_anm_to_blender,
-                                   convert_gmt_curve_to_blender,
-                                   pattern1_to_blender, pattern2_to_blender,
-                                   transform_location_to_blender,
-                                   transform_rotation_to_blender)
+from .action_builder import ActionBuilder
+from .array_math import resample_frames, sample_keyframes
+from .array_converter import (convert_gmt_animations, iter_gmt_animations,
+                              convert_gmt_curve_to_blender_array,
+                              pattern1_to_blender_array)
+from .conversion_plan import GMTBoneConversion, GMTConversionPlan, get_conversion_plan
+from .coordinate_converter import (convert_cmt_frames_to_blender,
+                                   transform_location_to_blender_array,
+                                   transform_rotation_to_blender_array)
+from .curve_array import GMTArrayAnimation, GMTArrayBone, GMTArrayCurve
+from .decimation import decimate_bone
 from .error import GMTError
+from .import_cache import clear_cached_animations, load_cached_animations, make_cache_key, save_cached_animations
+from .lazy_action import is_placeholder_action, make_placeholder_action
+from .par_archive import ParArchiveIndex, ParEntry, ParEntryLocation, read_par_index
+from .parse_worker import parse_file
+from .resample import resample_animation
 
 # from .pattern import make_pattern_action
 # from .pattern_lists import VERSION_STR
@@ -29,7 +46,11 @@ class ImportGMT(Operator, ImportHelper):
     bl_idname = "import_scene.gmt"
     bl_label = "Import Yakuza GMT"
 
-    filter_glob: StringProperty(default="*.gmt;*.cmt;*.ifa", options={"HIDDEN"})
+    filter_glob: StringProperty(default="*.gmt;*.cmt;*.ifa;*.par", options={"HIDDEN"})
+
+    # Selected files, for importing multiple files at once
+    files: CollectionProperty(type=OperatorFileListElement, options={"HIDDEN", "SKIP_SAVE"})
+    directory: StringProperty(subtype='DIR_PATH', options={"HIDDEN", "SKIP_SAVE"})
 
     def armature_callback(self, context):
         items = []
@@ -58,6 +79,22 @@ class ImportGMT(Operator, ImportHelper):
         default=True
     )
 
+    remap_bones: BoolProperty(
+        name='Remap Bone Names',
+        description='Renames bones to match the target armature when importing animations from a different engine '
+                    '(e.g. Y5 animations onto a Y0 or DE armature).\n'
+                    'Bones that do not exist in the target armature are still skipped',
+        default=False
+    )
+
+    resample_frame_rate: BoolProperty(
+        name='Match Scene Frame Rate',
+        description='Moves keyframes to the scene\'s frame rate instead of changing the scene\'s frame rate '
+                    'to match the animation.\n'
+                    'Allows animations with different frame rates to be used in the same scene',
+        default=False
+    )
+
     is_auth: BoolProperty(
         name='Is Auth/Hact',
         description='Specify the animation\'s origin.\n'
@@ -68,6 +105,103 @@ class ImportGMT(Operator, ImportHelper):
         default=False
     )
 
+    use_cache: BoolProperty(
+        name='Use Cache',
+        description='Stores the converted animation on disk, so that importing the same GMT on the same armature '
+                    'with the same settings again only needs to create the actions.\n'
+                    'The least recently used entries are removed once the cache grows past 1 GB.\n'
+                    'Does not affect CMT and IFA files, or imports of multiple files',
+        default=False
+    )
+
+    import_directory: BoolProperty(
+        name='Import Whole Directory',
+        description='Imports all GMT, CMT and IFA files in the current directory instead of the selected files.\n'
+                    'Multiple files are parsed in parallel',
+        default=False
+    )
+
+    par_entries: StringProperty(
+        name='PAR Entries',
+        description='Entries to import when a PAR archive is selected, separated by commas.\n'
+                    'Can be file names or paths inside the archive, and can use wildcards (e.g. "*.gmt")',
+        default='*.gmt'
+    )
+
+    decimate_keyframes: BoolProperty(
+        name='Decimate Keyframes',
+        description='Removes keyframes that can be recreated by interpolating between the remaining keyframes, '
+                    'within the given tolerances.\n'
+                    'Useful for animations that have a keyframe on every frame. '
+                    'Location and rotation curves will use linear interpolation',
+        default=False
+    )
+
+    location_tolerance: FloatProperty(
+        name='Location Tolerance',
+        description='Maximum distance between the original and the decimated location of each bone',
+        default=0.0005,
+        min=0.0,
+        precision=5,
+        subtype='DISTANCE'
+    )
+
+    rotation_tolerance: FloatProperty(
+        name='Rotation Tolerance',
+        description='Maximum angle between the original and the decimated rotation of each bone',
+        default=0.00175,
+        min=0.0,
+        subtype='ANGLE'
+    )
+
+    lazy_actions: BoolProperty(
+        name='Lazy Actions',
+        description='For GMTs with multiple animations, only the first action is built when importing.\n'
+                    'The other actions are created empty, and their FCurves are built once they are assigned '
+                    'to an object or exported. Until then, their converted animation is stored in the action '
+                    'and saved with the .blend file',
+        default=False
+    )
+
+    reuse_actions: EnumProperty(
+        items=[
+            ('NONE', 'Create New', 'Always create new actions'),
+            ('REUSE', 'Reuse', 'Assign existing actions that were imported from the same GMT with the same armature '
+             'and settings, without importing them again'),
+            ('REPLACE', 'Replace', 'Rebuild existing actions that were imported from the same GMT with the same '
+             'armature and settings, keeping their names and users. Discards any edits made to them'),
+        ],
+        name='Existing Actions',
+        description='What to do when the same GMT was already imported in this file. Actions are matched by '
+                    'the GMT\'s contents, not by name',
+        default='NONE'
+    )
+
+    import_to_selected: BoolProperty(
+        name='All Selected Armatures',
+        description='Also imports a single GMT onto every other selected armature. The file is only read once, '
+                    'and armatures with the same skeleton share the same actions.\n'
+                    'The import cache, lazy actions and watching are not used when importing onto multiple armatures',
+        default=False
+    )
+
+    watch_file: BoolProperty(
+        name='Watch for Changes',
+        description='Reloads the GMT whenever it changes on disk. Only the FCurves of bones whose animation '
+                    'changed are replaced, and the actions stay assigned.\n'
+                    'Only affects single GMT files. Can be stopped from File > Import',
+        default=False
+    )
+
+    use_background: BoolProperty(
+        name='Import in Background',
+        description='Keeps Blender responsive while importing, and shows the progress in the status bar.\n'
+                    'Files are read in a background thread, and actions are created a few bones at a time.\n'
+                    'Press Esc to cancel the import and remove the actions and cameras it created.\n'
+                    'Imports onto the active armature only',
+        default=False
+    )
+
     def draw(self, context):
         layout = self.layout
 
@@ -75,33 +209,96 @@ class ImportGMT(Operator, ImportHelper):
         layout.use_property_decorate = True  # No animation.
 
         layout.prop(self, 'armature_name')
+
+        # Background imports only import onto the active armature
+        selected_row = layout.row()
+        selected_row.prop(self, 'import_to_selected')
+        selected_row.enabled = not self.use_background
+
         layout.prop(self, 'merge_vector_curves')
+        layout.prop(self, 'remap_bones')
+        layout.prop(self, 'resample_frame_rate')
 
         is_auth_row = layout.row()
         is_auth_row.prop(self, 'is_auth')
         is_auth_row.enabled = self.merge_vector_curves
 
-    def execute(self, context):
-        import time
+        layout.prop(self, 'decimate_keyframes')
 
+        decimate_col = layout.column()
+        decimate_col.prop(self, 'location_tolerance')
+        decimate_col.prop(self, 'rotation_tolerance')
+        decimate_col.enabled = self.decimate_keyframes
+
+        cache_row = layout.row()
+        cache_row.prop(self, 'use_cache')
+        cache_row.operator(ClearGMTImportCache.bl_idname, text='', icon='TRASH')
+
+        layout.prop(self, 'lazy_actions')
+        layout.prop(self, 'reuse_actions')
+        layout.prop(self, 'import_directory')
+        layout.prop(self, 'watch_file')
+        layout.prop(self, 'use_background')
+
+        if self.filepath.endswith('.par'):
+            layout.separator()
+            layout.prop(self, 'par_entries')
+
+            try:
+                entries = get_par_entries(self.filepath, self.par_entries)
+                layout.label(text=f'{len(entries)} matching entries')
+            except Exception:
+                layout.label(text='Could not read PAR archive', icon='ERROR')
+
+    def execute(self, context):
         try:
-            if self.filepath.endswith('.cmt'):
-                importer_cls = CMTImporter
-            else:
+            if self.use_background:
+                return self.execute_background(context)
+
+            if self.filepath.endswith('.par'):
+                return self.execute_par(context)
+
+            filepaths = self.get_filepaths()
+            if not filepaths:
+                raise GMTError('No files to import')
+
+            if not all(path.endswith('.cmt') for path in filepaths):
                 arm = self.check_armature(context)
                 if isinstance(arm, str):
                     raise GMTError(arm)
 
-                importer_cls = IFAImporter if self.filepath.endswith('.ifa') else GMTImporter
+            import_settings = self.get_import_settings()
+
+            targets = self.get_target_armatures(context)
 
             start_time = time.time()
-            importer = importer_cls(context, self.filepath, self.as_keywords(ignore=("filter_glob",)))
+            if len(filepaths) == 1 and filepaths[0].endswith('.gmt') and len(targets) > 1:
+                importer = MultiArmatureImporter(context, filepaths[0], import_settings, targets)
+            elif len(filepaths) == 1:
+                importer = get_importer_cls(filepaths[0])(context, filepaths[0], import_settings)
+            else:
+                importer = BatchImporter(context, filepaths, import_settings)
             importer.read()
 
+            if self.watch_file and isinstance(importer, GMTImporter):
+                # Imported here since the watch module depends on this one
+                from .watch import watch_gmt_file
+
+                watch_gmt_file(importer)
+
             elapsed_s = "{:.2f}s".format(time.time() - start_time)
             print("Import finished in " + elapsed_s)
 
-            self.report({"INFO"}, f"Finished importing {basename(self.filepath)}")
+            if len(filepaths) == 1 and getattr(importer, 'total_keyframes', 0):
+                self.report({"INFO"}, f"Finished importing {basename(filepaths[0])} "
+                            f"(removed {importer.removed_keyframes} of {importer.total_keyframes} keyframes)")
+            elif len(filepaths) == 1:
+                self.report({"INFO"}, f"Finished importing {basename(filepaths[0])}")
+            elif importer.failed:
+                self.report({"WARNING"}, f"Imported {len(filepaths) - len(importer.failed)} of {len(filepaths)} files. "
+                            f"Check the console for errors")
+            else:
+                self.report({"INFO"}, f"Finished importing {len(filepaths)} files")
             return {'FINISHED'}
         except GMTError as error:
             print("Catching Error")
@@ -109,6 +306,153 @@ class ImportGMT(Operator, ImportHelper):
 
         return {'CANCELLED'}
 
+    def execute_par(self, context):
+        try:
+            entries = get_par_entries(self.filepath, self.par_entries)
+        except Exception as e:
+            raise GMTError(f'Could not read PAR archive - {e}')
+
+        if not entries:
+            raise GMTError('No matching entries in PAR archive')
+
+        if not all(entry.name.endswith('.cmt') for entry in entries):
+            arm = self.check_armature(context)
+            if isinstance(arm, str):
+                raise GMTError(arm)
+
+        start_time = time.time()
+        importer = PARImporter(context, self.filepath, self.get_import_settings(), entries)
+        importer.read()
+
+        elapsed_s = "{:.2f}s".format(time.time() - start_time)
+        print("Import finished in " + elapsed_s)
+
+        if importer.failed:
+            self.report({"WARNING"}, f"Imported {len(entries) - len(importer.failed)} of {len(entries)} entries. "
+                        f"Check the console for errors")
+        else:
+            self.report({"INFO"}, f"Finished importing {len(entries)} entries from {basename(self.filepath)}")
+        return {'FINISHED'}
+
+    def execute_background(self, context):
+        """Starts a BackgroundImportJob, which is advanced by modal() on each timer event"""
+
+        import_settings = self.get_import_settings()
+
+        if self.filepath.endswith('.par'):
+            try:
+                index = get_par_index(self.filepath)
+                entries = get_par_entries(self.filepath, self.par_entries)
+            except Exception as e:
+                raise GMTError(f'Could not read PAR archive - {e}')
+
+            # Entry data is read and decompressed by the job's thread
+            sources = [(os.path.join(self.filepath, e.path), partial(index.read_entry, e)) for e in entries]
+        else:
+            sources = [(path, partial(read_file_data, path)) for path in self.get_filepaths()]
+
+        if not sources:
+            raise GMTError('No files to import')
+
+        if not all(path.endswith('.cmt') for path, _ in sources):
+            arm = self.check_armature(context)
+            if isinstance(arm, str):
+                raise GMTError(arm)
+
+        if self.import_to_selected and len(self.get_target_armatures(context)) > 1:
+            self.report({"WARNING"}, "All Selected Armatures is ignored when importing in background. "
+                        "Only the active armature is used")
+
+        self.job = BackgroundImportJob(context, sources, import_settings)
+        self.job.start()
+
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        self.timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self.job.cancel()
+            self.finish_background(context)
+
+            self.report({"WARNING"}, "Import cancelled")
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER' or event.timer != self.timer:
+            return {'PASS_THROUGH'}
+
+        try:
+            done = self.job.step(IMPORT_TIME_SLICE)
+        except GMTError as error:
+            self.finish_background(context)
+            self.report({"ERROR"}, str(error))
+            return {'CANCELLED'}
+
+        context.window_manager.progress_update(self.job.progress * 100)
+        count = len(self.job.sources)
+        context.workspace.status_text_set(
+            f'Importing {min(self.job.finished_count + 1, count)} of {count} files '
+            f'({self.job.progress:.0%}) - Press Esc to cancel')
+
+        if not done:
+            return {'RUNNING_MODAL'}
+
+        self.finish_background(context)
+
+        # Same as execute(): only single GMT files are watched, not PAR entries
+        importer = self.job.importers[0]
+        if self.watch_file and count == 1 and not self.job.failed and isinstance(importer, GMTImporter) \
+                and os.path.isfile(importer.filepath):
+            from .watch import watch_gmt_file
+
+            watch_gmt_file(importer)
+
+        elapsed_s = "{:.2f}s".format(time.time() - self.job.start_time)
+        print("Import finished in " + elapsed_s)
+
+        if self.job.failed:
+            self.report({"WARNING"}, f"Imported {count - len(self.job.failed)} of {count} files. "
+                        f"Check the console for errors")
+        else:
+            self.report({"INFO"}, f"Finished importing {count} files" if count > 1
+                        else f"Finished importing {basename(self.job.sources[0][0])}")
+        return {'FINISHED'}
+
+    def finish_background(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def get_import_settings(self) -> Dict:
+        return self.as_keywords(ignore=("filter_glob", "files", "directory", "use_background"))
+
+    def get_target_armatures(self, context: bpy.context) -> List[bpy.types.Object]:
+        """Returns the active armature, followed by the other selected armatures if importing to all of them"""
+
+        ao = context.active_object
+        if not ao or ao.type != 'ARMATURE':
+            return list()
+
+        if not self.import_to_selected:
+            return [ao]
+
+        return [ao] + [o for o in context.selected_objects if o.type == 'ARMATURE' and o != ao]
+
+    def get_filepaths(self) -> List[str]:
+        if self.import_directory:
+            directory = self.directory or os.path.dirname(self.filepath)
+            return [os.path.join(directory, f) for f in sorted(os.listdir(directory))
+                    if f.endswith(IMPORT_EXTENSIONS) and os.path.isfile(os.path.join(directory, f))]
+
+        if len(self.files) > 1:
+            return [os.path.join(self.directory, f.name) for f in self.files if f.name]
+
+        return [self.filepath]
+
     def check_armature(self, context: bpy.context):
         """Sets the active object to be the armature chosen by the user"""
 
@@ -144,26 +488,278 @@ class ImportGMT(Operator, ImportHelper):
         return "No armature found to add animation to"
 
 
-def setup_armature(ao: bpy.types.Object) -> Dict[str, GMTBlenderBoneProps]:
+class ImportGMTScene(Operator, ImportHelper):
+    """Loads all animations of a hact/auth scene onto their armatures and camera"""
+    bl_idname = "import_scene.gmt_scene"
+    bl_label = "Import Yakuza Hact Scene"
+
+    filter_glob: StringProperty(default="*.gmt;*.cmt;*.ifa;*.par", options={"HIDDEN"})
+
+    directory: StringProperty(subtype='DIR_PATH', options={"HIDDEN", "SKIP_SAVE"})
+
+    mapping: StringProperty(
+        name='Mapping',
+        description='Target object for each file, as file=object pairs separated by commas '
+                    '(e.g. "c_kiryu*.gmt=Kiryu, *.cmt=Camera"). File names can use wildcards.\n'
+                    'Files that are not mapped are imported onto the armature with the same name as the file. '
+                    'CMT files use the scene camera by default',
+        default=''
+    )
+
+    merge_vector_curves: BoolProperty(
+        name='Merge Vector',
+        description='Merges vector_c_n animation into center_c_n, to allow for easier editing/previewing.\n'
+                    'This option should not be disabled. Does not affect Y3-5 animations',
+        default=True
+    )
+
+    remap_bones: BoolProperty(
+        name='Remap Bone Names',
+        description='Renames bones to match the target armature when importing animations from a different engine '
+                    '(e.g. Y5 animations onto a Y0 or DE armature).\n'
+                    'Bones that do not exist in the target armature are still skipped',
+        default=False
+    )
+
+    resample_frame_rate: BoolProperty(
+        name='Match Scene Frame Rate',
+        description='Moves keyframes to the scene\'s frame rate instead of changing the scene\'s frame rate '
+                    'to match the animation.\n'
+                    'Allows animations with different frame rates to be used in the same scene',
+        default=False
+    )
+
+    is_auth: BoolProperty(
+        name='Is Auth/Hact',
+        description='Specify the animation\'s origin.\n'
+                    'Hact and auth scenes should keep this enabled. '
+                    'Needed for proper vector merging for Y0/K1.\n'
+                    'Does not affect Y3-Y5 or DE. Does not affect anything if Merge Vector is disabled',
+        default=True
+    )
+
+    def draw(self, context):
+        layout = self.layout
+
+        layout.use_property_split = True
+        layout.use_property_decorate = True  # No animation.
+
+        layout.prop(self, 'mapping')
+        layout.prop(self, 'merge_vector_curves')
+        layout.prop(self, 'remap_bones')
+        layout.prop(self, 'resample_frame_rate')
+
+        is_auth_row = layout.row()
+        is_auth_row.prop(self, 'is_auth')
+        is_auth_row.enabled = self.merge_vector_curves
+
+        # Preview which object each file will be imported onto
+        try:
+            paths = [path for path, _ in self.get_sources()]
+        except Exception:
+            layout.label(text='Could not read the selected files', icon='ERROR')
+            return
+
+        box = layout.box()
+        for path, target in get_scene_targets(context, paths, self.mapping).items():
+            box.label(text=f'{basename(path)} -> {target.name if target else "(skipped)"}',
+                      icon='OUTLINER_OB_CAMERA' if path.endswith('.cmt') else 'OUTLINER_OB_ARMATURE')
+
+    def execute(self, context):
+        try:
+            sources = self.get_sources()
+            targets = get_scene_targets(context, [path for path, _ in sources], self.mapping)
+
+            for path, target in targets.items():
+                if not target:
+                    print(f'GMTWarning: No target object found for {basename(path)}, skipping...')
+
+            sources = [(path, location) for path, location in sources if targets[path]]
+            if not sources:
+                raise GMTError('No files could be matched to an armature or camera')
+
+            start_time = time.time()
+            importer = SceneImporter(context, sources, targets, self.as_keywords(
+                ignore=("filter_glob", "directory", "mapping")))
+            importer.read()
+
+            elapsed_s = "{:.2f}s".format(time.time() - start_time)
+            print("Import finished in " + elapsed_s)
+
+            skipped = len(targets) - len(sources)
+            if importer.failed or skipped:
+                self.report({"WARNING"}, f"Imported {len(sources) - len(importer.failed)} of {len(targets)} files. "
+                            f"Check the console for errors")
+            else:
+                self.report({"INFO"}, f"Finished importing {len(sources)} files")
+            return {'FINISHED'}
+        except GMTError as error:
+            print("Catching Error")
+            self.report({"ERROR"}, str(error))
+
+        return {'CANCELLED'}
+
+    def get_sources(self) -> List[Tuple[str, Optional[ParEntryLocation]]]:
+        """Returns (path, PAR entry location) for each file of the scene. The location is None for regular files.
+        Nothing is read here, so that workers read (and decompress) only the files that have a target.
+        """
+
+        if self.filepath.endswith('.par'):
+            index = get_par_index(self.filepath)
+            return [(os.path.join(self.filepath, e.path), index.get_location(e))
+                    for e in index.entries if e.name.endswith(IMPORT_EXTENSIONS)]
+
+        directory = self.directory or os.path.dirname(self.filepath)
+        return [(os.path.join(directory, f), None) for f in sorted(os.listdir(directory))
+                if f.endswith(IMPORT_EXTENSIONS) and os.path.isfile(os.path.join(directory, f))]
+
+
+class ClearGMTImportCache(Operator):
+    """Removes all animations stored by Use Cache"""
+    bl_idname = "import_scene.gmt_clear_cache"
+    bl_label = "Clear GMT Import Cache"
+
+    def execute(self, context):
+        count = clear_cached_animations()
+
+        self.report({"INFO"}, f"Removed {count} cached files")
+        return {'FINISHED'}
+
+
+IMPORT_EXTENSIONS = ('.gmt', '.cmt', '.ifa')
+
+# Custom property on imported actions, for finding actions that were imported from the same GMT and settings
+SOURCE_PROP = 'gmt_source'
+
+# Maximum time in seconds to spend creating actions on each timer event, when importing in the background
+IMPORT_TIME_SLICE = 0.05
+
+# Data that a background import can create, which is removed again if it is cancelled. Objects come before their data
+JOB_ID_COLLECTIONS = ('objects', 'cameras', 'actions')
+
+# Table of contents of the last PAR archive shown in the import dialog, to avoid reading it on every redraw
+par_index_cache: Dict[str, Tuple[float, ParArchiveIndex]] = dict()
+
+
+def get_par_index(filepath: str) -> ParArchiveIndex:
+    mtime = os.path.getmtime(filepath)
+
+    cached = par_index_cache.get(filepath)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    index = read_par_index(filepath)
+
+    par_index_cache.clear()
+    par_index_cache[filepath] = (mtime, index)
+
+    return index
+
+
+def get_par_entries(filepath: str, patterns: str) -> List[ParEntry]:
+    """Returns the importable entries of the archive that match any of the comma separated patterns"""
+
+    patterns = [p.strip().replace('\\', '/') for p in patterns.split(',') if p.strip()]
+
+    return [e for e in get_par_index(filepath).entries
+            if e.name.endswith(IMPORT_EXTENSIONS) and any(fnmatch(e.name, p) or fnmatch(e.path, p) for p in patterns)]
+
+
+def get_scene_targets(context: bpy.context, filepaths: List[str], mapping: str) -> Dict[str, bpy.types.Object]:
+    """Returns the object to import each file onto, or None if no suitable object was found.
+    mapping is a comma separated list of file=object pairs, which take priority over matching by name.
+    """
+
+    pairs = [tuple(s.strip() for s in item.split('=', 1)) for item in mapping.split(',') if '=' in item]
+
+    targets = dict()
+    for path in filepaths:
+        name = basename(path)
+        obj_type = 'CAMERA' if name.endswith('.cmt') else 'ARMATURE'
+
+        target = None
+        for pattern, obj_name in pairs:
+            if fnmatch(name, pattern):
+                target = bpy.data.objects.get(obj_name)
+                break
+
+        if target is None:
+            stem = os.path.splitext(name)[0].lower()
+            target = next((o for o in bpy.data.objects if o.type == obj_type and o.name.lower() == stem), None)
+
+        if target is None and obj_type == 'CAMERA':
+            target = context.scene.camera
+
+        if target and target.type != obj_type:
+            # Allow mapping to a mesh that is parented to the armature
+            target = target.find_armature() if obj_type == 'ARMATURE' else None
+
+        targets[path] = target
+
+    return targets
+
+
+def get_importer_cls(filepath: str):
+    if filepath.endswith('.cmt'):
+        return CMTImporter
+
+    return IFAImporter if filepath.endswith('.ifa') else GMTImporter
+
+
+def setup_armature(ao: bpy.types.Object) -> GMTConversionPlan:
     if not ao.animation_data:
         ao.animation_data_create()
 
-    hidden = ao.hide_get()
-    mode = ao.mode
+    # Necessary to ensure proper importing
+    clear_pose_transforms(ao)
+
+    return get_conversion_plan(ao)
+
+
+def clear_pose_transforms(ao: bpy.types.Object):
+    """Resets the transforms of all pose bones, like bpy.ops.pose.transforms_clear() with all bones selected.
+    Uses the data API only, so the mode and bone selection are not changed.
+    """
+
+    pose_bones = ao.pose.bones
+    count = len(pose_bones)
+
+    pose_bones.foreach_set('location', np.zeros(count * 3, dtype=np.float32))
+    pose_bones.foreach_set('rotation_quaternion', np.tile(np.array((1.0, 0.0, 0.0, 0.0), dtype=np.float32), count))
+    pose_bones.foreach_set('rotation_euler', np.zeros(count * 3, dtype=np.float32))
+    pose_bones.foreach_set('rotation_axis_angle', np.tile(np.array((0.0, 0.0, 1.0, 0.0), dtype=np.float32), count))
+    pose_bones.foreach_set('scale', np.ones(count * 3, dtype=np.float32))
+
+    ao.update_tag()
+
 
-    # Necessary steps to ensure proper importing
-    ao.hide_set(False)
-    bpy.ops.object.mode_set(mode='POSE')
-    bpy.ops.pose.select_all(action='SELECT')
-    bpy.ops.pose.transforms_clear()
-    bpy.ops.pose.select_all(action='DESELECT')
+# Pose bone transforms that clear_pose_transforms() resets, with their number of values per bone
+POSE_TRANSFORMS = (('location', 3), ('rotation_quaternion', 4), ('rotation_euler', 3), ('rotation_axis_angle', 4),
+                   ('scale', 3))
 
-    bone_props = get_edit_bones_props(ao)
 
-    bpy.ops.object.mode_set(mode=mode)
-    ao.hide_set(hidden)
+def get_pose_transforms(ao: bpy.types.Object) -> Dict[str, np.ndarray]:
+    pose_bones = ao.pose.bones
 
-    return bone_props
+    transforms = dict()
+    for attr, size in POSE_TRANSFORMS:
+        transforms[attr] = np.empty(len(pose_bones) * size, dtype=np.float32)
+        pose_bones.foreach_get(attr, transforms[attr])
+
+    return transforms
+
+
+def set_pose_transforms(ao: bpy.types.Object, transforms: Dict[str, np.ndarray]):
+    """Restores transforms from get_pose_transforms(). Does nothing if bones were added or removed since then"""
+
+    pose_bones = ao.pose.bones
+    if any(len(values) != len(pose_bones) * size for (attr, size), values in zip(POSE_TRANSFORMS, transforms.values())):
+        return
+
+    for attr, values in transforms.items():
+        pose_bones.foreach_set(attr, values)
+
+    ao.update_tag()
 
 
 class IFAImporter:
@@ -171,18 +767,44 @@ class IFAImporter:
         self.filepath = filepath
         self.context = context
 
+        # Armature to import onto instead of the active object
+        self.target = None
+        self.update_scene = True
+
+        # Pointers of the IDs created by the importer, for removing them if a background import is cancelled
+        self.created_ids = list()
+
     ifa: IFA
 
     def read(self):
         self.ifa = read_ifa(self.filepath)
         self.make_action()
 
+    def read_data(self, data: bytes):
+        self.parse_data(data)
+        self.make_action()
+
+    def parse_data(self, data: bytes):
+        self.ifa = read_ifa(data)
+
+    def make_actions_steps(self):
+        self.make_action()
+        yield 1.0
+
+    def read_parsed(self, ifa: IFA):
+        """Same as read(), for an IFA that was already read by parse_worker.parse_file()"""
+
+        self.ifa = ifa
+        self.make_action()
+
     def make_action(self):
-        ao = self.context.active_object
+        ao = self.target or self.context.active_object
 
-        bone_props = setup_armature(ao)
+        conversion_plan = setup_armature(ao)
 
         action = ao.animation_data.action = bpy.data.actions.new(name=f'{basename(self.filepath)}')
+        self.created_ids.append(action.as_pointer())
+        builder = ActionBuilder(action)
 
         # Instead of rewriting the curve importing functions, we can just convert the IFA bones to GMT curves
         for bone in self.ifa.bone_list:
@@ -192,11 +814,14 @@ class IFAImporter:
                 curve = GMTCurve(curve_type)
                 curve.keyframes.append(GMTKeyframe(0, curve_values))
 
-                convert_gmt_curve_to_blender(curve)
-                import_curve(self.context, curve, bone.name, action, group.name, bone_props)
+                curve = transform_curve(convert_gmt_curve_to_blender_array(curve), conversion_plan.get(bone.name))
+                import_curve(self.context, curve, bone.name, builder, group.name)
+
+        builder.build()
 
-        self.context.scene.frame_start = 0
-        self.context.scene.frame_current = 0
+        if self.update_scene:
+            self.context.scene.frame_start = 0
+            self.context.scene.frame_current = 0
 
 
 class CMTImporter:
@@ -204,19 +829,47 @@ class CMTImporter:
         self.filepath = filepath
         self.context = context
 
+        self.resample_frame_rate = import_settings.get('resample_frame_rate')
+        self.target_frame_rate = None
+
+        # Camera to import onto instead of the scene camera
+        self.target = None
+        self.update_scene = True
+
+        # Pointers of the IDs created by the importer, for removing them if a background import is cancelled
+        self.created_ids = list()
+
     cmt: CMT
 
     def read(self):
         self.cmt = read_cmt(self.filepath)
         self.animate_camera()
 
+    def read_data(self, data: bytes):
+        self.parse_data(data)
+        self.animate_camera()
+
+    def parse_data(self, data: bytes):
+        self.cmt = read_cmt(data)
+
+    def make_actions_steps(self):
+        self.animate_camera()
+        yield 1.0
+
+    def read_parsed(self, cmt: CMT):
+        """Same as read(), for a CMT that was already read by parse_worker.parse_file()"""
+
+        self.cmt = cmt
+        self.animate_camera()
+
     def animate_camera(self):
-        self.camera = self.context.scene.camera
+        self.camera = self.target or self.context.scene.camera
 
         if not self.camera:
             camera_data = bpy.data.cameras.new(name='Camera')
             self.camera = bpy.data.objects.new('Camera', camera_data)
             self.context.scene.collection.objects.link(self.camera)
+            self.created_ids += [self.camera.as_pointer(), camera_data.as_pointer()]
 
         if not self.camera.animation_data:
             self.camera.animation_data_create()
@@ -228,39 +881,65 @@ class CMTImporter:
         self.camera.data.sensor_fit = 'VERTICAL'
         self.camera.data.sensor_height = 100.0
 
+        render = self.context.scene.render
+        self.target_frame_rate = render.fps / render.fps_base if self.resample_frame_rate else None
+
+        # Convert the frames of all animations together before importing anything
+        locations, _, fovs = convert_cmt_frames_to_blender(
+            [frame for anm in self.cmt.animation_list for frame in anm.frames], self.camera.data.sensor_height)
+
+        start = 0
         single = bool(self.cmt.animation)
         for i, anm in enumerate(self.cmt.animation_list):
             frame_rate = anm.frame_rate
             frame_count = len(anm.frames)
-            self.make_action(anm, basename(self.filepath) + '' if single else f'({i})')
+            end = start + frame_count
+
+            if self.target_frame_rate:
+                frame_count = int(round(frame_count * self.target_frame_rate / frame_rate))
 
-        self.context.scene.render.fps = int(frame_rate)
-        self.context.scene.frame_start = 0
-        self.context.scene.frame_current = 0
-        self.context.scene.frame_end = frame_count
+            self.make_action(anm, basename(self.filepath) + '' if single else f'({i})',
+                             locations[start:end], fovs[start:end])
+            start = end
+
+        if self.update_scene:
+            if not self.target_frame_rate:
+                self.context.scene.render.fps = int(frame_rate)
+            self.context.scene.frame_start = 0
+            self.context.scene.frame_current = 0
+            self.context.scene.frame_end = frame_count
+
+    def make_action(self, anm: CMTAnimation, action_name, locations: np.ndarray, fovs: np.ndarray):
+        """The frames of anm should already be converted to Blender, with their locations and fovs given as arrays"""
 
-    def make_action(self, anm: CMTAnimation, action_name):
         action = self.camera.animation_data.action = bpy.data.actions.new(name=action_name)
+        self.created_ids.append(action.as_pointer())
         group = action.groups.new("Camera")
+        builder = ActionBuilder(action)
 
-        # Convert the CMT frames before importing anything
-        convert_cmt_anm_to_blender(anm, self.camera.data)
+        # The roll is defined by gmt_lib, so rotations are still made for each frame
         dists, rotations = zip(*map(lambda x: x.to_dist_rotation(True), anm.frames))
 
+        ratio = self.target_frame_rate / anm.frame_rate if self.target_frame_rate else 1.0
+
         def import_curve(data_path, values):
-            values = enumerate(zip(*values)) if hasattr(values[0], '__iter__') else [(-1, values)]
+            values = np.asarray(values, dtype=np.float64)
+            frames = np.arange(len(values))
 
-            for i, values_channel in values:
-                fcurve = action.fcurves.new(data_path=data_path, index=i, action_group=group.name)
-                fcurve.keyframe_points.add(len(values_channel))
-                fcurve.keyframe_points.foreach_set('co', [x for co in zip(
-                    range(len(values_channel)), values_channel) for x in co])
+            if ratio != 1.0 and len(values) > 1:
+                # CMTs have a keyframe on every frame, so keyframes are resampled together for all channels
+                frames, times = resample_frames(frames, ratio)
+                values = sample_keyframes(np.arange(len(values)), values.reshape(len(values), -1), times,
+                                          data_path == 'rotation_quaternion').reshape((len(frames),) + values.shape[1:])
+
+            values = enumerate(values.T) if values.ndim == 2 else [(-1, values)]
 
-                fcurve.update()
+            for i, values_channel in values:
+                builder.add_channel(data_path, i, group.name, frames, values_channel)
 
-        import_curve('location', list(map(lambda x: x.location[:], anm.frames)))
-        import_curve('rotation_quaternion', list(map(lambda x: x[:], rotations)))
-        import_curve('data.lens', list(map(lambda x: x.fov, anm.frames)))
+        import_curve('location', locations)
+        import_curve('rotation_quaternion', [x[:] for x in rotations])
+        import_curve('data.lens', fovs)
 
         # Kenzan does not store the focus distance
         if self.cmt.version > CMTVersion.KENZAN:
@@ -276,67 +955,289 @@ class CMTImporter:
             import_curve('data.clip_start', clip_starts)
             import_curve('data.clip_end', clip_ends)
 
+        builder.build()
+
 
 class GMTImporter:
     def __init__(self, context: bpy.context, filepath, import_settings: Dict):
         self.filepath = filepath
         self.context = context
+        self.import_settings = import_settings
         self.merge_vector_curves = import_settings.get('merge_vector_curves')
         self.is_auth = import_settings.get('is_auth')
-
-    gmt: GMT
+        self.use_cache = import_settings.get('use_cache')
+        self.lazy_actions = import_settings.get('lazy_actions')
+        self.watch_file = import_settings.get('watch_file')
+        self.reuse_actions = import_settings.get('reuse_actions') or 'NONE'
+        self.remap_bones = import_settings.get('remap_bones')
+        self.resample_frame_rate = import_settings.get('resample_frame_rate')
+        self.target_frame_rate = None
+        self.cache_key = None
+
+        self.decimate_keyframes = import_settings.get('decimate_keyframes')
+        self.location_tolerance = import_settings.get('location_tolerance', 0.0)
+        self.rotation_tolerance = import_settings.get('rotation_tolerance', 0.0)
+        self.removed_keyframes = 0
+        self.total_keyframes = 0
+
+        # Armature to import onto instead of the active object
+        self.target = None
+        self.update_scene = True
+
+        # Pointers of the IDs created by the importer, for removing them if a background import is cancelled
+        self.created_ids = list()
+
+        # Existing actions and the new actions that replace them, as pointers. See replace_actions()
+        self.replaced_actions = list()
+
+    gmt_name: str
+    animations: List[GMTArrayAnimation]
+    animation_count: int
+    action_names: List[str]
 
     def read(self):
+        with open(self.filepath, 'rb') as f:
+            self.read_data(f.read())
+
+    def read_data(self, data: bytes):
+        """Same as read(), for file contents that are already in memory"""
+
         try:
-            self.gmt = read_gmt(self.filepath)
+            self.setup()
+
+            # Watching needs the converted animations, so actions cannot be reused as is
+            if self.reuse_actions == 'REUSE' and not self.watch_file and self.assign_existing_actions(data):
+                return
+
+            # The cache and watching need all animations to be converted before building any action
+            if self.use_cache or self.watch_file:
+                self.parse_data(data)
+                self.make_actions()
+            else:
+                self.stream_data(data)
+        except Exception as e:
+            raise GMTError(f'{e}')
+
+    def setup(self):
+        """Prepares the target armature. Should be called on the main thread before parse_data()"""
+
+        self.ao = self.target or self.context.active_object
+        self.conversion_plan = setup_armature(self.ao)
+        self.bone_names = frozenset(self.ao.pose.bones.keys())
+        self.setup_frame_rate()
+
+    def setup_frame_rate(self):
+        if self.resample_frame_rate:
+            render = self.context.scene.render
+            self.target_frame_rate = render.fps / render.fps_base
+
+    def parse_data(self, data: bytes):
+        """Reads and converts the GMT without accessing any Blender data, so it can run in a background thread"""
+
+        # Existing actions are also found using the cache key
+        cached = None
+        if self.use_cache or self.reuse_actions != 'NONE':
+            self.cache_key = self.make_cache_key(data)
+        if self.use_cache:
+            cached = load_cached_animations(self.cache_key)
+
+        if cached:
+            print('Using cached animations')
+            self.gmt_name, self.animations = cached
+        else:
+            # The GMT itself is not kept, only the converted animations are needed for building actions
+            gmt = read_gmt(data)
+            self.gmt_name = gmt.name
+            self.animations = self.convert_animations(convert_gmt_animations(
+                gmt, self.bone_names, self.merge_vector_curves, self.is_auth, self.remap_bones))
+
+            if self.use_cache:
+                save_cached_animations(self.cache_key, self.gmt_name, self.animations)
+
+        self.animation_count = len(self.animations)
+
+    def stream_data(self, data: bytes):
+        """Same as parse_data() followed by make_actions(), but each animation is converted right before its
+        action is built, and is released before converting the next one. Only the converted arrays are bounded
+        by the largest animation: gmt_lib still reads the whole file first, and the read animations are freed
+        one at a time as they are converted.
+        """
+
+        if self.reuse_actions != 'NONE':
+            self.cache_key = self.make_cache_key(data)
+
+        gmt = read_gmt(data)
+        self.gmt_name = gmt.name
+        self.animation_count = len(gmt.animation_list)
+
+        self.animations = map(self.convert_animation, iter_gmt_animations(
+            gmt, self.bone_names, self.merge_vector_curves, self.is_auth, self.remap_bones, release=True))
+
+        self.make_actions()
+
+        # Everything was consumed by building the actions
+        self.animations = list()
+
+    def read_parsed(self, parsed: Tuple[str, List[GMTArrayAnimation]]):
+        """Same as read(), for a GMT that was already parsed and converted by parse_worker.parse_file()"""
+
+        try:
+            self.setup()
+
+            self.gmt_name, animations = parsed
+            self.animations = self.convert_animations(animations)
+            self.animation_count = len(self.animations)
+
+            if self.reuse_actions != 'NONE':
+                self.cache_key = self.make_cache_key(read_file_data(self.filepath))
+
             self.make_actions()
         except Exception as e:
             raise GMTError(f'{e}')
 
+    def assign_existing_actions(self, data: bytes) -> bool:
+        """Assigns the actions that were imported from the same data with the same settings, without parsing.
+        Returns False if any of the GMT's actions does not exist anymore.
+        """
+
+        self.cache_key = self.make_cache_key(data)
+
+        actions = find_source_actions(self.cache_key)
+        if not actions or len(actions) != next(iter(actions.values()))[SOURCE_PROP]['count']:
+            return False
+
+        print(f'Reusing {len(actions)} existing actions')
+
+        self.animations = list()
+        self.action_names = [actions[i].name for i in range(len(actions))]
+
+        # Same assignment as importing again: the first action for lazy imports, otherwise the last one
+        self.ao.animation_data.action = actions[0 if self.lazy_actions else len(actions) - 1]
+
+        if self.update_scene:
+            sources = [actions[i][SOURCE_PROP] for i in range(len(actions))]
+            if not self.target_frame_rate:
+                self.context.scene.render.fps = int(sources[-1]['frame_rate'])
+            self.context.scene.frame_start = 0
+            self.context.scene.frame_current = 0
+            self.context.scene.frame_end = int(max(s['end_frame'] for s in sources))
+
+        return True
+
+    def make_cache_key(self, data: bytes) -> str:
+        decimation = (self.location_tolerance, self.rotation_tolerance) if self.decimate_keyframes else None
+        return make_cache_key(data, self.conversion_plan.fingerprint, self.merge_vector_curves, self.is_auth,
+                              decimation, self.remap_bones, self.target_frame_rate)
+
+    def convert_animations(self, animations: List[GMTArrayAnimation]) -> List[GMTArrayAnimation]:
+        """Transforms converted animations into pose space, ready for creating FCurves.
+        Keyframes are decimated after transforming, if enabled.
+        """
+
+        return [self.convert_animation(anm) for anm in animations]
+
+    def convert_animation(self, anm: GMTArrayAnimation) -> GMTArrayAnimation:
+        if self.target_frame_rate and anm.frame_rate != self.target_frame_rate:
+            anm = resample_animation(anm, self.target_frame_rate)
+
+        # Face animations are not converted using the rest pose
+        anm_plan = GMTConversionPlan(dict()) if anm.is_face else self.conversion_plan
+
+        for bone_name, bone in anm.bones.items():
+            bone = transform_bone(bone, anm_plan.get(bone_name))
+
+            if self.decimate_keyframes:
+                self.total_keyframes += sum(len(c) for c in bone.curves)
+                bone, removed = decimate_bone(bone, self.location_tolerance, self.rotation_tolerance)
+                self.removed_keyframes += removed
+
+            anm.bones[bone_name] = bone
+
+        return anm
+
+    def get_interpolation(self) -> str:
+        # Decimated keyframes only stay within tolerance with linear interpolation
+        return 'LINEAR' if self.decimate_keyframes else None
+
     def make_actions(self):
-        print(f'Importing file: {self.gmt.name}')
+        for _ in self.make_actions_steps():
+            pass
 
-        ao = self.context.active_object
-        bone_props = setup_armature(ao)
+        self.replace_actions()
+
+    def replace_actions(self):
+        """Replaces the existing actions that were rebuilt by make_actions_steps() with their new actions.
+        The new actions take the names and users of the old ones, which are removed.
+        """
+
+        for old_pointer, new_pointer in self.replaced_actions:
+            old_action = find_id(bpy.data.actions, old_pointer)
+            new_action = find_id(bpy.data.actions, new_pointer)
+            if not old_action or not new_action:
+                continue
+
+            name = old_action.name
+            new_action.use_fake_user = old_action.use_fake_user
+            old_action.user_remap(new_action)
+            bpy.data.actions.remove(old_action)
 
-        vector_version = self.gmt.vector_version
+            self.action_names[self.action_names.index(new_action.name)] = name
+            new_action.name = name
+
+        self.replaced_actions = list()
+
+    def make_actions_steps(self):
+        """Creates the actions one bone at a time, yielding the finished fraction after each bone"""
+
+        print(f'Importing file: {self.gmt_name}')
+
+        self.action_names = list()
+
+        existing_actions = find_source_actions(self.cache_key) if self.reuse_actions != 'NONE' else dict()
 
         end_frame = 1
         frame_rate = 30
-        for anm in self.gmt.animation_list:
-            anm_bone_props = dict() if (self.gmt.is_face_gmt and anm.is_face_anm()) else bone_props
-
+        for i, anm in enumerate(self.animations):
             end_frame = max(end_frame, anm.end_frame)
             frame_rate = anm.frame_rate
 
-            act_name = f'{anm.name}[{self.gmt.name}]'
+            act_name = f'{anm.name}[{self.gmt_name}]'
 
-            ao.animation_data.action = bpy.data.actions.new(name=act_name)
-            action = ao.animation_data.action
+            action = existing_actions.get(i)
+            if action and (self.reuse_actions == 'REUSE' or is_placeholder_action(action)):
+                # Placeholders have no edits to discard, so they are always reused
+                self.ao.animation_data.action = action
+                self.action_names.append(action.name)
+                yield (i + 1) / self.animation_count
+                continue
 
-            bones: Dict[str, GMTBone] = dict()
-            for bone_name in anm.bones:
-                if bone_name in ao.pose.bones:
-                    bones[bone_name] = anm.bones[bone_name]
-                else:
-                    print(f'WARNING: Skipped bone: "{bone_name}"')
+            old_action = action
+            action = bpy.data.actions.new(name=act_name)
+            self.created_ids.append(action.as_pointer())
 
-            # Convert curves early to allow for easier GMT modification before creating FCurves
-            for bone_name in bones:
-                for curve in bones[bone_name].curves:
-                    convert_gmt_curve_to_blender(curve)
+            if old_action:
+                # The existing action keeps its contents until all actions are built, so that a cancelled
+                # background import does not change it. See replace_actions()
+                self.replaced_actions.append((old_action.as_pointer(), action.as_pointer()))
 
-            # Try merging vector into center
-            if self.merge_vector_curves:
-                # Bone names are constant because vector does not exist pre-Ishin
-                merge_vector(bones.get('center_c_n'), bones.get('vector_c_n'), vector_version, self.is_auth)
+            if self.cache_key:
+                set_action_source(action, self.cache_key, i, self.animation_count, anm)
 
-            for bone_name in bones:
-                group = action.groups.new(bone_name)
-                print(f'Importing ActionGroup: {group.name}')
+            # The first action is always built, so that the armature has an animation to show
+            if self.lazy_actions and i > 0:
+                make_placeholder_action(act_name, anm, self.get_interpolation(), action)
+                self.action_names.append(action.name)
+                yield (i + 1) / self.animation_count
+                continue
 
-                for curve in bones[bone_name].curves:
-                    import_curve(self.context, curve, bone_name, action, group.name, anm_bone_props)
+            self.ao.animation_data.action = action
+            self.action_names.append(action.name)
+
+            for fraction in build_action_steps(self.context, action, anm, self.get_interpolation()):
+                yield (i + fraction) / self.animation_count
+
+        if self.decimate_keyframes:
+            print(f'Decimation removed {self.removed_keyframes} of {self.total_keyframes} keyframes')
 
         # If pattern previewing is to be enabled later, this should be moved to the addon register function instead
         # Although that may require bone.par path in order to import the patterns with the basic skeleton GMDs
@@ -344,152 +1245,462 @@ class GMTImporter:
         # if not pattern_action and bpy.context.preferences.addons["yakuza_gmt"].preferences.get("use_patterns"):
         #     pattern_action = make_pattern_action(vector_version)
 
-        self.context.scene.render.fps = int(frame_rate)
-        self.context.scene.frame_start = 0
-        self.context.scene.frame_current = 0
-        self.context.scene.frame_end = int(end_frame)
+        if self.update_scene:
+            if not self.target_frame_rate:
+                self.context.scene.render.fps = int(frame_rate)
+            self.context.scene.frame_start = 0
+            self.context.scene.frame_current = 0
+            self.context.scene.frame_end = int(end_frame)
+
+
+class PARImporter:
+    """Imports entries from a PAR archive. Only the selected entries are read and decompressed, in memory."""
+
+    def __init__(self, context: bpy.context, filepath, import_settings: Dict, entries: List[ParEntry]):
+        self.filepath = filepath
+        self.context = context
+        self.import_settings = import_settings
+        self.entries = entries
+
+    failed: List[ParEntry]
+
+    def read(self):
+        self.failed = list()
+
+        index = get_par_index(self.filepath)
+
+        for entry in self.entries:
+            print(f'Importing PAR entry: {entry.path}')
+
+            # Importers use the path's base name for naming actions
+            entry_path = os.path.join(self.filepath, entry.path)
 
+            try:
+                importer = get_importer_cls(entry.name)(self.context, entry_path, self.import_settings)
+                importer.read_data(index.read_entry(entry))
+            except Exception as e:
+                if len(self.entries) == 1:
+                    raise GMTError(f'Could not import {entry.path} - {e}')
 
-def merge_vector(center_bone: GMTBone, vector_bone: GMTBone, vector_version: GMTVectorVersion, is_auth: bool):
-    """Merges vector_c_n curves into center_c_n for easier modification.
-    Does not affect NO_VECTOR animations.
+                print(f'GMTError: Could not import {entry.path} - {e}')
+                self.failed.append(entry)
+
+        if self.entries and len(self.failed) == len(self.entries):
+            raise GMTError('Could not import any of the selected entries')
+
+
+class MultiArmatureImporter:
+    """Imports a single GMT onto multiple armatures. The GMT is read and vector is merged only once.
+    Armatures are grouped by rest pose, and each group converts the animations and builds the actions once,
+    which are then assigned to every armature in the group.
     """
 
-    if vector_version == GMTVectorVersion.NO_VECTOR:
-        return
+    def __init__(self, context: bpy.context, filepath, import_settings: Dict, targets: List[bpy.types.Object]):
+        self.filepath = filepath
+        self.context = context
+        self.targets = targets
 
-    if not (center_bone and vector_bone):
-        print('GMTWarning: Cannot merge vector - \"center_c_n\" and/or \"vector_c_n\" bones are missing')
+        # These need a single armature, so they are not used here
+        self.import_settings = dict(import_settings, use_cache=False, lazy_actions=False, watch_file=False,
+                                    reuse_actions='NONE')
 
-    if (vector_version == GMTVectorVersion.OLD_VECTOR and not is_auth) or vector_version == GMTVectorVersion.DRAGON_VECTOR:
-        # Both curves' values should be applied, so add vector to center
-        center_bone.location = add_curve(center_bone.location, vector_bone.location, GMTCurveType.LOCATION)
-        center_bone.rotation = add_curve(center_bone.rotation, vector_bone.rotation, GMTCurveType.ROTATION)
+        self.merge_vector_curves = import_settings.get('merge_vector_curves')
+        self.is_auth = import_settings.get('is_auth')
 
-    # Reset vector's curves to avoid confusion, since it won't be used anymore
-    vector_bone.location = GMTCurve.new_location_curve()
-    vector_bone.rotation = GMTCurve.new_rotation_curve()
-    convert_gmt_curve_to_blender(vector_bone.location)
-    convert_gmt_curve_to_blender(vector_bone.rotation)
+    def read(self):
+        try:
+            groups: Dict[str, List[bpy.types.Object]] = dict()
+            for ao in self.targets:
+                groups.setdefault(setup_armature(ao).fingerprint, list()).append(ao)
+
+            gmt = read_gmt(self.filepath)
+            gmt_name = gmt.name
+
+            bone_names = frozenset().union(*(ao.pose.bones.keys() for ao in self.targets))
+            animations = convert_gmt_animations(gmt, bone_names, self.merge_vector_curves, self.is_auth,
+                                                self.import_settings.get('remap_bones'))
+            del gmt
+
+            for i, group in enumerate(groups.values()):
+                print(f'Importing onto armatures: {", ".join(ao.name for ao in group)}')
+
+                importer = GMTImporter(self.context, self.filepath, self.import_settings)
+                importer.target = group[0]
+                importer.update_scene = i == len(groups) - 1
+                importer.setup()
+
+                # Transforming creates new bones, so the shared animations are not modified
+                importer.gmt_name = gmt_name
+                importer.animations = importer.convert_animations(
+                    [anm.copy(importer.bone_names) for anm in animations])
+                importer.animation_count = len(importer.animations)
+                importer.make_actions()
+
+                for ao in group[1:]:
+                    ao.animation_data.action = group[0].animation_data.action
+        except Exception as e:
+            raise GMTError(f'{e}')
 
 
-def add_curve(curve: GMTCurve, other: GMTCurve, expected_curve_type: GMTCurveType) -> GMTCurve:
-    """Adds the animation data of a curve to this curve. Both curves need to have the same GMTCurveType.
-    If their type is LOCATION, vectors will be added.
-    If their type is ROTATION, quaternions will be multiplied.
-    expected_curve_type is only used if both curves are None
+class SceneImporter:
+    """Imports each file onto its own target object, parsing all files in a process pool.
+    The scene's frame rate and frame range are set once, after all files were imported.
     """
 
-    if (other or curve) is None:
-        if expected_curve_type == GMTCurveType.LOCATION:
-            curve = GMTCurve.new_location_curve()
-        elif expected_curve_type == GMTCurveType.ROTATION:
-            curve = GMTCurve.new_rotation_curve()
-        else:
-            curve = GMTCurve(expected_curve_type)
+    def __init__(self, context: bpy.context, sources: List[Tuple[str, Optional[ParEntryLocation]]],
+                 targets: Dict[str, bpy.types.Object], import_settings: Dict):
+        self.context = context
+        self.sources = sources
+        self.targets = targets
+        self.import_settings = import_settings
+        self.merge_vector_curves = import_settings.get('merge_vector_curves')
+        self.is_auth = import_settings.get('is_auth')
 
-        convert_gmt_curve_to_blender(curve)
-        return curve
-    elif other is None:
-        return curve
-    elif curve is None:
-        return deepcopy(other)
+    failed: List[str]
 
-    if curve.type != other.type:
-        raise GMTError('Curves with different types cannot be added')
+    def read(self):
+        self.failed = list()
 
-    if curve.type == GMTCurveType.LOCATION:
-        # Vector add and lerp
-        def add(v1, v2): return v1 + v2
-        def lerp(v1, v2, f): return v1.lerp(v2, f)
+        frame_rate = None
+        end_frame = 1
 
-        if len(curve.keyframes) == 0:
-            curve.keyframes.append(GMTKeyframe(0, Vector()))
-    elif curve.type == GMTCurveType.ROTATION:
-        # Quaternion multiply and slerp
-        def add(v1, v2): return v1 @ v2
-        def lerp(v1, v2, f): return v1.slerp(v2, f)
+        # Forking Blender is not safe, so always start fresh interpreters
+        mp_context = multiprocessing.get_context('spawn')
+        max_workers = min(len(self.sources), os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+            futures = dict()
+            for path, location in self.sources:
+                target = self.targets[path]
+                bone_names = frozenset(target.pose.bones.keys()) if target.type == 'ARMATURE' else frozenset()
+
+                futures[executor.submit(parse_file, path, bone_names, self.merge_vector_curves,
+                                        self.is_auth, location, self.import_settings.get('remap_bones'))] = path
+
+            for future in as_completed(futures):
+                path = futures[future]
+
+                try:
+                    importer = get_importer_cls(path)(self.context, path, self.import_settings)
+                    importer.target = self.targets[path]
+                    importer.update_scene = False
+                    importer.read_parsed(future.result())
+                except Exception as e:
+                    print(f'GMTError: Could not import {basename(path)} - {e}')
+                    self.failed.append(path)
+                    continue
+
+                if isinstance(importer, GMTImporter):
+                    for anm in importer.animations:
+                        frame_rate = frame_rate or anm.frame_rate
+                        end_frame = max(end_frame, anm.end_frame)
+                elif isinstance(importer, CMTImporter):
+                    for anm in importer.cmt.animation_list:
+                        frame_rate = frame_rate or anm.frame_rate
+                        ratio = importer.target_frame_rate / anm.frame_rate if importer.target_frame_rate else 1.0
+                        end_frame = max(end_frame, int(round(len(anm.frames) * ratio)))
+
+        if len(self.failed) == len(self.sources):
+            raise GMTError('Could not import any of the scene files')
+
+        scene = self.context.scene
+        if frame_rate and not self.import_settings.get('resample_frame_rate'):
+            scene.render.fps = int(frame_rate)
+        scene.frame_start = 0
+        scene.frame_current = 0
+        scene.frame_end = int(end_frame)
+
+
+class BatchImporter:
+    """Imports multiple files, parsing them in a process pool.
+    Actions are created on the main thread in the order that files finish parsing.
+    """
 
-        if len(curve.keyframes) == 0:
-            curve.keyframes.append(GMTKeyframe(0, Quaternion()))
-    else:
-        raise GMTError(f'Incompatible curve type for addition: {curve.type}')
+    def __init__(self, context: bpy.context, filepaths: List[str], import_settings: Dict):
+        self.filepaths = filepaths
+        self.context = context
+        self.import_settings = import_settings
+        self.merge_vector_curves = import_settings.get('merge_vector_curves')
+        self.is_auth = import_settings.get('is_auth')
+
+    failed: List[str]
+
+    def read(self):
+        self.failed = list()
+
+        ao = self.context.active_object
+        bone_names = frozenset(ao.pose.bones.keys()) if (ao and ao.type == 'ARMATURE') else frozenset()
+
+        # Forking Blender is not safe, so always start fresh interpreters
+        mp_context = multiprocessing.get_context('spawn')
+        max_workers = min(len(self.filepaths), os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+            futures = {executor.submit(parse_file, path, bone_names, self.merge_vector_curves, self.is_auth, None,
+                                       self.import_settings.get('remap_bones')): path
+                       for path in self.filepaths}
+
+            for future in as_completed(futures):
+                path = futures[future]
 
-    result = list()
-    curve_dict = {kf.frame: kf.value for kf in curve.keyframes}
-    curve_min = curve.keyframes[0].frame
-    curve_max = curve.keyframes[-1].frame
+                try:
+                    importer = get_importer_cls(path)(self.context, path, self.import_settings)
+                    importer.read_parsed(future.result())
+                except Exception as e:
+                    print(f'GMTError: Could not import {basename(path)} - {e}')
+                    self.failed.append(path)
+
+        if len(self.failed) == len(self.filepaths):
+            raise GMTError('Could not import any of the selected files')
+
+
+class BackgroundImportJob:
+    """Imports files without blocking Blender's UI.
+    Files are read and converted in a background thread, one at a time, without accessing any Blender data.
+    Actions are created on the main thread by calling step() repeatedly, which only runs for a limited time.
+    """
+
+    sources: List[Tuple[str, Callable[[], bytes]]]
+    importers: List
+    failed: List[str]
+    finished_count: int
+    progress: float
+
+    def __init__(self, context: bpy.context, sources: List[Tuple[str, Callable[[], bytes]]], import_settings: Dict):
+        self.context = context
+        self.sources = sources
+        self.import_settings = import_settings
+
+        self.importers = [get_importer_cls(path)(context, path, import_settings) for path, _ in sources]
+        self.failed = list()
+        self.finished_count = 0
+        self.progress = 0.0
+
+        self.parsed = queue.Queue()
+        self.cancelled = threading.Event()
+        self.steps = None
+
+    def start(self):
+        self.start_time = time.time()
+
+        # Record the current state so that it can be restored if the import is cancelled
+        self.old_assignments = list()
+        for obj in (self.context.active_object, self.context.scene.camera):
+            if obj and obj.animation_data:
+                self.old_assignments.append((obj, obj.animation_data.action))
+
+        # Armature setup clears the pose
+        ao = self.context.active_object
+        self.old_pose = (ao, get_pose_transforms(ao)) if ao and ao.type == 'ARMATURE' else None
+
+        scene = self.context.scene
+        self.old_scene_settings = (scene.render.fps, scene.frame_start, scene.frame_end, scene.frame_current)
+
+        # Armature setup needs Blender data, so it cannot be done by the thread
+        for importer in self.importers:
+            if isinstance(importer, GMTImporter):
+                importer.setup()
 
-    other_dict = {kf.frame: kf.value for kf in other.keyframes}
-    other_min = other.keyframes[0].frame
-    other_max = other.keyframes[-1].frame
+        self.thread = threading.Thread(target=self.parse_all, daemon=True)
+        self.thread.start()
 
-    # Iterate over frames from 0 to the last frame in either curve
-    for i in range(max(curve.get_end_frame(), other.get_end_frame()) + 1):
-        # Check if the current frame has a keyframe
-        v1 = curve_dict.get(i)
-        v2 = other_dict.get(i)
+    def parse_all(self):
+        for importer, (path, read_data) in zip(self.importers, self.sources):
+            if self.cancelled.is_set():
+                return
 
-        # Do not add/interpolate if no values are explicitly specified in this frame
-        if not (v1 is None and v2 is None):
-            if v1 is None:
-                # Get the last keyframe that is less than the current frame, or the first keyframe
-                less = next((k for k in reversed(curve_dict) if k < i), curve_min)
+            try:
+                importer.parse_data(read_data())
+                self.parsed.put((importer, path, None))
+            except Exception as e:
+                self.parsed.put((importer, path, e))
 
-                # Get the first keyframe that is greater than the current frame, or the last keyframe
-                more = next((k for k in curve_dict if k > i), curve_max)
+    def step(self, time_slice: float) -> bool:
+        """Creates actions until time_slice seconds have passed. Returns True when all files are done"""
 
-                # Interpolate between the two values for the current frame, or use the only value if there is only 1 keyframe
-                v1 = lerp(curve_dict[less], curve_dict[more], (i - less) /
-                          (more - less)) if less != more else curve_dict[less]
-            if v2 is None:
-                less = next((k for k in reversed(other_dict) if k < i), other_min)
-                more = next((k for k in other_dict if k > i), other_max)
-                v2 = lerp(other_dict[less], other_dict[more], (i - less) /
-                          (more - less)) if less != more else other_dict[less]
+        deadline = time.perf_counter() + time_slice
 
-            result.append(GMTKeyframe(i, add(v1, v2)))
+        while time.perf_counter() < deadline and self.finished_count < len(self.sources):
+            if self.steps is None:
+                try:
+                    importer, self.current_path, error = self.parsed.get_nowait()
+                except queue.Empty:
+                    # Wait for the thread on the next timer event instead of blocking the UI
+                    break
 
-    curve.keyframes = result
-    return curve
+                if error:
+                    self.fail(error)
+                    continue
 
+                print(f'Importing file: {basename(self.current_path)}')
+                self.steps = importer.make_actions_steps()
+
+            try:
+                fraction = next(self.steps)
+                self.progress = (self.finished_count + fraction) / len(self.sources)
+            except StopIteration:
+                self.steps = None
+                self.finished_count += 1
+                self.progress = self.finished_count / len(self.sources)
+            except Exception as e:
+                self.steps = None
+                self.fail(e)
+
+        if self.finished_count < len(self.sources):
+            return False
+
+        if len(self.failed) == len(self.sources):
+            if len(self.sources) == 1:
+                raise GMTError(self.last_error)
+            raise GMTError('Could not import any of the selected files')
+
+        # Existing actions are only replaced once nothing can be cancelled anymore
+        for importer in self.importers:
+            if isinstance(importer, GMTImporter):
+                importer.replace_actions()
+
+        return True
+
+    def fail(self, error: Exception):
+        print(f'GMTError: Could not import {basename(self.current_path)} - {error}')
+
+        self.last_error = f'{error}'
+        self.failed.append(self.current_path)
+        self.finished_count += 1
+
+    def cancel(self):
+        """Stops the thread after the current file, and removes the IDs that the job's importers created
+        (actions, and cameras made by the CMT importer). Anything else that was created while importing is kept.
+        Existing actions are not changed yet, since replacing them waits for the job to finish.
+        The armature's pose, action assignments and scene settings are restored.
+        """
+
+        self.cancelled.set()
+        self.steps = None
+
+        for obj, action in self.old_assignments:
+            obj.animation_data.action = action
+
+        if self.old_pose:
+            set_pose_transforms(*self.old_pose)
+
+        created_ids = {pointer for importer in self.importers for pointer in importer.created_ids}
+
+        # Objects are removed before their data
+        for name in JOB_ID_COLLECTIONS:
+            collection = getattr(bpy.data, name)
+            for id_block in [i for i in collection if i.as_pointer() in created_ids]:
+                collection.remove(id_block)
+
+        scene = self.context.scene
+        scene.render.fps, scene.frame_start, scene.frame_end, scene.frame_current = self.old_scene_settings
+
+        print('Import cancelled')
+
+
+def set_action_source(action: bpy.types.Action, cache_key: str, index: int, count: int, anm: GMTArrayAnimation):
+    """Stores which GMT (including import settings) and which of its animations the action was imported from"""
+
+    action[SOURCE_PROP] = {
+        'key': cache_key,
+        'index': index,
+        'count': count,
+        'frame_rate': anm.frame_rate,
+        'end_frame': anm.end_frame,
+    }
+
+
+def find_source_actions(cache_key: str) -> Dict[int, bpy.types.Action]:
+    """Returns the actions that were imported with the cache key, by animation index"""
+
+    actions = dict()
+    if not cache_key:
+        return actions
+
+    for action in bpy.data.actions:
+        source = action.get(SOURCE_PROP)
+        if source and source.get('key') == cache_key:
+            actions.setdefault(source['index'], action)
+
+    return actions
+
+
+def find_id(collection: bpy.types.bpy_prop_collection, pointer: int) -> bpy.types.ID:
+    """Finds an ID by its as_pointer() value. Used instead of keeping references to IDs between timer events,
+    which would become invalid if the ID is removed or the user undoes
+    """
+
+    return next((id_block for id_block in collection if id_block.as_pointer() == pointer), None)
+
+
+def build_action_steps(context: bpy.context, action: bpy.types.Action, anm: GMTArrayAnimation,
+                       interpolation: str = None):
+    """Creates the action's FCurves one bone at a time, yielding the finished fraction after each bone"""
+
+    builder = ActionBuilder(action)
+
+    for j, (bone_name, bone) in enumerate(anm.bones.items()):
+        group = action.groups.new(bone_name)
+        print(f'Importing ActionGroup: {group.name}')
+
+        for curve in bone.curves:
+            import_curve(context, curve, bone_name, builder, group.name, interpolation)
+
+        builder.build()
+        yield (j + 1) / len(anm.bones)
+
+
+def read_file_data(filepath: str) -> bytes:
+    with open(filepath, 'rb') as f:
+        return f.read()
+
+
+def transform_curve(curve: GMTArrayCurve, conversion: GMTBoneConversion) -> GMTArrayCurve:
+    """Returns a copy of the curve with its values transformed from GMT bone space into Blender pose space"""
+
+    values = curve.values
+
+    if len(curve) == 0:
+        pass
+    elif curve.type == GMTCurveType.LOCATION:
+        values = transform_location_to_blender_array(conversion, values)
+    elif curve.type == GMTCurveType.ROTATION:
+        values = transform_rotation_to_blender_array(conversion, values)
+    elif curve.type == GMTCurveType.PATTERN_HAND:
+        values = pattern1_to_blender_array(values)
+
+    # pat2 and pat3 use the same format, and need no conversion
+    return GMTArrayCurve(curve.type, curve.channel, curve.frames, values)
+
+
+def transform_bone(bone: GMTArrayBone, conversion: GMTBoneConversion) -> GMTArrayBone:
+    result = GMTArrayBone(bone.name)
+    for curve in bone.curves:
+        result.set_curve(transform_curve(curve, conversion))
+
+    return result
+
+
+def import_curve(context: bpy.context, curve: GMTArrayCurve, bone_name: str, builder: ActionBuilder, group_name: str,
+                 interpolation: str = None):
+    """Queues the FCurves for a single curve in the builder. FCurves are only created after calling builder.build()
+    The curve's values should already be transformed with transform_curve().
+    If interpolation is None, the user's default keyframe interpolation is used, except for pattern curves.
+    """
 
-def import_curve(context: bpy.context, curve: GMTCurve, bone_name: str, action: Action, group_name: str, bone_props: Dict[str, GMTBlenderBoneProps]):
     data_path = get_data_path_from_curve_type(context, curve.type, curve.channel)
 
-    if data_path == '' or len(curve.keyframes) == 0:
+    if data_path == '' or len(curve) == 0:
         print(f'GMTWarning: Skipping type {curve.type} curve for {bone_name}...')
         return
 
-    frames, values = zip(*map(lambda kf: (kf.frame, kf.value), curve.keyframes))
-
-    need_const_interpolation = False
-    if data_path == 'location':
-        values = transform_location_to_blender(bone_props, bone_name, values)
-    elif data_path == 'rotation_quaternion':
-        values = transform_rotation_to_blender(bone_props, bone_name, values)
-    elif 'pat1' in data_path:
-        need_const_interpolation = True
-        values = pattern1_to_blender(values)
-    elif 'pat' in data_path:
-        need_const_interpolation = True
-        # pat2 and pat3 use the same format
-        values = pattern2_to_blender(values)
-    else:
-        return
-
-    for i, values_channel in enumerate(zip(*values)):
-        fcurve = action.fcurves.new(data_path=(
-            f'pose.bones["{bone_name}"].{data_path}'), index=i, action_group=group_name)
-        fcurve.keyframe_points.add(len(frames))
-        fcurve.keyframe_points.foreach_set('co', [x for co in zip(frames, values_channel) for x in co])
-
-        # Not needed if the change_interpolation() handler is active
-        if need_const_interpolation:
-            for kf in fcurve.keyframe_points:
-                kf.interpolation = 'CONSTANT'
+    # Not needed if the change_interpolation() handler is active
+    if 'pat' in data_path:
+        interpolation = 'CONSTANT'
 
-        fcurve.update()
+    for i in range(curve.values.shape[1]):
+        builder.add_channel(f'pose.bones["{bone_name}"].{data_path}', i, group_name,
+                            curve.frames, curve.values[:, i], interpolation)
 
 
 def get_data_path_from_curve_type(context: bpy.context, curve_type: GMTCurveType, curve_channel: GMTCurveChannel) -> str:
@@ -553,3 +1764,4 @@ def create_pose_bone_type(context: bpy.context, pat_string: str):
 
 def menu_func_import(self, context):
     self.layout.operator(ImportGMT.bl_idname, text='Yakuza Animation (.gmt/.cmt/.ifa)')
+    self.layout.operator(ImportGMTScene.bl_idname, text='Yakuza Hact Scene (.gmt/.cmt/.par)')
@@ -0,0 +1,120 @@
+from typing import List, Set
+
+import bpy
+from bpy.app.handlers import persistent
+from bpy.types import Action
+
+from .curve_array import GMTArrayAnimation
+
+# Placeholder actions are empty actions with this custom property, which holds their converted animation as arrays
+# The arrays are saved with the .blend file, so placeholders can still be built in later sessions
+LAZY_PROP = 'gmt_lazy'
+
+# Names of the placeholder actions that have not been built yet, so the depsgraph handler has nothing to do without them
+# Rebuilt from the actions in bpy.data after loading a .blend file or undoing, or when a placeholder was renamed or removed
+pending_placeholders: Set[str] = set()
+
+
+def make_placeholder_action(name: str, anm: GMTArrayAnimation, interpolation: str = None,
+                            action: Action = None) -> Action:
+    """Creates an action without any FCurves, which will be built by materialize_action() when it is needed.
+    The animation should already be converted. It is stored in the action, which takes much less memory than FCurves.
+    If an empty action or a placeholder is given, it becomes the placeholder instead, keeping its name and users.
+    """
+
+    if action is None:
+        action = bpy.data.actions.new(name=name)
+
+    # Replacing the animation of a placeholder should not forget whether the user set its fake user
+    use_fake_user = action[LAZY_PROP]['use_fake_user'] if is_placeholder_action(action) else action.use_fake_user
+
+    action[LAZY_PROP] = {
+        'animation': anm.to_dict(),
+        'interpolation': interpolation or '',
+        'use_fake_user': use_fake_user,
+    }
+
+    # Unassigned actions would be lost when saving the file
+    action.use_fake_user = True
+
+    pending_placeholders.add(action.name)
+    return action
+
+
+def is_placeholder_action(action: Action) -> bool:
+    return action is not None and LAZY_PROP in action
+
+
+def materialize_action(action: Action):
+    """Builds the FCurves of a placeholder action from its stored animation. Does nothing for other actions"""
+
+    if not is_placeholder_action(action):
+        return
+
+    # Imported here to avoid a circular import
+    from .importer import build_action_steps
+
+    info = action[LAZY_PROP].to_dict()
+    anm = GMTArrayAnimation.from_dict(info['animation'])
+
+    print(f'Building action: {action.name}')
+    for _ in build_action_steps(bpy.context, action, anm, info['interpolation'] or None):
+        pass
+
+    # The stored animation is not needed anymore
+    del action[LAZY_PROP]
+    pending_placeholders.discard(action.name)
+
+    # The fake user was only there to keep the placeholder, so remove it unless the user set it
+    # Actions that are still not used by anything keep it, to avoid losing them when saving
+    if not info['use_fake_user'] and action.users > 1:
+        action.use_fake_user = False
+
+
+def collect_placeholder_actions():
+    pending_placeholders.clear()
+    pending_placeholders.update(action.name for action in bpy.data.actions if is_placeholder_action(action))
+
+
+def get_assigned_placeholders() -> List[Action]:
+    """Returns the pending placeholder actions that are used by anything other than their fake user"""
+
+    if not pending_placeholders:
+        return list()
+
+    actions = [bpy.data.actions.get(name) for name in pending_placeholders]
+    if not all(is_placeholder_action(action) for action in actions):
+        collect_placeholder_actions()
+        actions = [bpy.data.actions.get(name) for name in pending_placeholders]
+
+    # Any user other than the fake one means the action was assigned (to an object, NLA strip, etc.)
+    return [action for action in actions if action.users > int(action.use_fake_user)]
+
+
+@persistent
+def load_placeholder_actions(*args):
+    """Finds the placeholder actions after loading a .blend file, undoing or redoing"""
+
+    collect_placeholder_actions()
+
+
+@persistent
+def schedule_assigned_actions(scene, depsgraph=None):
+    """Builds placeholder actions soon after they are assigned to an object.
+    Data should not be changed from depsgraph handlers, so the actions are built by a timer instead.
+    """
+
+    if get_assigned_placeholders() and not bpy.app.timers.is_registered(materialize_assigned_actions):
+        bpy.app.timers.register(materialize_assigned_actions)
+
+
+def materialize_assigned_actions():
+    """Timer callback for schedule_assigned_actions(). Runs once"""
+
+    for action in get_assigned_placeholders():
+        materialize_action(action)
+
+
+def stop_materializing():
+    if bpy.app.timers.is_registered(materialize_assigned_actions):
+        bpy.app.timers.unregister(materialize_assigned_actions)
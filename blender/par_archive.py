@@ -0,0 +1,423 @@
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from bisect import bisect
+from typing import Dict, List, Optional, Tuple
+
+# Only the header and table of contents are read when opening an archive, so listing entries does not
+# depend on the archive's size. Entry data is read (and decompressed) on demand.
+
+PARC_HEADER_SIZE = 0x20
+PARC_NAME_SIZE = 0x40
+PARC_INFO_SIZE = 0x20
+
+SLLZ_HEADER_SIZE = 0x10
+
+# Largest decompressed size of a single SLLZ v2 chunk
+SLLZ_V2_CHUNK_SIZE = 0x10000
+
+# Entries that are moved or appended start on this alignment, like the entries packed by the game's tools
+PARC_DATA_ALIGNMENT = 0x800
+
+# Where an entry's data is stored, as (archive path, offset, stored size, is compressed)
+# Can be sent to worker processes instead of the data itself, so that each one reads its own entry
+ParEntryLocation = Tuple[str, int, int, bool]
+
+
+class ParEntry:
+    """A single file entry from a PAR archive's table of contents"""
+
+    name: str
+    path: str
+    index: int
+    is_compressed: bool
+    size: int
+    compressed_size: int
+    offset: int
+
+    def __init__(self, name: str, index: int):
+        self.name = name
+        self.path = name
+        self.index = index
+        self.is_compressed = False
+        self.size = 0
+        self.compressed_size = 0
+        self.offset = 0
+
+
+class ParArchiveIndex:
+    """Table of contents of a PAR archive on disk"""
+
+    filepath: str
+    endian: str
+    file_info_offset: int
+    folder_paths: List[str]
+    entries: List[ParEntry]
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.endian = '>'
+        self.file_info_offset = 0
+        self.folder_paths = list()
+        self.entries = list()
+
+    def find(self, path: str) -> ParEntry:
+        """Returns the entry with the given path (or name, if it is unique), or None"""
+
+        path = path.replace('\\', '/')
+        for entry in self.entries:
+            if entry.path == path:
+                return entry
+
+        matches = [e for e in self.entries if e.name == path]
+        return matches[0] if len(matches) == 1 else None
+
+    def get_location(self, entry: ParEntry) -> ParEntryLocation:
+        size = entry.compressed_size if entry.is_compressed else entry.size
+        return self.filepath, entry.offset, size, entry.is_compressed
+
+    def read_entry_raw(self, entry: ParEntry) -> bytes:
+        """Returns the entry's stored bytes, without decompressing them"""
+
+        with open(self.filepath, 'rb') as f:
+            f.seek(entry.offset)
+            return f.read(entry.compressed_size if entry.is_compressed else entry.size)
+
+    def read_entry(self, entry: ParEntry) -> bytes:
+        return read_par_entry(self.get_location(entry))
+
+
+def read_par_entry(location: ParEntryLocation) -> bytes:
+    """Reads and decompresses an entry's data, without reading the archive's table of contents"""
+
+    filepath, offset, size, is_compressed = location
+
+    with open(filepath, 'rb') as f:
+        f.seek(offset)
+        data = f.read(size)
+
+    return decompress_sllz(data) if is_compressed else data
+
+
+def read_par_index(filepath: str) -> ParArchiveIndex:
+    with open(filepath, 'rb') as f:
+        header = f.read(PARC_HEADER_SIZE)
+
+        if len(header) < PARC_HEADER_SIZE or header[:4] != b'PARC':
+            raise ValueError(f'Not a PAR archive: {filepath}')
+
+        index = ParArchiveIndex(filepath)
+        index.endian = '>' if header[5] == 1 else '<'
+
+        folder_count, folder_info_offset, file_count, file_info_offset = struct.unpack_from(
+            f'{index.endian}4I', header, 0x10)
+        index.file_info_offset = file_info_offset
+
+        names = f.read((folder_count + file_count) * PARC_NAME_SIZE)
+        folder_names = [read_name(names, i) for i in range(folder_count)]
+
+        entries = index.entries = [ParEntry(read_name(names, folder_count + i), i) for i in range(file_count)]
+
+        f.seek(file_info_offset)
+        file_infos = f.read(file_count * PARC_INFO_SIZE)
+
+        f.seek(folder_info_offset)
+        folder_infos = f.read(folder_count * PARC_INFO_SIZE)
+
+    for entry in entries:
+        compression, size, compressed_size, base_offset, _, extended_offset = struct.unpack_from(
+            f'{index.endian}6I', file_infos, entry.index * PARC_INFO_SIZE)
+
+        entry.is_compressed = bool(compression & 0x80000000)
+        entry.size = size
+        entry.compressed_size = compressed_size
+        entry.offset = (extended_offset << 32) | base_offset
+
+    # Build full paths by walking the folder tree from the root folder
+    folder_paths: Dict[int, str] = {0: ''}
+    for i in range(folder_count):
+        sub_count, sub_start, sub_file_count, file_start = struct.unpack_from(
+            f'{index.endian}4I', folder_infos, i * PARC_INFO_SIZE)
+
+        parent_path = folder_paths.get(i, folder_names[i])
+        for sub in range(sub_start, min(sub_start + sub_count, folder_count)):
+            folder_paths[sub] = f'{parent_path}{folder_names[sub]}/'
+
+        for file_index in range(file_start, min(file_start + sub_file_count, file_count)):
+            entries[file_index].path = parent_path + entries[file_index].name
+
+    index.folder_paths = [folder_paths.get(i, folder_names[i]) for i in range(folder_count)]
+
+    return index
+
+
+def read_name(names: bytes, index: int) -> str:
+    name = names[index * PARC_NAME_SIZE:(index + 1) * PARC_NAME_SIZE]
+    return name.split(b'\0', 1)[0].decode('cp932', errors='replace')
+
+
+def write_par_entries(filepath: str, files: Dict[str, bytes], compress: bool = False) -> Tuple[int, int]:
+    """Replaces or adds entries of a PAR archive on disk, without repacking the archive.
+    files maps the path (or unique name) of each entry to its new data. Paths that are not in the archive are added
+    to their folder, which has to exist already. Returns the number of replaced and added entries.
+
+    Untouched entries keep their stored bytes as they are. New data is compressed with SLLZ v2 if compress is set,
+    and is written over the entry's old data if it fits, or appended to the end of the archive otherwise.
+    The changes are made to a copy of the archive, which only replaces it once all of them succeeded.
+    """
+
+    index = read_par_index(filepath)
+
+    fd, temp_path = tempfile.mkstemp(prefix=f'{os.path.basename(filepath)}.', suffix='.tmp',
+                                     dir=os.path.dirname(os.path.abspath(filepath)))
+    os.close(fd)
+
+    try:
+        shutil.copyfile(filepath, temp_path)
+        shutil.copymode(filepath, temp_path)
+
+        with open(temp_path, 'r+b') as f:
+            result = update_par_entries(f, index, files, compress)
+
+        os.replace(temp_path, filepath)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return result
+
+
+def update_par_entries(f, index: ParArchiveIndex, files: Dict[str, bytes], compress: bool) -> Tuple[int, int]:
+    """Does the work of write_par_entries() on an open copy of the archive that index was read from"""
+
+    endian = index.endian
+
+    header = bytearray(f.read(PARC_HEADER_SIZE))
+    folder_count, folder_info_offset, file_count, file_info_offset = struct.unpack_from(f'{endian}4I', header, 0x10)
+
+    names = f.read((folder_count + file_count) * PARC_NAME_SIZE)
+    names = [names[i * PARC_NAME_SIZE:(i + 1) * PARC_NAME_SIZE] for i in range(folder_count + file_count)]
+    folder_names, file_names = names[:folder_count], names[folder_count:]
+
+    f.seek(folder_info_offset)
+    folder_infos = [bytearray(f.read(PARC_INFO_SIZE)) for _ in range(folder_count)]
+
+    f.seek(file_info_offset)
+    file_infos = [bytearray(f.read(PARC_INFO_SIZE)) for _ in range(file_count)]
+
+    # (stored bytes, decompressed size) for each file index, None for untouched entries
+    new_data: List[Optional[Tuple[bytes, int]]] = [None] * file_count
+    is_new = [False] * file_count
+
+    # Replace first, since adding entries shifts the indices of the entries after them
+    additions = list()
+    for path, data in files.items():
+        stored = (compress_sllz_v2(data, endian) if compress else data, len(data))
+
+        entry = index.find(path)
+        if entry:
+            new_data[entry.index] = stored
+        else:
+            additions.append((path.replace('\\', '/'), stored))
+
+    for path, stored in additions:
+        file_index = insert_par_file(path, index.folder_paths, folder_infos, file_names, file_infos, endian)
+        new_data.insert(file_index, stored)
+        is_new.insert(file_index, True)
+
+    # The table of contents only moves if it grows, and then starts right after the header
+    toc_end = 0
+    if additions:
+        folder_info_offset = PARC_HEADER_SIZE + (folder_count + len(file_names)) * PARC_NAME_SIZE
+        file_info_offset = folder_info_offset + folder_count * PARC_INFO_SIZE
+        toc_end = file_info_offset + len(file_infos) * PARC_INFO_SIZE
+
+    f.seek(0, os.SEEK_END)
+    end = align_offset(f.tell())
+
+    for i, info in enumerate(file_infos):
+        compression, size, compressed_size, base_offset, _, extended_offset = struct.unpack_from(
+            f'{endian}6I', info, 0)
+
+        offset = (extended_offset << 32) | base_offset
+        stored_size = compressed_size if compression & 0x80000000 else size
+
+        if new_data[i] is None:
+            if stored_size == 0 or offset >= toc_end:
+                continue
+
+            # The grown table of contents overlaps this entry, so move its bytes to the end
+            # Only the offset changes, the rest of its info (including all compression flags) is kept
+            f.seek(offset)
+            data = f.read(stored_size)
+            fits = False
+        else:
+            data, size = new_data[i]
+            fits = not is_new[i] and len(data) <= stored_size and offset >= toc_end
+
+            struct.pack_into(f'{endian}3I', info, 0, 0x80000000 if compress else 0, size, len(data))
+
+        if not fits:
+            offset = end
+            end = align_offset(end + len(data))
+
+        f.seek(offset)
+        f.write(data)
+
+        struct.pack_into(f'{endian}I', info, 0xC, offset & 0xFFFFFFFF)
+        struct.pack_into(f'{endian}I', info, 0x14, offset >> 32)
+
+    # Written last, after all of the data that it points to
+    struct.pack_into(f'{endian}4I', header, 0x10, folder_count, folder_info_offset, len(file_infos), file_info_offset)
+
+    f.seek(0)
+    f.write(header)
+    if additions:
+        f.write(b''.join(folder_names + file_names))
+
+    f.seek(folder_info_offset)
+    f.write(b''.join(folder_infos))
+
+    f.seek(file_info_offset)
+    f.write(b''.join(file_infos))
+
+    return len(files) - len(additions), len(additions)
+
+
+def insert_par_file(path: str, folder_paths: List[str], folder_infos: List[bytearray], file_names: List[bytes],
+                    file_infos: List[bytearray], endian: str) -> int:
+    """Adds an empty file to its folder, sorted by name, and shifts the files of the folders after it.
+    Returns the index of the new file.
+    """
+
+    folder_path, _, name = path.rpartition('/')
+    folder_path = f'{folder_path}/' if folder_path else ''
+
+    if folder_path not in folder_paths:
+        raise ValueError(f'Folder "{folder_path}" does not exist in the archive')
+
+    encoded = name.encode('cp932')
+    if not encoded or len(encoded) >= PARC_NAME_SIZE:
+        raise ValueError(f'Invalid entry name: "{name}"')
+
+    folder_index = folder_paths.index(folder_path)
+    _, _, folder_file_count, file_start = struct.unpack_from(f'{endian}4I', folder_infos[folder_index], 0)
+
+    # Keep the folder's files sorted by name
+    folder_files = [n.split(b'\0', 1)[0] for n in file_names[file_start:file_start + folder_file_count]]
+    file_index = file_start + bisect(folder_files, encoded)
+
+    for i, info in enumerate(folder_infos):
+        _, _, sub_file_count, sub_file_start = struct.unpack_from(f'{endian}4I', info, 0)
+
+        if i == folder_index:
+            struct.pack_into(f'{endian}I', info, 0x8, sub_file_count + 1)
+        elif sub_file_start >= file_index:
+            struct.pack_into(f'{endian}I', info, 0xC, sub_file_start + 1)
+
+    # Attributes and timestamp are copied from a neighbouring file, the rest is filled in when the data is written
+    info = bytearray(PARC_INFO_SIZE)
+    if file_infos:
+        info[0x10:] = file_infos[min(file_index, len(file_infos) - 1)][0x10:]
+
+    file_names.insert(file_index, encoded.ljust(PARC_NAME_SIZE, b'\0'))
+    file_infos.insert(file_index, info)
+
+    return file_index
+
+
+def align_offset(offset: int) -> int:
+    return (offset + PARC_DATA_ALIGNMENT - 1) & ~(PARC_DATA_ALIGNMENT - 1)
+
+
+def compress_sllz_v2(data: bytes, endian: str) -> bytes:
+    """Inverse of decompress_sllz_v2. Only newer Dragon Engine games read version 2"""
+
+    chunks = bytearray()
+    for start in range(0, len(data), SLLZ_V2_CHUNK_SIZE):
+        chunk = data[start:start + SLLZ_V2_CHUNK_SIZE]
+        compressed = zlib.compress(chunk)
+
+        chunks += (len(compressed) + 5).to_bytes(3, 'big') + (len(chunk) - 1).to_bytes(2, 'big') + compressed
+
+    header = b'SLLZ' + bytes((1 if endian == '>' else 0, 2))
+    header += struct.pack(f'{endian}HII', SLLZ_HEADER_SIZE, len(data), SLLZ_HEADER_SIZE + len(chunks))
+
+    return header + bytes(chunks)
+
+
+def decompress_sllz(data: bytes) -> bytes:
+    if data[:4] != b'SLLZ':
+        raise ValueError('Entry is marked as compressed, but does not have an SLLZ header')
+
+    endian = '>' if data[4] == 1 else '<'
+    version = data[5]
+    header_size, decompressed_size = struct.unpack_from(f'{endian}HI', data, 6)
+
+    if version == 1:
+        return decompress_sllz_v1(data, header_size, decompressed_size)
+    elif version == 2:
+        return decompress_sllz_v2(data, header_size, decompressed_size)
+
+    raise ValueError(f'Unsupported SLLZ version: {version}')
+
+
+def decompress_sllz_v1(data: bytes, pos: int, decompressed_size: int) -> bytes:
+    """LZ77 variant. Each flag bit (MSB first) selects between a literal byte and a back reference.
+    The next flag byte is read as soon as the current one runs out, before the data it belongs to.
+    """
+
+    output = bytearray()
+
+    flag = data[pos]
+    pos += 1
+    flag_count = 8
+
+    while len(output) < decompressed_size:
+        is_copy = flag & 0x80
+
+        flag = (flag << 1) & 0xFF
+        flag_count -= 1
+        if flag_count == 0:
+            flag = data[pos]
+            pos += 1
+            flag_count = 8
+
+        if is_copy:
+            copy_flags = data[pos] | (data[pos + 1] << 8)
+            pos += 2
+
+            distance = 1 + (copy_flags >> 4)
+            count = 3 + (copy_flags & 0xF)
+
+            start = len(output) - distance
+            if count <= distance:
+                output += output[start:start + count]
+            else:
+                # Overlapping copy, repeats the referenced bytes
+                for i in range(count):
+                    output.append(output[start + i])
+        else:
+            output.append(data[pos])
+            pos += 1
+
+    return bytes(output[:decompressed_size])
+
+
+def decompress_sllz_v2(data: bytes, pos: int, decompressed_size: int) -> bytes:
+    """Sequence of zlib chunks, each with a 5 byte header (24 bit chunk size, 16 bit decompressed size - 1)"""
+
+    output = bytearray()
+
+    while len(output) < decompressed_size and pos < len(data):
+        chunk_size = (data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2]
+
+        decompressor = zlib.decompressobj()
+        output += decompressor.decompress(data[pos + 5:pos + chunk_size])
+        output += decompressor.flush()
+
+        pos += chunk_size
+
+    return bytes(output[:decompressed_size])
@@ -0,0 +1,29 @@
+from typing import AbstractSet, Optional
+
+from ..gmt_lib import *
+from ..gmt_lib.gmt.gmt_reader import read_cmt, read_ifa
+from .array_converter import convert_gmt_animations
+from .par_archive import ParEntryLocation, read_par_entry
+
+# This module is imported by worker processes, which do not have access to bpy or mathutils
+# Anything imported here should only depend on gmt_lib and numpy
+
+
+def parse_file(filepath: str, bone_names: AbstractSet[str], merge_vector_curves: bool, is_auth: bool,
+               par_entry: Optional[ParEntryLocation] = None, remap_bones: bool = False):
+    """Reads a GMT, CMT or IFA file, and does all of the conversion that does not need Blender.
+    GMT files are returned as (gmt_name, animations), with animations converted using convert_gmt_animations().
+    CMT and IFA files are returned as they were read, since converting them requires mathutils.
+    If par_entry is given, that PAR entry is read instead of the file. filepath is still used for the format.
+    """
+
+    source = filepath if par_entry is None else read_par_entry(par_entry)
+
+    if filepath.endswith('.cmt'):
+        return read_cmt(source)
+
+    if filepath.endswith('.ifa'):
+        return read_ifa(source)
+
+    gmt = read_gmt(source)
+    return gmt.name, convert_gmt_animations(gmt, bone_names, merge_vector_curves, is_auth, remap_bones)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from ..gmt_lib import *
+from .array_math import resample_frames, sample_keyframes
+from .curve_array import GMTArrayAnimation, GMTArrayBone, GMTArrayCurve
+
+# Like array_converter, this module only depends on gmt_lib and numpy
+
+
+def resample_curve(curve: GMTArrayCurve, ratio: float) -> GMTArrayCurve:
+    """Moves the curve's keyframes to another frame rate. Values are interpolated like the game does, with lerp
+    for locations, slerp for rotations, and stepping for patterns.
+    """
+
+    if len(curve) == 0 or ratio == 1.0:
+        return curve
+
+    new_frames, times = resample_frames(curve.frames, ratio)
+
+    if curve.type == GMTCurveType.LOCATION:
+        values = sample_keyframes(curve.frames, curve.values, times, False)
+    elif curve.type == GMTCurveType.ROTATION:
+        values = sample_keyframes(curve.frames, curve.values, times, True)
+    else:
+        indices = np.clip(np.searchsorted(curve.frames, times, side='right') - 1, 0, len(curve) - 1)
+        values = curve.values[indices]
+
+    return GMTArrayCurve(curve.type, curve.channel, new_frames, values)
+
+
+def resample_animation(anm: GMTArrayAnimation, frame_rate: float) -> GMTArrayAnimation:
+    """Returns a copy of the animation with all curves moved to the given frame rate"""
+
+    ratio = frame_rate / anm.frame_rate
+
+    result = anm.copy()
+    result.frame_rate = frame_rate
+    result.end_frame = int(round(anm.end_frame * ratio))
+
+    for bone_name, bone in anm.bones.items():
+        resampled = GMTArrayBone(bone.name)
+        for curve in bone.curves:
+            resampled.set_curve(resample_curve(curve, ratio))
+
+        result.bones[bone_name] = resampled
+
+    return result
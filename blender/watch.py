@@ -0,0 +1,205 @@
+import os
+from hashlib import sha1
+from os.path import basename
+from typing import Dict, List
+
+import bpy
+from bpy.types import Operator
+
+from .action_builder import ActionBuilder
+from .conversion_plan import get_conversion_plan
+from .curve_array import GMTArrayBone
+from .importer import GMTImporter, build_action_steps, import_curve, read_file_data
+from .lazy_action import is_placeholder_action, make_placeholder_action
+
+# Seconds between checks for changed files
+WATCH_INTERVAL = 1.0
+
+
+class GMTWatchedFile:
+    """A GMT that was imported with watching enabled, and the state of its actions after the last (re)import"""
+
+    filepath: str
+    mtime: float
+    content_hash: str
+    armature_name: str
+    import_settings: Dict
+    action_names: List[str]
+    bone_hashes: List[Dict[str, str]]
+
+    def __init__(self, filepath: str, armature_name: str, import_settings: Dict):
+        self.filepath = filepath
+        self.mtime = 0.0
+        self.content_hash = ''
+        self.armature_name = armature_name
+        self.import_settings = import_settings
+        self.action_names = list()
+        self.bone_hashes = list()
+
+
+watched_files: Dict[str, GMTWatchedFile] = dict()
+
+
+def watch_gmt_file(importer: GMTImporter):
+    """Starts watching the file of a finished GMTImporter. Its animations should still be available"""
+
+    # Reloading always reads the file again, and updates actions in place
+    settings = dict(importer.import_settings, use_cache=False, lazy_actions=False)
+
+    watch = GMTWatchedFile(importer.filepath, importer.ao.name, settings)
+    watch.mtime = os.path.getmtime(importer.filepath)
+    watch.content_hash = sha1(read_file_data(importer.filepath)).hexdigest()
+    watch.action_names = list(importer.action_names)
+    watch.bone_hashes = [{name: hash_bone(bone) for name, bone in anm.bones.items()} for anm in importer.animations]
+
+    watched_files[importer.filepath] = watch
+    print(f'Watching file: {importer.filepath}')
+
+    if not bpy.app.timers.is_registered(poll_watched_files):
+        bpy.app.timers.register(poll_watched_files, first_interval=WATCH_INTERVAL, persistent=True)
+
+
+def stop_watching():
+    watched_files.clear()
+
+    if bpy.app.timers.is_registered(poll_watched_files):
+        bpy.app.timers.unregister(poll_watched_files)
+
+
+def poll_watched_files():
+    """Timer callback. The file's hash is only checked after its modification time changes"""
+
+    for watch in list(watched_files.values()):
+        try:
+            mtime = os.path.getmtime(watch.filepath)
+            if mtime == watch.mtime:
+                continue
+
+            watch.mtime = mtime
+            data = read_file_data(watch.filepath)
+        except OSError:
+            # The file might be in the middle of being replaced, so check again later
+            continue
+
+        content_hash = sha1(data).hexdigest()
+        if content_hash == watch.content_hash:
+            continue
+
+        try:
+            reload_watched_file(watch, data)
+            watch.content_hash = content_hash
+        except Exception as e:
+            # Keep the old hash, so that a partially written file is reloaded once it is complete
+            print(f'GMTWarning: Could not reload {basename(watch.filepath)} - {e}')
+
+    return WATCH_INTERVAL if watched_files else None
+
+
+def reload_watched_file(watch: GMTWatchedFile, data: bytes):
+    """Updates the FCurves of bones whose curves changed since the last (re)import. Other FCurves are kept as is"""
+
+    ao = bpy.data.objects.get(watch.armature_name)
+    if not ao or ao.type != 'ARMATURE':
+        print(f'GMTWarning: Armature {watch.armature_name} was removed. Stopped watching {watch.filepath}')
+        del watched_files[watch.filepath]
+        return
+
+    importer = GMTImporter(bpy.context, watch.filepath, watch.import_settings)
+
+    # The user's pose is kept, since nothing is imported from scratch
+    importer.ao = ao
+    importer.conversion_plan = get_conversion_plan(ao)
+    importer.bone_names = frozenset(ao.pose.bones.keys())
+    importer.setup_frame_rate()
+
+    importer.parse_data(data)
+
+    updated_bones = 0
+    for i, anm in enumerate(importer.animations):
+        bone_hashes = {name: hash_bone(bone) for name, bone in anm.bones.items()}
+
+        action = bpy.data.actions.get(watch.action_names[i]) if i < len(watch.action_names) else None
+        if action is None:
+            # New animation, or the old action was removed
+            action = bpy.data.actions.new(name=f'{anm.name}[{importer.gmt_name}]')
+            for _ in build_action_steps(bpy.context, action, anm, importer.get_interpolation()):
+                pass
+
+            if i < len(watch.action_names):
+                watch.action_names[i] = action.name
+                watch.bone_hashes[i] = bone_hashes
+            else:
+                watch.action_names.append(action.name)
+                watch.bone_hashes.append(bone_hashes)
+
+            updated_bones += len(bone_hashes)
+            continue
+
+        if is_placeholder_action(action):
+            # Not built yet, so just replace the animation it will be built from
+            make_placeholder_action(action.name, anm, importer.get_interpolation(), action)
+
+            watch.bone_hashes[i] = bone_hashes
+            continue
+
+        old_hashes = watch.bone_hashes[i]
+        changed = [name for name, h in bone_hashes.items() if old_hashes.get(name) != h]
+        removed = [name for name in old_hashes if name not in bone_hashes]
+
+        if changed or removed:
+            update_action_bones(action, anm.bones, changed, removed, importer.get_interpolation())
+            updated_bones += len(changed) + len(removed)
+
+        watch.bone_hashes[i] = bone_hashes
+
+    print(f'Reloaded {basename(watch.filepath)}: updated {updated_bones} bones')
+
+
+def update_action_bones(action: bpy.types.Action, bones: Dict[str, GMTArrayBone], changed: List[str],
+                        removed: List[str], interpolation: str = None):
+    prefixes = tuple(f'pose.bones["{name}"].' for name in changed + removed)
+
+    for fcurve in [fc for fc in action.fcurves if fc.data_path.startswith(prefixes)]:
+        action.fcurves.remove(fcurve)
+
+    for name in removed:
+        group = action.groups.get(name)
+        if group:
+            action.groups.remove(group)
+
+    builder = ActionBuilder(action)
+    for name in changed:
+        group = action.groups.get(name) or action.groups.new(name)
+
+        for curve in bones[name].curves:
+            import_curve(bpy.context, curve, name, builder, group.name, interpolation)
+
+    builder.build()
+
+
+def hash_bone(bone: GMTArrayBone) -> str:
+    h = sha1()
+    for curve in bone.curves:
+        h.update(f'{curve.type.value}|{curve.channel.value}|'.encode())
+        h.update(curve.frames.tobytes())
+        h.update(curve.values.tobytes())
+
+    return h.hexdigest()
+
+
+class StopWatchingGMT(Operator):
+    """Stops reloading GMT files that were imported with Watch for Changes"""
+    bl_idname = "import_scene.gmt_stop_watching"
+    bl_label = "Stop Watching GMT Files"
+
+    def execute(self, context):
+        count = len(watched_files)
+        stop_watching()
+
+        self.report({"INFO"}, f"Stopped watching {count} files")
+        return {'FINISHED'}
+
+
+def menu_func_watch(self, context):
+    if watched_files:
+        self.layout.operator(StopWatchingGMT.bl_idname, text=f'Stop Watching GMT Files ({len(watched_files)})')
@@ -0,0 +1,47 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# The addon's modules use relative imports, so the repository is loaded as a package under a fixed name
+# Only modules that do not need bpy or mathutils can be tested outside of Blender
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = 'yakuza_gmt'
+
+if PACKAGE not in sys.modules:
+    spec = importlib.util.spec_from_file_location(PACKAGE, ROOT / '__init__.py', submodule_search_locations=[str(ROOT)])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = package
+    spec.loader.exec_module(package)
+
+# Tests of modules that import gmt_lib, which is a git submodule that might not be checked out
+# Code that only needs numpy is in array_math, so that it is always tested
+GMT_LIB_TESTS = [
+    'test_curve_array.py',
+    'test_decimation.py',
+    'test_export_worker.py',
+    'test_import_cache.py',
+    'test_resample.py',
+]
+
+HAS_GMT_LIB = (ROOT / 'gmt_lib' / '__init__.py').is_file()
+
+collect_ignore = [] if HAS_GMT_LIB else GMT_LIB_TESTS
+
+
+def pytest_report_header(config):
+    if not HAS_GMT_LIB:
+        return f'gmt_lib is not checked out, skipping: {", ".join(GMT_LIB_TESTS)}'
+
+
+def z_rotations(angles) -> np.ndarray:
+    """Quaternions for rotations around the Z axis, in Blender's (w, x, y, z) order"""
+
+    angles = np.asarray(angles, dtype=np.float64)
+    zeros = np.zeros(len(angles))
+    return np.column_stack((np.cos(angles / 2), zeros, zeros, np.sin(angles / 2)))
+
+
+def z_rotation(angle: float) -> np.ndarray:
+    return z_rotations([angle])[0]
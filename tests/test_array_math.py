@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+from conftest import z_rotation, z_rotations
+
+from yakuza_gmt.blender.array_math import (location_error, quat_multiply, quat_slerp, resample_frames, rotation_error,
+                                           sample_keyframes, simplify_keyframes)
+
+IDENTITY = np.array([1.0, 0.0, 0.0, 0.0])
+
+
+def test_quat_multiply_identity_and_composition():
+    q = z_rotation(0.5)
+
+    assert np.allclose(quat_multiply(IDENTITY, q), q)
+    assert np.allclose(quat_multiply(q, q), z_rotation(1.0))
+
+
+def test_quat_slerp_takes_shortest_path():
+    q1 = z_rotation(0.0)
+    q2 = -z_rotation(1.0)
+
+    result = quat_slerp(q1[None], q2[None], np.array([0.5]))[0]
+    assert np.allclose(result, z_rotation(0.5))
+
+
+def test_sample_locations_between_keyframes():
+    frames = np.array([0.0, 10.0])
+    values = np.array([[0.0, 0.0, 0.0], [10.0, 20.0, 30.0]])
+
+    result = sample_keyframes(frames, values, [2.5, 5.0], False)
+    assert np.allclose(result, [[2.5, 5.0, 7.5], [5.0, 10.0, 15.0]])
+
+
+def test_sample_locations_outside_of_range_are_clamped():
+    frames = np.array([5.0, 10.0, 15.0])
+    values = np.array([[1.0], [2.0], [3.0]])
+
+    result = sample_keyframes(frames, values, [0.0, 5.0, 15.0, 20.0], False)
+    assert result[:, 0].tolist() == [1.0, 1.0, 3.0, 3.0]
+
+
+def test_sample_rotations_at_ends_keep_keyframe_sign():
+    # The last two keyframes are in opposite hemispheres, so slerp between them flips the last one
+    frames = np.array([0.0, 10.0, 20.0])
+    values = np.array([z_rotation(0.0), z_rotation(0.3), -z_rotation(0.6)])
+
+    result = sample_keyframes(frames, values, [-5.0, 0.0, 20.0, 25.0], True)
+
+    assert np.array_equal(result[0], values[0])
+    assert np.array_equal(result[1], values[0])
+    assert np.array_equal(result[2], values[2])
+    assert np.array_equal(result[3], values[2])
+
+
+def test_sample_rotations_on_inner_keyframes_are_exact():
+    frames = np.array([0.0, 10.0, 20.0])
+    values = np.array([z_rotation(0.0), z_rotation(0.3), z_rotation(0.6)])
+
+    result = sample_keyframes(frames, values, [10.0], True)
+    assert np.allclose(result[0], values[1])
+
+
+def test_sample_single_keyframe():
+    values = np.array([[1.0, 2.0, 3.0]])
+
+    result = sample_keyframes([4.0], values, [0.0, 4.0, 8.0], False)
+    assert np.array_equal(result, np.repeat(values, 3, axis=0))
+
+
+def interpolate(frames: np.ndarray, values: np.ndarray, keep: np.ndarray) -> np.ndarray:
+    return np.column_stack([np.interp(frames, frames[keep], values[keep, i]) for i in range(values.shape[1])])
+
+
+def test_linear_keyframes_keep_only_ends():
+    frames = np.arange(20, dtype=np.float64)
+    values = np.column_stack((frames, frames * 2.0, np.full(20, 3.0)))
+
+    keep = simplify_keyframes(frames, values, 0.001, location_error)
+    assert np.flatnonzero(keep).tolist() == [0, 19]
+
+
+@pytest.mark.parametrize('tolerance', [0.1, 0.01, 0.001])
+def test_locations_stay_within_tolerance(tolerance):
+    frames = np.arange(100, dtype=np.float64)
+    values = np.column_stack((np.sin(frames / 7.0), np.cos(frames / 11.0), frames * 0.05))
+
+    keep = simplify_keyframes(frames, values, tolerance, location_error)
+
+    assert keep[0] and keep[-1] and not keep.all()
+    assert location_error(interpolate(frames, values, keep), values).max() <= tolerance
+
+
+@pytest.mark.parametrize('slerp', [False, True])
+def test_rotations_stay_within_tolerance(slerp):
+    frames = np.arange(100, dtype=np.float64)
+    values = z_rotations(np.sin(frames / 9.0) * 2.0)
+    tolerance = 0.005
+
+    keep = simplify_keyframes(frames, values, tolerance, rotation_error, slerp=slerp)
+
+    if slerp:
+        interpolated = sample_keyframes(frames[keep], values[keep], frames, True)
+    else:
+        interpolated = interpolate(frames, values, keep)
+
+    assert not keep.all()
+    assert rotation_error(interpolated, values).max() <= tolerance + 1e-9
+
+
+def test_rotation_error_ignores_sign_and_scale():
+    q = z_rotations(np.array([0.4]))
+
+    assert rotation_error(-q * 2.0, q)[0] == pytest.approx(0.0, abs=1e-7)
+    assert rotation_error(z_rotations(np.array([0.5])), q)[0] == pytest.approx(0.1)
+
+    # A linearly interpolated quaternion can be zero, which should never be within tolerance
+    assert rotation_error(np.zeros((1, 4)), q)[0] == pytest.approx(np.pi)
+
+
+def test_resample_frames_merges_keyframes_on_the_same_frame():
+    new_frames, times = resample_frames([0.0, 1.0, 2.0, 3.0, 9.0], 0.5)
+
+    assert new_frames.tolist() == [0.0, 1.0, 2.0, 4.0]
+    assert times.tolist() == [0.0, 2.0, 4.0, 8.0]
@@ -0,0 +1,48 @@
+import pytest
+
+from yakuza_gmt.blender.bone_mapping import GMTBoneMapping, detect_engine, translate_bone_name
+
+
+@pytest.mark.parametrize('name, source, target, expected', [
+    ('center', 'OLD', 'DE', 'center_c_n'),
+    ('naka1_r', 'OLD', 'NEW', 'naka1_r_n'),
+    ('ude1_l', 'OLD', 'DE', 'ude1_l_n'),
+    ('kosi_c_n', 'NEW', 'OLD', 'kosi'),
+    ('naka0_r_n', 'DE', 'OLD', 'naka0_r'),
+    ('ude1_r_n', 'DE', 'NEW', 'ude1_r_n'),
+    ('center', 'OLD', 'OLD', 'center'),
+])
+def test_translate_bone_name(name, source, target, expected):
+    assert translate_bone_name(name, source, target) == expected
+
+
+@pytest.mark.parametrize('names, expected', [
+    (['center', 'kosi', 'ude1_r', 'naka1_r'], 'OLD'),
+    (['center_c_n', 'kosi_c_n', 'ude1_r_n', 'naka1_r_n'], 'NEW'),
+    (['center_c_n', 'kosi_c_n', 'ude1_r_n', 'naka0_r_n'], 'DE'),
+    # A few unusual names should not change the result
+    (['center_c_n', 'kosi_c_n', 'ude1_r_n', 'extra'], 'NEW'),
+])
+def test_detect_engine(names, expected):
+    assert detect_engine(names) == expected
+
+
+def test_mapping_only_includes_target_bones():
+    mapping = GMTBoneMapping(['center', 'ude1_r', 'missing'], {'center_c_n', 'ude1_r_n', 'naka0_r_n'})
+
+    assert (mapping.source_engine, mapping.target_engine) == ('OLD', 'DE')
+    assert mapping.index == {'center': 'center_c_n', 'ude1_r': 'ude1_r_n'}
+    assert mapping.get('missing') is None
+
+
+def test_mapping_keeps_names_that_exist_in_target():
+    # Source is detected as OLD, but its only engine specific name already matches the target
+    mapping = GMTBoneMapping(['center', 'kosi', 'ude1_r_n'], {'center_c_n', 'kosi_c_n', 'ude1_r_n'})
+
+    assert mapping.index == {'center': 'center_c_n', 'kosi': 'kosi_c_n', 'ude1_r_n': 'ude1_r_n'}
+
+
+def test_mapping_without_target_names_uses_target_engine():
+    mapping = GMTBoneMapping(['center_c_n', 'ude1_r_n'], target_engine='OLD')
+
+    assert mapping.index == {'center_c_n': 'center', 'ude1_r_n': 'ude1_r'}
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from yakuza_gmt.blender.curve_array import GMTArrayAnimation, GMTArrayBone, GMTArrayCurve
+from yakuza_gmt.gmt_lib import GMTCurve, GMTCurveChannel, GMTCurveType, GMTKeyframe
+
+
+def test_from_curve():
+    curve = GMTCurve(GMTCurveType.LOCATION, GMTCurveChannel.ALL)
+    curve.keyframes = [GMTKeyframe(0, (1.0, 2.0, 3.0)), GMTKeyframe(4, (4.0, 5.0, 6.0))]
+
+    array_curve = GMTArrayCurve.from_curve(curve)
+
+    assert array_curve.frames.tolist() == [0.0, 4.0]
+    assert array_curve.values.tolist() == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+
+
+def test_pattern_values_have_one_channel():
+    curve = GMTArrayCurve(GMTCurveType.PATTERN_HAND, GMTCurveChannel.ALL, [0, 1], [3, 4])
+
+    assert curve.values.shape == (2, 1)
+
+
+@pytest.mark.parametrize('values, shape', [(np.empty((0, 4)), (0, 4)), ([], (0, 0))])
+def test_empty_curve(values, shape):
+    curve = GMTArrayCurve(GMTCurveType.ROTATION, GMTCurveChannel.ALL, [], values)
+
+    assert len(curve) == 0 and curve.values.shape == shape
+    assert len(GMTArrayCurve.from_curve(GMTCurve(GMTCurveType.ROTATION, GMTCurveChannel.ALL))) == 0
+
+
+def test_animation_dict_round_trip():
+    anm = GMTArrayAnimation('test', 30.0, 20)
+    anm.is_face = True
+
+    bone = GMTArrayBone('center_c_n')
+    bone.set_curve(GMTArrayCurve(GMTCurveType.LOCATION, GMTCurveChannel.ALL, [0.0, 20.0], np.arange(6.0)))
+    bone.set_curve(GMTArrayCurve(GMTCurveType.ROTATION, GMTCurveChannel.ALL, [], np.empty((0, 4))))
+    bone.set_curve(GMTArrayCurve(GMTCurveType.PATTERN_HAND, GMTCurveChannel.ALL, [0.0, 3.0], [1, 2]))
+    anm.bones[bone.name] = bone
+    anm.bones['kosi_c_n'] = GMTArrayBone('kosi_c_n')
+    anm.bones['kosi_c_n'].set_curve(GMTArrayCurve(GMTCurveType.ROTATION, GMTCurveChannel.ALL, [5.0], [[1, 0, 0, 0]]))
+
+    data = anm.to_dict()
+
+    # Only types that ID properties can hold
+    def check_types(value):
+        if isinstance(value, dict):
+            assert all(isinstance(k, str) and check_types(v) for k, v in value.items())
+        elif isinstance(value, list):
+            assert all(type(v) is float for v in value)
+        else:
+            assert type(value) in (str, int, float, bool)
+        return True
+
+    check_types(data)
+
+    loaded = GMTArrayAnimation.from_dict(data)
+
+    assert (loaded.name, loaded.frame_rate, loaded.end_frame, loaded.is_face) == ('test', 30.0, 20, True)
+    assert list(loaded.bones) == ['center_c_n', 'kosi_c_n']
+
+    for name, bone in anm.bones.items():
+        assert len(loaded.bones[name].curves) == len(bone.curves)
+
+        for curve, loaded_curve in zip(bone.curves, loaded.bones[name].curves):
+            assert (loaded_curve.type, loaded_curve.channel) == (curve.type, curve.channel)
+            assert np.array_equal(loaded_curve.frames, curve.frames)
+            assert np.array_equal(loaded_curve.values, curve.values) and loaded_curve.values.shape == curve.values.shape
@@ -0,0 +1,21 @@
+import numpy as np
+from conftest import z_rotations
+
+from yakuza_gmt.blender.curve_array import GMTArrayBone, GMTArrayCurve
+from yakuza_gmt.blender.decimation import decimate_bone
+from yakuza_gmt.gmt_lib import GMTCurveChannel, GMTCurveType
+
+
+def test_decimate_bone():
+    frames = np.arange(10, dtype=np.float64)
+    bone = GMTArrayBone('center_c_n')
+    bone.set_curve(GMTArrayCurve(GMTCurveType.LOCATION, GMTCurveChannel.ALL, frames, np.column_stack((frames,) * 3)))
+    bone.set_curve(GMTArrayCurve(GMTCurveType.ROTATION, GMTCurveChannel.ALL, frames[:2], z_rotations(frames[:2])))
+    bone.set_curve(GMTArrayCurve(GMTCurveType.PATTERN_HAND, GMTCurveChannel.ALL, frames[:5], [1, 1, 2, 2, 2]))
+
+    result, removed = decimate_bone(bone, 0.001, 0.001)
+
+    assert result.location.frames.tolist() == [0.0, 9.0]
+    assert len(result.rotation) == 2
+    assert result.patterns[0].frames.tolist() == [0.0, 2.0, 4.0]
+    assert removed == 8 + 2
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from yakuza_gmt.blender.array_math import sample_keyframes
+from yakuza_gmt.blender.error import GMTError
+from yakuza_gmt.blender.export_worker import (GMTBoneSamples, GMTCurveSamples, GMTExportOptions, build_animation,
+                                              build_curve, get_sample_frames, simplify_samples)
+from yakuza_gmt.gmt_lib import GMTCurveChannel, GMTCurveType
+
+
+class IdentityConversion:
+    head_offset = np.zeros(3)
+    rest_matrix = np.eye(3)
+    from_blender_pre = np.array([1.0, 0.0, 0.0, 0.0])
+    from_blender_post = np.array([1.0, 0.0, 0.0, 0.0])
+
+
+def make_options(**settings) -> GMTExportOptions:
+    return GMTExportOptions(dict(dict(gmt_game='DE', adaptive_sampling=True, location_tolerance=0.001,
+                                      rotation_tolerance=0.002), **settings))
+
+
+@pytest.mark.parametrize('adaptive_sampling', [True, False])
+@pytest.mark.parametrize('frame_ratio', [1.0, 0.5])
+def test_sample_frames_without_keyframes(adaptive_sampling, frame_ratio):
+    options = make_options(adaptive_sampling=adaptive_sampling)
+
+    assert get_sample_frames([], frame_ratio, GMTCurveType.LOCATION, options) == ([], [])
+
+
+def test_adaptive_sample_frames_cover_keyframe_range():
+    gmt_frames, times = get_sample_frames([10.0, 20.0], 0.5, GMTCurveType.ROTATION, make_options())
+
+    assert gmt_frames == [5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+    assert times == [10.0, 12.0, 14.0, 16.0, 18.0, 20.0]
+
+
+def test_pattern_sample_frames_are_not_adaptive():
+    assert get_sample_frames([0.0, 4.0], 1.0, GMTCurveType.PATTERN_HAND, make_options()) == ([0.0, 4.0], [0.0, 4.0])
+
+
+@pytest.mark.parametrize('curve_type, channel, width', [
+    (GMTCurveType.LOCATION, GMTCurveChannel.ALL, 3),
+    (GMTCurveType.ROTATION, GMTCurveChannel.ALL, 4),
+])
+def test_curve_without_keyframes_is_empty(curve_type, channel, width):
+    # Same as an action with an FCurve that has no keyframe points
+    samples = GMTCurveSamples(curve_type, channel, [], np.empty((0, width)))
+    curve = build_curve(samples, GMTBoneSamples('center_c_n', IdentityConversion()), make_options())
+
+    assert curve.keyframes == []
+
+
+def test_simplified_locations_stay_within_tolerance():
+    frames = np.arange(61, dtype=np.float64)
+    values = np.column_stack((np.sin(frames / 30.0), np.cos(frames / 40.0), frames * 0.01))
+    options = make_options()
+
+    kept_frames, kept_values = simplify_samples(frames.tolist(), values, GMTCurveType.LOCATION, options)
+
+    assert len(kept_frames) < len(frames)
+    assert kept_frames[0] == frames[0] and kept_frames[-1] == frames[-1]
+
+    errors = np.linalg.norm(sample_keyframes(kept_frames, kept_values, frames, False) - values, axis=1)
+    assert errors.max() <= options.location_tolerance
+
+
+def test_simplified_rotations_stay_within_tolerance():
+    frames = np.arange(61, dtype=np.float64)
+    angles = np.sin(frames / 9.0)
+    values = np.column_stack((np.cos(angles / 2), np.zeros(len(frames)), np.sin(angles / 2), np.zeros(len(frames))))
+    options = make_options()
+
+    kept_frames, kept_values = simplify_samples(frames.tolist(), values, GMTCurveType.ROTATION, options)
+
+    assert len(kept_frames) < len(frames)
+
+    interpolated = sample_keyframes(kept_frames, kept_values, frames, True)
+    dots = np.abs(np.sum(interpolated * values, axis=1)) / np.linalg.norm(interpolated, axis=1)
+    assert (2.0 * np.arccos(np.clip(dots, 0.0, 1.0))).max() <= options.rotation_tolerance + 1e-9
+
+
+def test_simplify_samples_is_disabled_without_adaptive_sampling():
+    frames = [0.0, 1.0, 2.0]
+    values = np.zeros((3, 3))
+
+    kept_frames, kept_values = simplify_samples(frames, values, GMTCurveType.LOCATION,
+                                                make_options(adaptive_sampling=False))
+
+    assert kept_frames is frames and kept_values is values
+
+
+def test_remapped_bones_are_renamed():
+    bones = [GMTBoneSamples(name, IdentityConversion()) for name in ['center_c_n', 'kosi_c_n', 'ude1_r_n']]
+
+    anm = build_animation('test', bones, make_options(gmt_game='YAKUZA5', remap_bones=True))
+
+    assert sorted(anm.bones) == ['center', 'kosi', 'ude1_r']
+
+
+def test_remapped_bones_with_the_same_name_raise():
+    # Both are remapped to "kosi" for old engine games
+    bones = [GMTBoneSamples(name, IdentityConversion()) for name in ['center_c_n', 'kosi_c_n', 'kosi_n']]
+
+    with pytest.raises(GMTError, match='"kosi_c_n" and "kosi_n"'):
+        build_animation('test', bones, make_options(gmt_game='YAKUZA5', remap_bones=True))
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pytest
+
+from yakuza_gmt.blender import import_cache
+from yakuza_gmt.blender.curve_array import GMTArrayAnimation, GMTArrayBone, GMTArrayCurve
+from yakuza_gmt.blender.import_cache import (clear_cached_animations, evict_cached_animations, load_cached_animations,
+                                             make_cache_key, save_cached_animations)
+from yakuza_gmt.gmt_lib import GMTCurveChannel, GMTCurveType
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(import_cache, 'CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def make_animation(name: str, bone_names) -> GMTArrayAnimation:
+    anm = GMTArrayAnimation(name, 30.0, 20)
+    for i, bone_name in enumerate(bone_names):
+        bone = GMTArrayBone(bone_name)
+        bone.set_curve(GMTArrayCurve(GMTCurveType.LOCATION, GMTCurveChannel.ALL, [0.0, 20.0], np.full((2, 3), i)))
+        bone.set_curve(GMTArrayCurve(GMTCurveType.ROTATION, GMTCurveChannel.ALL, [5.0], [[1.0, 0.0, 0.0, 0.0]]))
+        bone.set_curve(GMTArrayCurve(GMTCurveType.PATTERN_HAND, GMTCurveChannel.ALL, [0.0, 3.0], [1, 2]))
+        anm.bones[bone_name] = bone
+
+    return anm
+
+
+def test_round_trip():
+    animations = [make_animation('first', ['center_c_n', 'kosi_c_n']), make_animation('second', ['ude1_r_n'])]
+    animations[1].bones['empty'] = GMTArrayBone('empty')
+    animations[1].bones['empty'].set_curve(GMTArrayCurve(GMTCurveType.LOCATION, GMTCurveChannel.X, [], np.empty((0, 1))))
+
+    save_cached_animations('key', 'test.gmt', animations)
+    gmt_name, loaded = load_cached_animations('key')
+
+    assert gmt_name == 'test.gmt'
+    assert [anm.name for anm in loaded] == ['first', 'second']
+    assert list(loaded[1].bones) == ['ude1_r_n', 'empty']
+
+    for anm, loaded_anm in zip(animations, loaded):
+        assert (loaded_anm.frame_rate, loaded_anm.end_frame) == (anm.frame_rate, anm.end_frame)
+
+        for bone_name, bone in anm.bones.items():
+            loaded_curves = loaded_anm.bones[bone_name].curves
+            assert len(loaded_curves) == len(bone.curves)
+
+            for curve, loaded_curve in zip(bone.curves, loaded_curves):
+                assert (loaded_curve.type, loaded_curve.channel) == (curve.type, curve.channel)
+                assert np.array_equal(loaded_curve.frames, curve.frames)
+                assert np.array_equal(loaded_curve.values, curve.values)
+
+
+def test_missing_entry():
+    assert load_cached_animations('missing') is None
+
+
+def test_unreadable_entry(cache_dir):
+    with open(cache_dir / 'broken.npz', 'wb') as f:
+        f.write(b'not a zip file')
+
+    assert load_cached_animations('broken') is None
+
+
+def test_save_leaves_no_temporary_file(cache_dir):
+    save_cached_animations('key', 'test.gmt', [make_animation('anm', ['center_c_n'])])
+
+    assert os.listdir(cache_dir) == ['key.npz']
+
+
+def test_eviction_removes_least_recently_used(cache_dir):
+    for i, key in enumerate(['old', 'used', 'new']):
+        save_cached_animations(key, 'test.gmt', [make_animation('anm', ['center_c_n'])])
+        os.utime(cache_dir / f'{key}.npz', (1000 + i, 1000 + i))
+
+    # Loading counts as using the entry
+    assert load_cached_animations('used')
+
+    size = os.path.getsize(cache_dir / 'new.npz') + os.path.getsize(cache_dir / 'used.npz')
+    evict_cached_animations(size)
+
+    assert sorted(os.listdir(cache_dir)) == ['new.npz', 'used.npz']
+
+
+def test_save_evicts_past_size_limit(cache_dir, monkeypatch):
+    save_cached_animations('first', 'test.gmt', [make_animation('anm', ['center_c_n'])])
+    os.utime(cache_dir / 'first.npz', (1000, 1000))
+
+    # Only room for a single entry
+    monkeypatch.setattr(import_cache, 'CACHE_SIZE_LIMIT', os.path.getsize(cache_dir / 'first.npz') * 3 // 2)
+    save_cached_animations('second', 'test.gmt', [make_animation('anm', ['center_c_n'])])
+
+    assert os.listdir(cache_dir) == ['second.npz']
+
+
+def test_clear(cache_dir):
+    for key in ['a', 'b']:
+        save_cached_animations(key, 'test.gmt', [make_animation('anm', ['center_c_n'])])
+
+    assert clear_cached_animations() == 2
+    assert os.listdir(cache_dir) == []
+    assert load_cached_animations('a') is None
+
+
+def test_cache_key_depends_on_settings():
+    base = make_cache_key(b'gmt', 'rest', False, False)
+
+    assert make_cache_key(b'gmt', 'rest', False, False) == base
+    assert len({
+        base,
+        make_cache_key(b'other', 'rest', False, False),
+        make_cache_key(b'gmt', 'other', False, False),
+        make_cache_key(b'gmt', 'rest', True, False),
+        make_cache_key(b'gmt', 'rest', False, True),
+        make_cache_key(b'gmt', 'rest', False, False, (0.001, 0.002)),
+        make_cache_key(b'gmt', 'rest', False, False, (0.001, 0.003)),
+        make_cache_key(b'gmt', 'rest', False, False, remap_bones=True),
+        make_cache_key(b'gmt', 'rest', False, False, frame_rate=60.0),
+    }) == 9
@@ -0,0 +1,173 @@
+import os
+import struct
+
+import pytest
+
+from yakuza_gmt.blender.par_archive import (PARC_DATA_ALIGNMENT, compress_sllz_v2, decompress_sllz,
+                                            read_par_entry, read_par_index, write_par_entries)
+
+# Root folder with a.bin and a "motion" subfolder with b.gmt and c.gmt
+FOLDERS = [('.', 1, 1, 1, 0), ('motion', 0, 0, 2, 1)]
+FILES = [('a.bin', b'A' * 100), ('b.gmt', b'B' * 300), ('c.gmt', b'C' * 50)]
+
+
+def make_par(path, endian='>', files=FILES, compression=None, data_start=PARC_DATA_ALIGNMENT) -> str:
+    """Writes a PAR with FOLDERS and the given (name, stored data) files.
+    Each file starts on the data alignment from data_start, or right after the previous one if data_start is None.
+    """
+
+    names = b''.join(name.encode().ljust(0x40, b'\0') for name, *_ in FOLDERS + files)
+    folder_info_offset = 0x20 + len(names)
+    file_info_offset = folder_info_offset + len(FOLDERS) * 0x20
+    toc_end = file_info_offset + len(files) * 0x20
+
+    folder_infos = b''.join(struct.pack(f'{endian}5I', *info, 0x10) + bytes(12) for _, *info in FOLDERS)
+
+    offset = toc_end if data_start is None else data_start
+    file_infos, blobs = b'', list()
+    for i, (_, data) in enumerate(files):
+        flags = compression[i] if compression else 0
+        file_infos += struct.pack(f'{endian}6I', flags, len(data), len(data), offset, 0x20, 0) + bytes(8)
+        blobs.append((offset, data))
+        offset += len(data) if data_start is None else -(-len(data) // PARC_DATA_ALIGNMENT) * PARC_DATA_ALIGNMENT
+
+    archive = bytearray(b'PARC' + bytes((2, 1 if endian == '>' else 0, 0, 0)) + bytes(8))
+    archive += struct.pack(f'{endian}4I', len(FOLDERS), folder_info_offset, len(files), file_info_offset)
+    archive += names + folder_infos + file_infos
+
+    for offset, data in blobs:
+        archive += bytes(offset - len(archive)) + data
+
+    with open(path, 'wb') as f:
+        f.write(archive)
+
+    return str(path)
+
+
+def read_all(filepath: str):
+    index = read_par_index(filepath)
+    return {entry.path: index.read_entry(entry) for entry in index.entries}
+
+
+@pytest.mark.parametrize('endian', ['>', '<'])
+def test_read_index(tmp_path, endian):
+    filepath = make_par(tmp_path / 'test.par', endian)
+
+    index = read_par_index(filepath)
+
+    assert [e.path for e in index.entries] == ['a.bin', 'motion/b.gmt', 'motion/c.gmt']
+    assert index.folder_paths == ['', 'motion/']
+    assert index.find('b.gmt') is index.entries[1]
+    assert read_all(filepath)['motion/c.gmt'] == b'C' * 50
+
+
+def test_read_entry_from_location(tmp_path):
+    files = [('a.bin', compress_sllz_v2(b'packed' * 20, '>')), ('b.gmt', b'B' * 300), ('c.gmt', b'C' * 50)]
+    filepath = make_par(tmp_path / 'test.par', files=files, compression=[0x80000001, 0, 0])
+
+    index = read_par_index(filepath)
+
+    assert [read_par_entry(index.get_location(e)) for e in index.entries] == [b'packed' * 20, b'B' * 300, b'C' * 50]
+
+
+def test_replace_in_place_keeps_other_entries(tmp_path):
+    filepath = make_par(tmp_path / 'test.par')
+    before = read_par_index(filepath)
+
+    assert write_par_entries(filepath, {'motion/b.gmt': b'new'}) == (1, 0)
+
+    after = read_par_index(filepath)
+    assert [e.offset for e in after.entries] == [e.offset for e in before.entries]
+    assert read_all(filepath) == {'a.bin': b'A' * 100, 'motion/b.gmt': b'new', 'motion/c.gmt': b'C' * 50}
+
+
+def test_replace_with_larger_data_appends(tmp_path):
+    filepath = make_par(tmp_path / 'test.par')
+    size = os.path.getsize(filepath)
+
+    write_par_entries(filepath, {'a.bin': b'X' * 5000})
+
+    entry = read_par_index(filepath).find('a.bin')
+    assert entry.offset >= size and entry.offset % PARC_DATA_ALIGNMENT == 0
+    assert read_all(filepath)['a.bin'] == b'X' * 5000
+
+
+def test_add_entries(tmp_path):
+    filepath = make_par(tmp_path / 'test.par')
+
+    assert write_par_entries(filepath, {'motion/bb.gmt': b'BB', 'root.bin': b'R'}) == (0, 2)
+
+    index = read_par_index(filepath)
+    assert [e.path for e in index.entries] == ['a.bin', 'root.bin', 'motion/b.gmt', 'motion/bb.gmt', 'motion/c.gmt']
+    assert read_all(filepath) == {
+        'a.bin': b'A' * 100,
+        'root.bin': b'R',
+        'motion/b.gmt': b'B' * 300,
+        'motion/bb.gmt': b'BB',
+        'motion/c.gmt': b'C' * 50,
+    }
+
+
+def test_add_entry_moves_overlapped_entries_with_their_flags(tmp_path):
+    # Data starts right after the table of contents, so adding an entry has to move the first entries
+    stored = compress_sllz_v2(b'packed' * 20, '>')
+    files = [('a.bin', stored), ('b.gmt', b'B' * 300), ('c.gmt', b'C' * 50)]
+    filepath = make_par(tmp_path / 'test.par', files=files, compression=[0x80000001, 0, 0], data_start=None)
+
+    write_par_entries(filepath, {'motion/d.gmt': b'D'})
+
+    index = read_par_index(filepath)
+    with open(filepath, 'rb') as f:
+        f.seek(index.file_info_offset)
+        flags = struct.unpack('>I', f.read(4))[0]
+
+    assert flags == 0x80000001
+    assert read_all(filepath) == {
+        'a.bin': b'packed' * 20,
+        'motion/b.gmt': b'B' * 300,
+        'motion/c.gmt': b'C' * 50,
+        'motion/d.gmt': b'D',
+    }
+
+
+def test_compressed_entries(tmp_path):
+    filepath = make_par(tmp_path / 'test.par')
+    data = bytes(range(256)) * 600
+
+    write_par_entries(filepath, {'motion/c.gmt': data, 'motion/e.gmt': b'E' * 10}, compress=True)
+
+    index = read_par_index(filepath)
+    assert index.find('c.gmt').is_compressed and index.find('e.gmt').is_compressed
+    assert not index.find('a.bin').is_compressed
+    assert read_all(filepath)['motion/c.gmt'] == data
+    assert read_all(filepath)['motion/e.gmt'] == b'E' * 10
+
+
+def test_failed_write_leaves_archive_unchanged(tmp_path):
+    filepath = make_par(tmp_path / 'test.par')
+    with open(filepath, 'rb') as f:
+        before = f.read()
+
+    with pytest.raises(ValueError):
+        write_par_entries(filepath, {'a.bin': b'replaced', 'missing/x.gmt': b'X'})
+
+    with open(filepath, 'rb') as f:
+        assert f.read() == before
+
+    assert os.listdir(tmp_path) == ['test.par']
+
+
+@pytest.mark.parametrize('endian', ['>', '<'])
+@pytest.mark.parametrize('size', [0, 1, 0x10000, 0x25000])
+def test_sllz_v2_round_trip(endian, size):
+    data = bytes((i * 7) & 0xFF for i in range(size))
+
+    assert decompress_sllz(compress_sllz_v2(data, endian)) == data
+
+
+def test_sllz_v1_back_references():
+    # "ab" as literals, then a copy of 5 bytes from 2 bytes back, which overlaps the bytes it writes
+    body = bytes((0x20,)) + b'ab' + bytes((0x12, 0x00))
+    data = b'SLLZ' + bytes((0, 1)) + struct.pack('<HII', 0x10, 7, 0x10 + len(body)) + body
+
+    assert decompress_sllz(data) == b'abababa'
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from conftest import z_rotations
+
+from yakuza_gmt.blender.curve_array import GMTArrayAnimation, GMTArrayBone, GMTArrayCurve
+from yakuza_gmt.blender.resample import resample_animation, resample_curve
+from yakuza_gmt.gmt_lib import GMTCurveChannel, GMTCurveType
+
+
+def test_resampled_locations_keep_end_values():
+    curve = GMTArrayCurve(GMTCurveType.LOCATION, GMTCurveChannel.ALL, [0.0, 5.0, 9.0],
+                          [[0.0, 0.0, 0.0], [5.0, 1.0, 2.0], [9.0, -1.0, 4.0]])
+
+    resampled = resample_curve(curve, 2.0)
+
+    assert resampled.frames.tolist() == [0.0, 10.0, 18.0]
+    assert np.array_equal(resampled.values, curve.values)
+
+
+def test_resampled_rotations_keep_end_values():
+    # The last keyframe is in the opposite hemisphere, so it would be flipped if it were slerped
+    curve = GMTArrayCurve(GMTCurveType.ROTATION, GMTCurveChannel.ALL, [0.0, 3.0, 6.0],
+                          np.vstack((z_rotations([0.0, 0.3]), -z_rotations([0.6]))))
+
+    resampled = resample_curve(curve, 30.0 / 60.0)
+
+    assert resampled.frames.tolist() == [0.0, 2.0, 3.0]
+    assert np.array_equal(resampled.values[0], curve.values[0])
+    assert np.array_equal(resampled.values[-1], curve.values[-1])
+    assert np.allclose(np.abs(resampled.values[1] @ z_rotations([0.4])[0]), 1.0)
+
+
+def test_resampled_patterns_are_stepped():
+    curve = GMTArrayCurve(GMTCurveType.PATTERN_HAND, GMTCurveChannel.ALL, [0.0, 3.0, 5.0], [1, 2, 3])
+
+    resampled = resample_curve(curve, 0.5)
+
+    assert resampled.frames.tolist() == [0.0, 2.0]
+    assert resampled.values[:, 0].tolist() == [1.0, 2.0]
+
+
+@pytest.mark.parametrize('frames, ratio', [([], 2.0), ([0.0, 1.0], 1.0)])
+def test_resample_curve_unchanged(frames, ratio):
+    curve = GMTArrayCurve(GMTCurveType.LOCATION, GMTCurveChannel.ALL, frames, np.zeros((len(frames), 3)))
+
+    assert resample_curve(curve, ratio) is curve
+
+
+def test_resample_animation():
+    bone = GMTArrayBone('center_c_n')
+    bone.set_curve(GMTArrayCurve(GMTCurveType.LOCATION, GMTCurveChannel.ALL, [0.0, 30.0], np.zeros((2, 3))))
+
+    anm = GMTArrayAnimation('test', 30.0, 30)
+    anm.bones[bone.name] = bone
+
+    resampled = resample_animation(anm, 60.0)
+
+    assert (resampled.frame_rate, resampled.end_frame) == (60.0, 60)
+    assert resampled.bones['center_c_n'].location.frames.tolist() == [0.0, 60.0]
+    assert anm.bones['center_c_n'].location.frames.tolist() == [0.0, 30.0]